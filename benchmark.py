@@ -0,0 +1,1029 @@
+#############################################################################
+# Headless benchmarks for the capture pipeline, no GUI or game needed.     #
+#                                                                           #
+#   python benchmark.py engine shot1.png shot2.png --runs 10                #
+#   python benchmark.py filter shot1.png --runs 20                          #
+#   python benchmark.py hdr --runs 10                                       #
+#   python benchmark.py scale shot1.png                                     #
+#   python benchmark.py corpus screenshots/ --output results.json           #
+#   python benchmark.py vocabulary screenshots/ --runs 3                    #
+#   python benchmark.py bodyarmor --samples 2000                            #
+#   python benchmark.py match --samples 20000 --workers 4                   #
+#   python benchmark.py normalize --runs 5                                  #
+#   python benchmark.py storage --sizes 100 10000 1000000                   #
+#   python benchmark.py tail --sizes 100 1000000 --rows 5                   #
+#############################################################################
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize_ms(samples):
+    ms = [s * 1000.0 for s in samples]
+    return {
+        "n": len(ms),
+        "mean": statistics.fmean(ms) if ms else 0.0,
+        "p50": percentile(ms, 50),
+        "p90": percentile(ms, 90),
+        "p99": percentile(ms, 99),
+        "max": max(ms) if ms else 0.0,
+    }
+
+
+def print_summary(label, summary):
+    print(f"{label:<28} n={summary['n']:<5} mean={summary['mean']:8.2f}ms  p50={summary['p50']:8.2f}ms  "
+          f"p90={summary['p90']:8.2f}ms  p99={summary['p99']:8.2f}ms  max={summary['max']:8.2f}ms")
+
+
+def load_images(paths):
+    import numpy as np
+    from PIL import Image
+
+    return [(path, np.array(Image.open(path).convert("RGB"))) for path in paths]
+
+
+def time_calls(fn, items, runs):
+    samples = []
+    for _ in range(runs):
+        for item in items:
+            start = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+#####################################################
+# Per-capture latency of the persistent OCR engine  #
+# against the pytesseract subprocess per call path  #
+#####################################################
+def bench_engine(args):
+    import pytesseract
+
+    import ocr_engine
+
+    images = [img for _, img in load_images(args.images)]
+    engine = ocr_engine.OCREngine(args.tessdata)
+
+    cli_config = ocr_engine._build_cli_config(args.psm)
+    before = time_calls(lambda img: pytesseract.image_to_string(img, config=cli_config, lang=args.lang),
+                        images, args.runs)
+    print_summary("pytesseract (before)", summarize_ms(before))
+
+    if not engine.warm_up(lang=args.lang, psm=args.psm):
+        print("tesserocr is not available, the engine falls back to pytesseract.")
+        return
+
+    after = time_calls(lambda img: engine.image_to_string(img, psm=args.psm, lang=args.lang), images, args.runs)
+    print_summary(f"{engine.backend} (after)", summarize_ms(after))
+    engine.close()
+
+
+def synthetic_frames(sizes, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    return [(f"random {w}x{h}", rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)) for w, h in sizes]
+
+
+def synthetic_tooltip_frames(sizes, seed=0):
+    """Dark noisy frames with tooltip-like lines of coloured text and a few bright glints."""
+    import cv2
+    import numpy as np
+
+    colours = [(255, 255, 255), (255, 220, 110), (200, 180, 120), (140, 140, 255), (230, 120, 40)]
+    rng = np.random.default_rng(seed)
+    frames = []
+    for w, h in sizes:
+        img = rng.integers(0, 40, size=(h, w, 3), dtype=np.uint8)
+        scale = h / 1080
+        x0, y0 = int(w * 0.3), int(h * 0.2)
+        for i in range(12):
+            colour = colours[i % len(colours)]
+            y = y0 + int(i * 34 * scale)
+            cv2.putText(img, f"Replica Stack Size: {i}/20 Enchanted Line {i}", (x0, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8 * scale, colour, max(1, int(2 * scale)), cv2.LINE_AA)
+        for _ in range(8):
+            cx, cy = int(rng.integers(0, w)), int(rng.integers(0, h))
+            cv2.circle(img, (cx, cy), int(rng.integers(2, 12)), (255, 255, 255), -1)
+        frames.append((f"synthetic {w}x{h}", img))
+    return frames
+
+
+#####################################################
+# The colour filter as it was before the LUT, kept  #
+# as the reference the new one must match exactly   #
+#####################################################
+def legacy_filter_item_text(image_np):
+    import cv2
+    import numpy as np
+
+    import ocr_filters
+
+    img_bgr = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+    hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
+
+    combined_mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+    for lo, hi in ocr_filters.OCR_COLOR_RANGES:
+        current_mask = cv2.inRange(hsv, lo, hi)
+        cv2.bitwise_or(combined_mask, current_mask, dst=combined_mask)
+
+    kernel = np.ones((1, 1), np.uint8)
+    combined_mask = cv2.morphologyEx(combined_mask, cv2.MORPH_CLOSE, kernel)
+    return cv2.cvtColor(combined_mask, cv2.COLOR_GRAY2RGB)
+
+
+#####################################################
+# LUT colour filter against the per-range inRange   #
+# reference: exact mask match, then latency         #
+#####################################################
+def bench_filter(args):
+    import numpy as np
+
+    import ocr_filters
+
+    frames = load_images(args.images) if args.images else synthetic_frames([(1920, 1080), (2560, 1440)])
+
+    mismatches = 0
+    for name, img in frames:
+        expected = legacy_filter_item_text(img)[:, :, 0]
+        actual = ocr_filters.filter_item_text(img)
+        if actual.shape != expected.shape or not np.array_equal(actual, expected):
+            mismatches += 1
+            print(f"MISMATCH {name}: {int(np.count_nonzero(actual != expected))} pixel(s) differ")
+    print(f"{len(frames) - mismatches}/{len(frames)} frame(s) pixel-identical")
+
+    images = [img for _, img in frames]
+    print_summary("inRange x5 (before)", summarize_ms(time_calls(legacy_filter_item_text, images, args.runs)))
+    print_summary("colour LUT (after)", summarize_ms(time_calls(ocr_filters.filter_item_text, images, args.runs)))
+    return 1 if mismatches else 0
+
+
+#####################################################
+# HDR shine removal as it was before the downsampled #
+# background estimate, kept as the reference        #
+#####################################################
+def legacy_hdr_remove_shine(image_np):
+    import cv2
+    import numpy as np
+
+    if image_np.shape[-1] == 4:
+        image_np = cv2.cvtColor(image_np, cv2.COLOR_RGBA2RGB)
+
+    hsv = cv2.cvtColor(image_np, cv2.COLOR_RGB2HSV)
+    hue, sat, val = cv2.split(hsv)
+    height, width = val.shape
+
+    kernel = int(min(height, width) * 0.05)
+    kernel = max(31, min(kernel, 61))
+    if kernel % 2 == 0:
+        kernel += 1
+
+    bg = cv2.GaussianBlur(val, (kernel, kernel), 0)
+    shine = cv2.subtract(val, bg)
+    val_float = val.astype(np.float32)
+    mask = (shine > 210) & (val > 240)
+    val_float[mask] *= 0.90
+    val = np.clip(val_float, 0, 255).astype(np.uint8)
+
+    rgb = cv2.cvtColor(cv2.merge((hue, sat, val)), cv2.COLOR_HSV2RGB)
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    gray = cv2.createCLAHE(clipLimit=1.5, tileGridSize=(8, 8)).apply(gray)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+
+
+def peak_alloc_mb(fn, item):
+    import tracemalloc
+
+    tracemalloc.start()
+    fn(item)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+#####################################################
+# Downsampled HDR pre-processor against the full    #
+# resolution reference: output drift, OCR mask      #
+# agreement, latency and peak allocations per size  #
+#####################################################
+def bench_hdr(args):
+    import numpy as np
+
+    import ocr_filters
+
+    frames = load_images(args.images) if args.images else synthetic_tooltip_frames(
+        [(1280, 720), (1920, 1080), (2560, 1440), (3840, 2160)])
+
+    failures = 0
+    for name, img in frames:
+        expected = legacy_hdr_remove_shine(img)[:, :, 0].astype(np.int16)
+        actual = ocr_filters.hdr_remove_shine(img)[:, :, 0].astype(np.int16)
+        diff = np.abs(actual - expected)
+        drifted = float(np.mean(diff > args.tolerance)) * 100
+
+        expected_mask = ocr_filters.filter_item_text(legacy_hdr_remove_shine(img))
+        actual_mask = ocr_filters.filter_item_text(ocr_filters.hdr_remove_shine(img))
+        mask_agreement = float(np.mean(expected_mask == actual_mask)) * 100
+
+        ok = drifted <= args.max_drift
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: mean |diff|={diff.mean():.3f} max={int(diff.max())} "
+              f">{args.tolerance}: {drifted:.3f}%  OCR mask agreement={mask_agreement:.3f}%")
+
+    for name, img in frames:
+        print(f"-- {name}")
+        print_summary("full-res HSV (before)", summarize_ms(time_calls(legacy_hdr_remove_shine, [img], args.runs)))
+        print_summary("downsampled (after)", summarize_ms(time_calls(ocr_filters.hdr_remove_shine, [img], args.runs)))
+        print(f"{'peak allocations':<28} before={peak_alloc_mb(legacy_hdr_remove_shine, img):.1f}MB  "
+              f"after={peak_alloc_mb(ocr_filters.hdr_remove_shine, img):.1f}MB")
+    return 1 if failures else 0
+
+
+#####################################################
+# Glyph height estimate and the OCR scale it picks  #
+# per capture, with the estimator's own latency and #
+# the pixels sent to OCR against a fixed 2x upscale #
+#####################################################
+def bench_scale(args):
+    import ocr_filters
+
+    frames = load_images(args.images) if args.images else synthetic_tooltip_frames(
+        [(1280, 720), (1920, 1080), (2560, 1440), (3840, 2160)])
+
+    for name, img in frames:
+        mask = ocr_filters.filter_item_text(img)
+        glyph_height = ocr_filters.estimate_glyph_height(mask)
+        scale = ocr_filters.choose_ocr_scale(mask)
+        resized = ocr_filters.resize_for_ocr(mask, scale)
+        estimate = summarize_ms(time_calls(ocr_filters.choose_ocr_scale, [mask], args.runs))
+        print(f"{name:<28} glyph height={glyph_height or 0:5.1f}px  scale={scale:<5} "
+              f"OCR pixels={resized.size / (4 * mask.size):6.1%} of 2x  estimate p50={estimate['p50']:.2f}ms")
+    return 0
+
+
+#####################################################
+# Labelled screenshot corpus through the real OCR   #
+# and matching code, per stage latency, throughput  #
+# and precision/recall of the matched terms         #
+#####################################################
+CORPUS_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+CORPUS_STAGES = ("hdr", "filter", "ocr", "match", "total")
+
+
+def load_corpus(folder):
+    """
+    Images in the folder plus an optional labels.json next to them:
+        {"shot1.png": {"terms": ["Alberon's Warpath"], "hdr": false}, ...}
+    Images without a label entry are timed but not scored.
+    """
+    labels_path = os.path.join(folder, "labels.json")
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+
+    names = sorted(name for name in os.listdir(folder) if name.lower().endswith(CORPUS_IMAGE_EXTENSIONS))
+    return [(name, os.path.join(folder, name), labels.get(name)) for name in names]
+
+
+def term_key(term):
+    return term.strip().casefold()
+
+
+def run_corpus_image(tracker, ocr_filters, img, hdr, regions):
+    timings = {}
+    start = time.perf_counter()
+
+    if hdr:
+        img = ocr_filters.hdr_remove_shine(img)
+        timings["hdr"] = time.perf_counter() - start
+
+    mark = time.perf_counter()
+    filtered = ocr_filters.filter_item_text(img)
+    timings["filter"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    if regions:
+        text, _ = tracker.ocr_filtered_regions(filtered)
+    else:
+        text, _ = tracker.ocr_from_image(filtered, apply_filter=False)
+    timings["ocr"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    matched = tracker.get_matched_terms(text, allow_dupes=True)
+    timings["match"] = time.perf_counter() - mark
+
+    timings["total"] = time.perf_counter() - start
+    return text, [m["term"] for m in matched], timings
+
+
+def bench_corpus(args):
+    import curio_tracker as tracker
+    import ocr_engine
+    import ocr_filters
+
+    corpus = load_corpus(args.folder)
+    if not corpus:
+        print(f"No images found in {args.folder}")
+        return 1
+
+    if ocr_engine.ENGINE.warm_up():
+        print(f"OCR backend: {ocr_engine.ENGINE.backend}")
+
+    samples = {stage: [] for stage in CORPUS_STAGES}
+    images = []
+    tp = fp = fn = 0
+    wall_start = time.perf_counter()
+
+    for name, path, label in corpus:
+        img = load_images([path])[0][1]
+        label = label or {}
+        hdr = bool(label.get("hdr", False))
+        height, width = img.shape[:2]
+
+        per_image = {stage: [] for stage in CORPUS_STAGES}
+        for run in range(args.runs):
+            text, matched, timings = run_corpus_image(tracker, ocr_filters, img, hdr, args.regions)
+            for stage, seconds in timings.items():
+                per_image[stage].append(seconds)
+                samples[stage].append(seconds)
+            if run == 0:
+                first_text, first_matched = text, matched
+
+        entry = {
+            "image": name,
+            "resolution": f"{width}x{height}",
+            "hdr": hdr,
+            "matched": first_matched,
+            "ms": {stage: summarize_ms(values)["p50"] for stage, values in per_image.items() if values},
+        }
+
+        if "terms" in label:
+            expected = {term_key(t) for t in label["terms"]}
+            found = {term_key(t) for t in first_matched}
+            tp += len(expected & found)
+            fp += len(found - expected)
+            fn += len(expected - found)
+            entry["expected"] = label["terms"]
+            entry["missing"] = sorted(expected - found)
+            entry["extra"] = sorted(found - expected)
+
+        if args.keep_text:
+            entry["text"] = first_text
+        images.append(entry)
+
+        status = "" if "terms" not in label else f"  missing={entry['missing']} extra={entry['extra']}"
+        print(f"{name:<32} {entry['resolution']:>10} {'HDR' if hdr else 'SDR'} "
+              f"{entry['ms']['total']:8.1f}ms{status}")
+
+    wall = time.perf_counter() - wall_start
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "folder": os.path.abspath(args.folder),
+            "images": len(corpus),
+            "runs": args.runs,
+            "regions": args.regions,
+            "ocr_backend": ocr_engine.ENGINE.backend,
+            "tesseract": tesseract_version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "stages": {stage: summarize_ms(values) for stage, values in samples.items() if values},
+        "throughput_images_per_s": (len(corpus) * args.runs) / wall if wall else 0.0,
+        "accuracy": {
+            "true_positives": tp,
+            "false_positives": fp,
+            "false_negatives": fn,
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        },
+        "images": images,
+    }
+
+    print()
+    for stage, summary in results["stages"].items():
+        print_summary(stage, summary)
+    print(f"throughput: {results['throughput_images_per_s']:.2f} images/s")
+    print(f"precision={precision:.3f} recall={recall:.3f} (tp={tp} fp={fp} fn={fn})")
+
+    if args.baseline:
+        compare_corpus_results(args.baseline, results)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+#####################################################
+# Labelled corpus OCR'd with the generic English    #
+# dictionary and with the terms vocabulary (user    #
+# words / patterns): latency and precision/recall   #
+#####################################################
+def bench_vocabulary(args):
+    import load_utils
+    import ocr_engine
+    import ocr_filters
+    import ocr_vocabulary
+    from term_matcher import TermMatcher
+
+    corpus = load_corpus(args.folder)
+    if not corpus:
+        print(f"No images found in {args.folder}")
+        return 1
+
+    datasets = load_utils.get_datasets(load_external=False)
+    variables = ocr_vocabulary.tesseract_variables(load_utils.USER_WORDS_FILE, load_utils.USER_PATTERNS_FILE)
+    matcher = TermMatcher(datasets["terms"], datasets["body_armors"])
+
+    masks = []
+    for name, path, label in corpus:
+        img = load_images([path])[0][1]
+        label = label or {}
+        if label.get("hdr", False):
+            img = ocr_filters.hdr_remove_shine(img)
+        masks.append((name, ocr_filters.filter_item_text(img), label.get("terms")))
+
+    engine = ocr_engine.OCREngine(args.tessdata)
+    results = {}
+    for mode, vocabulary in (("generic", {}), ("vocabulary", variables)):
+        engine.set_vocabulary(vocabulary)
+        engine.warm_up()
+        samples = []
+        tp = fp = fn = 0
+        for name, mask, terms in masks:
+            text = ""
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                text = engine.image_to_string(mask, psm=6)
+                samples.append(time.perf_counter() - start)
+            if terms is None:
+                continue
+            expected = {term_key(t) for t in terms}
+            found = {term_key(m["term"]) for m in matcher.match(text, fuzzy=not args.no_fuzzy)}
+            tp += len(expected & found)
+            fp += len(found - expected)
+            fn += len(expected - found)
+
+        precision = tp / (tp + fp) if tp + fp else 1.0
+        recall = tp / (tp + fn) if tp + fn else 1.0
+        results[mode] = {"ms": summarize_ms(samples), "precision": precision, "recall": recall,
+                         "true_positives": tp, "false_positives": fp, "false_negatives": fn}
+        print_summary(f"{mode} ({engine.backend})", results[mode]["ms"])
+        print(f"{'':<28} precision={precision:.3f} recall={recall:.3f} (tp={tp} fp={fp} fn={fn})")
+    engine.close()
+
+    if not variables:
+        print("Vocabulary files could not be written, both passes used the generic dictionary.")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+def compare_corpus_results(baseline_path, results):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    print(f"\nAgainst {baseline_path} ({baseline['meta'].get('created', '?')}):")
+    for stage, summary in results["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if before:
+            print(f"{stage:<10} p50 {before['p50']:8.2f}ms -> {summary['p50']:8.2f}ms  "
+                  f"p90 {before['p90']:8.2f}ms -> {summary['p90']:8.2f}ms")
+    for metric in ("precision", "recall"):
+        before = baseline.get("accuracy", {}).get(metric)
+        if before is not None:
+            print(f"{metric:<10} {before:.3f} -> {results['accuracy'][metric]:.3f}")
+
+
+def tesseract_version():
+    try:
+        import pytesseract
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return None
+
+
+#####################################################
+# Body armour position lookup as it was before the  #
+# fuzzy index: SequenceMatcher of every armour word #
+# against every OCR token, kept as the reference    #
+#####################################################
+def legacy_find_first_body_armor_pos(text, body_armors):
+    import re
+    from difflib import SequenceMatcher
+
+    import ocr_utils
+
+    ocr_utils.build_body_armor_regex(body_armors)
+    norm_text = ocr_utils.normalize_for_search(text)
+    regex = ocr_utils._cached_body_armor_data[tuple(body_armors)]["regex"]
+    if regex:
+        match = regex.search(norm_text)
+        if match:
+            return match.start()
+
+    norm_parts_list = []
+    for a in body_armors:
+        norm = ocr_utils.normalize_for_search(ocr_utils.smart_title_case(a))
+        if norm:
+            norm_parts_list.append(norm.split())
+
+    tokens = [(tok.group(0), tok.start()) for tok in re.finditer(r"\b[\w%']+\b", norm_text)]
+    earliest = None
+    for parts in norm_parts_list:
+        if len(parts) == 1:
+            for tok, pos in tokens:
+                if SequenceMatcher(None, parts[0], tok.lower()).ratio() >= 0.8:
+                    if earliest is None or pos < earliest:
+                        earliest = pos
+                    break
+        else:
+            for i in range(len(tokens) - len(parts) + 1):
+                if all(SequenceMatcher(None, part, tokens[i + k][0].lower()).ratio() >= 0.7
+                       for k, part in enumerate(parts)):
+                    if earliest is None or tokens[i][1] < earliest:
+                        earliest = tokens[i][1]
+                    break
+    return earliest
+
+
+def ocr_noise(word, rng, edits):
+    letters = "abcdefghijklmnopqrstuvwxyz0123456789'"
+    chars = list(word)
+    for _ in range(edits):
+        op = rng.integers(0, 3)
+        i = int(rng.integers(0, max(1, len(chars))))
+        if op == 0 and chars:
+            chars[i] = letters[rng.integers(0, len(letters))]
+        elif op == 1 and len(chars) > 1:
+            del chars[i]
+        else:
+            chars.insert(i, letters[rng.integers(0, len(letters))])
+    return "".join(chars)
+
+
+def body_armor_corpus(body_armors, filler, samples, seed=0):
+    """Tooltip-like texts with OCR damaged body armour names (or none) among filler lines."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(samples):
+        lines = [str(rng.choice(filler)) for _ in range(int(rng.integers(3, 9)))]
+        for _ in range(int(rng.integers(0, 3))):
+            armor = str(rng.choice(body_armors))
+            damaged = " ".join(ocr_noise(w, rng, int(rng.integers(0, 3))) for w in armor.split())
+            lines.insert(int(rng.integers(0, len(lines) + 1)), damaged)
+        texts.append("\n".join(lines))
+    return texts
+
+
+def bench_bodyarmor(args):
+    import load_utils
+    import ocr_utils
+
+    body_armors = load_utils.load_body_armors(load_utils.INTERNAL_BODY_ARMORS_TXT)
+    filler = ["Item Level: 83", "Rarity: Unique", "Quality: +20%", "Requires Level 68, 120 Str",
+              "Armour: 1021", "Energy Shield: 140", "Sockets: R-R-G-B-B-W", "Heist Target: Replica",
+              "8% increased Explicit Ailment Modifier magnitudes", "Has 1 White Socket",
+              "Corrupted", "Stack Size: 3/20", "Place into an allocated Jewel Socket"]
+    texts = body_armor_corpus(body_armors, filler, args.samples, seed=args.seed)
+
+    mismatches = 0
+    for text in texts:
+        expected = legacy_find_first_body_armor_pos(text, body_armors)
+        actual = ocr_utils.find_first_body_armor_pos(text, body_armors)
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"MISMATCH legacy={expected} index={actual}: {text!r}")
+    print(f"{len(texts) - mismatches}/{len(texts)} text(s) give the same position")
+
+    print_summary("SequenceMatcher scan (before)", summarize_ms(
+        time_calls(lambda t: legacy_find_first_body_armor_pos(t, body_armors), texts, args.runs)))
+    print_summary("fuzzy index (after)", summarize_ms(
+        time_calls(lambda t: ocr_utils.find_first_body_armor_pos(t, body_armors), texts, args.runs)))
+    return 1 if mismatches else 0
+
+
+#####################################################
+# Batch re-matching throughput, inline and across a #
+# process pool, on stored OCR texts or generated    #
+# tooltips. The pool has to give the same matches.  #
+#####################################################
+def match_corpus(terms, filler, samples, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(samples):
+        lines = [str(rng.choice(filler)) for _ in range(int(rng.integers(2, 7)))]
+        for _ in range(int(rng.integers(1, 4))):
+            term = str(rng.choice(terms)).replace("; ", "\n")
+            if rng.random() < 0.2:
+                term = ocr_noise(term, rng, 1)
+            lines.insert(int(rng.integers(0, len(lines) + 1)), term)
+        texts.append("\n".join(lines))
+    return texts
+
+
+def bench_match(args):
+    import curio_tracker as tracker
+    from term_matcher import match_many
+
+    texts = []
+    for path in args.texts:
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append(f.read())
+    if not texts:
+        filler = ["Item Level: 83", "Rarity: Currency", "Stack Size: 3/20", "Quality: +20%",
+                  "Sockets: R-R-G-B-B-W", "Corrupted", "Right click to remove from the Socket."]
+        texts = match_corpus(sorted(tracker.term_types), filler, args.samples, seed=args.seed)
+
+    start = time.perf_counter()
+    inline = match_many(tracker.MATCHER, texts, workers=0)
+    inline_s = time.perf_counter() - start
+    print(f"inline           {len(texts)} text(s) in {inline_s:.2f}s, {len(texts) / inline_s:,.0f} texts/s")
+
+    if args.workers < 2:
+        return 0
+
+    start = time.perf_counter()
+    pooled = match_many(tracker.MATCHER, texts, workers=args.workers)
+    pooled_s = time.perf_counter() - start
+    print(f"{args.workers} worker(s)      {len(texts)} text(s) in {pooled_s:.2f}s, "
+          f"{len(texts) / pooled_s:,.0f} texts/s (pool start-up included)")
+
+    mismatches = sum(1 for a, b in zip(inline, pooled) if a != b)
+    print(f"{len(texts) - mismatches}/{len(texts)} text(s) give the same matches in the pool")
+    return 1 if mismatches else 0
+
+
+#####################################################
+# Text normalization as it was before text_normalize #
+# (chained replace / re.sub), kept as the reference  #
+#####################################################
+def legacy_smart_title_case(text):
+    import re
+
+    text = str(text)
+    text = text.replace("’", "'").replace("‘", "'").replace("`", "'")
+    text = re.sub(r"(')S\b", r"\1s", text)
+
+    def fix_word(word):
+        if word.lower().endswith("'s") and len(word) > 2:
+            base = word[:-2]
+            suffix = word[-2:]
+            return base[:1].upper() + base[1:].lower() + suffix.lower()
+        else:
+            return word[:1].upper() + word[1:].lower()
+
+    return re.sub(r"\b\w+'?s?\b", lambda m: fix_word(m.group(0)), text)
+
+
+def legacy_remove_possessive_s(text):
+    import re
+
+    return re.sub(r"\b(\w+)(?:'s|’s)\b", r"\1", text)
+
+
+def legacy_canonicalize(text):
+    import re
+
+    if not text:
+        return ""
+    text = str(text)
+    text = text.replace("’", "'").replace("‘", "'").replace("`", "'")
+    text = legacy_remove_possessive_s(text)
+    text = re.sub(r"[^\w\s%';]", " ", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip().lower()
+
+
+def legacy_normalize_for_search(s):
+    import re
+
+    s = s.replace("—", " ").replace("“", " ").replace("”", " ")
+    s = re.sub(r"[^\w\s%';]", " ", s)
+    s = re.sub(r"\s+", " ", s)
+    return s.strip().lower()
+
+
+def normalize_inputs(terms, samples, seed=0):
+    """Every term in several spellings OCR produces, plus random strings over a nasty alphabet."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    inputs = []
+    for term in terms:
+        inputs += [term, term.upper(), term.lower(), term.replace("'", "’"), term.replace("'s", "'S"),
+                   term.replace(" ", "  \t"), f"“{term}” — {term}; 20/20", term.replace("; ", "\n")]
+
+    alphabet = list("abcXYZ s'S’‘`%;_-—“”.,:/\t\n\u00a0") + ["ß", "Σ", "σ", "İ", "ǆ", "Ω", "é", "1", "0"]
+    for _ in range(samples):
+        inputs.append("".join(str(rng.choice(alphabet)) for _ in range(int(rng.integers(0, 24)))))
+    for _ in range(samples // 10):
+        inputs.append("\n".join(str(rng.choice(terms)) for _ in range(int(rng.integers(2, 8)))))
+    return inputs
+
+
+def bench_normalize(args):
+    import load_utils
+    import text_normalize
+
+    terms = sorted(load_utils.get_datasets()["terms"]) if not args.terms else []
+    if args.terms:
+        with open(args.terms, "r", encoding="utf-8") as f:
+            terms = [line.rsplit(",", 1)[0] for line in f.read().splitlines()[1:] if line]
+    inputs = normalize_inputs(terms, args.samples, seed=args.seed)
+
+    pairs = [
+        ("smart_title_case", legacy_smart_title_case, text_normalize.smart_title_case),
+        ("remove_possessive_s", legacy_remove_possessive_s, text_normalize.remove_possessive_s),
+        ("canonicalize", legacy_canonicalize, text_normalize.canonicalize),
+        ("normalize_for_search", legacy_normalize_for_search, text_normalize.normalize_for_search),
+    ]
+    failures = 0
+    for name, legacy, current in pairs:
+        bad = [text for text in inputs if legacy(text) != current(text)]
+        failures += len(bad)
+        print(f"{name:<22} {len(inputs) - len(bad)}/{len(inputs)} input(s) byte-identical")
+        for text in bad[:3]:
+            print(f"  MISMATCH {text!r}: {legacy(text)!r} != {current(text)!r}")
+
+    def load_pass(title_case, normalize, possessive):
+        # what loading the terms does: title case every name, then normalize it for the matcher
+        for term in terms:
+            normalize(possessive(title_case(term)))
+
+    def capture_pass(title_case, normalize, possessive, text):
+        text = title_case(text)
+        for line in possessive(text).splitlines():
+            normalize(line)
+
+    ocr_texts = [text for text in inputs if "\n" in text][:500]
+    legacy_fns = (legacy_smart_title_case, legacy_normalize_for_search, legacy_remove_possessive_s)
+    current_fns = (text_normalize.smart_title_case, text_normalize.normalize_for_search,
+                   text_normalize.remove_possessive_s)
+    print_summary("term load (before)", summarize_ms(time_calls(lambda _: load_pass(*legacy_fns), [None], args.runs)))
+    print_summary("term load (after)", summarize_ms(time_calls(lambda _: load_pass(*current_fns), [None], args.runs)))
+    print_summary("capture text (before)", summarize_ms(
+        time_calls(lambda t: capture_pass(*legacy_fns, t), ocr_texts, args.runs)))
+    print_summary("capture text (after)", summarize_ms(
+        time_calls(lambda t: capture_pass(*current_fns, t), ocr_texts, args.runs)))
+    return 1 if failures else 0
+
+
+#####################################################
+# Capture write latency (next record number and    #
+# append) against the size of the data file. The   #
+# record counter is seeded once, so it should stay  #
+# flat from a hundred rows to a million             #
+#####################################################
+STORAGE_SIZES = (100, 10000, 100000, 1000000)
+
+
+def storage_row(headers, number):
+    from config import csv_currency_header, csv_record_header, csv_time_header
+
+    row = {header: "" for header in headers}
+    row[csv_record_header] = str(number)
+    row[csv_time_header] = "2025-01-01_00-00-00"
+    row[csv_currency_header] = "Divine Orb"
+    return row
+
+
+def write_storage_file(manager, headers, size):
+    import csv
+
+    with manager.file_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(storage_row(headers, number) for number in range(1, size + 1))
+
+
+def legacy_next_and_append(manager, row):
+    # The three full passes a capture made before the in-memory record counter
+    import csv
+    from config import csv_record_header
+
+    with manager.file_path.open("r", encoding="utf-8") as f:
+        max((int(r[csv_record_header]) for r in csv.DictReader(f) if r[csv_record_header].isdigit()), default=0)
+    existing = {int(r[csv_record_header]) for r in manager.load_dict() if r[csv_record_header].isdigit()}
+    number = 1
+    while number in existing:
+        number += 1
+    row[csv_record_header] = str(number)
+    with manager.file_path.open("r", encoding="utf-8") as f:
+        list(csv.DictReader(f))
+    with manager.file_path.open("a", newline="", encoding="utf-8") as f:
+        csv.DictWriter(f, fieldnames=list(row.keys())).writerow(row)
+
+
+def bench_storage(args):
+    import tempfile
+    from config import csv_record_header
+    from csv_manager import CSVManager
+    from settings import get_setting, set_setting
+
+    saved_row = get_setting("Application", "csv_current_row", 0)
+    p50s = []
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            for size in args.sizes:
+                manager = CSVManager(os.path.join(folder, f"bench_{size}"))
+                headers = manager.get_csv_headers()
+                write_storage_file(manager, headers, size)
+
+                start = time.perf_counter()
+                manager.get_next_record_number()
+                seed = time.perf_counter() - start
+
+                def capture(_):
+                    row = storage_row(headers, manager.get_next_record_number(force=True))
+                    manager.append_rows([row])
+
+                summary = summarize_ms(time_calls(capture, range(args.writes), 1))
+                p50s.append(summary["p50"])
+                print_summary(f"{size:>9} rows", summary)
+                print(f"{'':<28} startup seed={seed * 1000:8.2f}ms")
+
+                expected = size + args.writes
+                if manager.recalculate_record_number() != expected:
+                    print(f"[FAIL] {size} rows: last record {manager.last_record_number}, expected {expected}")
+                    return 1
+
+                if size <= args.legacy_max:
+                    legacy = summarize_ms(time_calls(
+                        lambda _: legacy_next_and_append(manager, storage_row(headers, "")), range(args.writes), 1))
+                    print_summary(f"{'':<9} legacy", legacy)
+                os.remove(manager.file_path)
+    finally:
+        set_setting("Application", "csv_current_row", saved_row)
+
+    growth = max(p50s) / max(min(p50s), 1e-6)
+    print(f"p50 growth from {min(args.sizes)} to {max(args.sizes)} rows: {growth:.2f}x")
+    if growth > args.max_growth:
+        print(f"[FAIL] capture write latency grows with the file (limit {args.max_growth}x)")
+        return 1
+    return 0
+
+
+#####################################################
+# Recent row reads from the end of the CSV against  #
+# load_dict()[-n:], same rows and the time of each  #
+#####################################################
+TAIL_SIZES = (100, 10000, 1000000)
+
+
+def bench_tail(args):
+    import csv
+    import tempfile
+    from config import csv_currency_header
+    from csv_manager import CSVManager
+
+    with tempfile.TemporaryDirectory() as folder:
+        manager = CSVManager(os.path.join(folder, "quoted"))
+        headers = manager.get_csv_headers()
+        rows = [storage_row(headers, number) for number in range(1, 8)]
+        rows[2][csv_currency_header] = 'Orb, "quoted"'
+        rows[4][csv_currency_header] = "two\nlines"
+        with manager.file_path.open("w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=headers)
+            writer.writeheader()
+            writer.writerows(rows)
+        for n in range(0, 9):
+            if manager.tail(n) != (manager.load_dict()[-n:] if n else []):
+                print(f"[FAIL] quoted file: tail({n}) differs from load_dict()")
+                return 1
+        if list(manager.iter_reverse()) != manager.load_dict()[::-1]:
+            print("[FAIL] quoted file: iter_reverse() differs from load_dict()")
+            return 1
+        print("quoted, multi-line and BOM rows: identical")
+
+        for size in args.sizes:
+            manager = CSVManager(os.path.join(folder, f"bench_{size}"))
+            write_storage_file(manager, headers, size)
+            if manager.tail(args.rows) != manager.load_dict()[-args.rows:]:
+                print(f"[FAIL] {size} rows: tail({args.rows}) differs from load_dict()")
+                return 1
+
+            print_summary(f"{size:>9} rows tail", summarize_ms(
+                time_calls(lambda _: manager.tail(args.rows), range(args.runs), 1)))
+            print_summary(f"{'':<9} load_dict", summarize_ms(
+                time_calls(lambda _: manager.load_dict()[-args.rows:], range(min(args.runs, 3)), 1)))
+            os.remove(manager.file_path)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Curio Tracker capture pipeline benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    engine = sub.add_parser("engine", help="OCR engine latency, before/after the persistent engine")
+    engine.add_argument("images", nargs="+")
+    engine.add_argument("--runs", type=int, default=10)
+    engine.add_argument("--psm", type=int, default=6)
+    engine.add_argument("--lang", default="eng")
+    engine.add_argument("--tessdata", default=None)
+    engine.set_defaults(func=bench_engine)
+
+    filt = sub.add_parser("filter", help="colour filter, LUT against the per-range reference")
+    filt.add_argument("images", nargs="*", help="captures to check, random full-window frames if omitted")
+    filt.add_argument("--runs", type=int, default=20)
+    filt.set_defaults(func=bench_filter)
+
+    hdr = sub.add_parser("hdr", help="HDR shine removal, downsampled against the full-resolution reference")
+    hdr.add_argument("images", nargs="*", help="captures to check, synthetic frames at 720p-4K if omitted")
+    hdr.add_argument("--runs", type=int, default=10)
+    hdr.add_argument("--tolerance", type=int, default=3, help="grey levels of drift allowed per pixel")
+    hdr.add_argument("--max-drift", type=float, default=1.0, help="percent of pixels allowed beyond tolerance")
+    hdr.set_defaults(func=bench_hdr)
+
+    scale = sub.add_parser("scale", help="glyph height estimate and the OCR scale it picks")
+    scale.add_argument("images", nargs="*", help="captures to check, synthetic frames at 720p-4K if omitted")
+    scale.add_argument("--runs", type=int, default=20)
+    scale.set_defaults(func=bench_scale)
+
+    corpus = sub.add_parser("corpus", help="labelled screenshot folder, stage latency and term precision/recall")
+    corpus.add_argument("folder", help="folder of screenshots with an optional labels.json")
+    corpus.add_argument("--runs", type=int, default=1)
+    corpus.add_argument("--regions", action="store_true", help="OCR detected tooltip crops instead of the full frame")
+    corpus.add_argument("--output", default="benchmark_results.json")
+    corpus.add_argument("--baseline", default=None, help="earlier results file to compare against")
+    corpus.add_argument("--keep-text", action="store_true", help="store the OCR text of each image in the results")
+    corpus.set_defaults(func=bench_corpus)
+
+    vocab = sub.add_parser("vocabulary", help="OCR of a labelled corpus with and without the terms vocabulary")
+    vocab.add_argument("folder", help="folder of screenshots with an optional labels.json")
+    vocab.add_argument("--runs", type=int, default=1)
+    vocab.add_argument("--tessdata", default=None)
+    vocab.add_argument("--no-fuzzy", action="store_true", help="score exact matches only")
+    vocab.add_argument("--output", default=None)
+    vocab.set_defaults(func=bench_vocabulary)
+
+    armor = sub.add_parser("bodyarmor", help="fuzzy body armour position lookup against the SequenceMatcher scan")
+    armor.add_argument("--samples", type=int, default=2000)
+    armor.add_argument("--runs", type=int, default=1)
+    armor.add_argument("--seed", type=int, default=0)
+    armor.set_defaults(func=bench_bodyarmor)
+
+    match = sub.add_parser("match", help="batch re-matching throughput, inline and across a process pool")
+    match.add_argument("texts", nargs="*", help="stored OCR text files, generated tooltips if omitted")
+    match.add_argument("--samples", type=int, default=20000)
+    match.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    match.add_argument("--seed", type=int, default=0)
+    match.set_defaults(func=bench_match)
+
+    norm = sub.add_parser("normalize", help="text normalization, byte-identical check and timing against the old code")
+    norm.add_argument("--terms", default=None, help="terms csv (name,type) instead of the cached terms dataset")
+    norm.add_argument("--samples", type=int, default=20000, help="random strings added to the term spellings")
+    norm.add_argument("--runs", type=int, default=5)
+    norm.add_argument("--seed", type=int, default=0)
+    norm.set_defaults(func=bench_normalize)
+
+    storage = sub.add_parser("storage", help="capture write latency against the CSV data file size")
+    storage.add_argument("--sizes", type=int, nargs="+", default=list(STORAGE_SIZES))
+    storage.add_argument("--writes", type=int, default=200, help="captures written at each size")
+    storage.add_argument("--legacy-max", type=int, default=10000, help="largest size the old full-parse path runs at")
+    storage.add_argument("--max-growth", type=float, default=3.0, help="p50 ratio largest/smallest size allowed")
+    storage.set_defaults(func=bench_storage)
+
+    tail = sub.add_parser("tail", help="last rows read backwards from the CSV against load_dict")
+    tail.add_argument("--sizes", type=int, nargs="+", default=list(TAIL_SIZES))
+    tail.add_argument("--rows", type=int, default=5)
+    tail.add_argument("--runs", type=int, default=50)
+    tail.set_defaults(func=bench_tail)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+#############################################################################
+# Optional archive of raw captures, so a bad OCR can be audited and the     #
+# archive re-matched after a dataset or matcher change:                     #
+#                                                                           #
+#   python capture_archive.py stats                                         #
+#   python capture_archive.py reprocess --workers 4                         #
+#############################################################################
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+import cv2
+
+import config as c
+from logger import log_message
+from ocr_filters import filter_item_text
+
+ARCHIVE_DIR = os.path.join(c.base_path, "capture_archive")
+ARCHIVE_INDEX = "index.jsonl"
+ARCHIVE_IMAGES = "images"
+ARCHIVE_PNG_COMPRESSION = 9  # filtered masks are two-tone, they compress well at the highest level
+
+
+#############################################################################
+# Each capture appends one line to index.jsonl with its OCR text, the       #
+# matches it produced, the record numbers that were written and the name   #
+# of its filtered image. Images are PNGs named by the SHA-1 of their bytes, #
+# so a tooltip captured again reuses the file that is already there.        #
+#                                                                           #
+# Writing happens on a background thread, a capture only queues the entry. #
+# After every write the oldest entries are dropped until the archive is    #
+# within max_days and max_mb, images no entry refers to any more are       #
+# deleted with them. The archive is never rewritten otherwise.             #
+#############################################################################
+class CaptureArchive:
+    def __init__(self, folder=ARCHIVE_DIR, enabled=False,
+                 max_days=c.DEFAULT_ARCHIVE_MAX_DAYS, max_mb=c.DEFAULT_ARCHIVE_MAX_MB):
+        self.folder = folder
+        self.enabled = enabled
+        self.max_days = max_days
+        self.max_mb = max_mb
+        self._entries = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.folder, ARCHIVE_INDEX)
+
+    def image_path(self, name):
+        return os.path.join(self.folder, ARCHIVE_IMAGES, name)
+
+    def configure(self, enabled=None, max_days=None, max_mb=None):
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if max_days is not None:
+            self.max_days = max(c.ARCHIVE_MAX_DAYS_MIN, min(c.ARCHIVE_MAX_DAYS_MAX, int(max_days)))
+        if max_mb is not None:
+            self.max_mb = max(c.ARCHIVE_MAX_MB_MIN, min(c.ARCHIVE_MAX_MB_MAX, int(max_mb)))
+
+    def add(self, timestamp, text, image=None, records=(), matches=()):
+        """Queues one capture. image is the filtered mask, or the raw capture to filter here."""
+        if not self.enabled:
+            return
+
+        entry = {
+            "archived_at": datetime.now().isoformat(timespec="seconds"),
+            "timestamp": timestamp,
+            "text": text or "",
+            "records": list(records),
+            "matches": [{"term": m["term"], "stack_size": m.get("stack_size", 1)} for m in matches],
+        }
+        self._queue.put((entry, image))
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        self._queue.join()
+
+    def entries(self) -> list:
+        with self._lock:
+            return list(self._load())
+
+    def _run(self):
+        while True:
+            entry, image = self._queue.get()
+            try:
+                self._store(entry, image)
+            except Exception as e:
+                log_message(f"[Archive] Could not archive capture: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _store(self, entry, image):
+        entry["image"] = None
+        entry["image_bytes"] = 0
+        if image is not None:
+            mask = filter_item_text(image) if image.ndim == 3 else image
+            ok, encoded = cv2.imencode(".png", mask, [cv2.IMWRITE_PNG_COMPRESSION, ARCHIVE_PNG_COMPRESSION])
+            if ok:
+                data = encoded.tobytes()
+                name = hashlib.sha1(data).hexdigest() + ".png"
+                path = self.image_path(name)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "wb") as f:
+                        f.write(data)
+                entry["image"] = name
+                entry["image_bytes"] = len(data)
+
+        with self._lock:
+            entries = self._load()
+            os.makedirs(self.folder, exist_ok=True)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            entries.append(entry)
+            self._prune(entries)
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = []
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            self._entries.append(json.loads(line))
+                        except ValueError:
+                            log_message("[Archive] Skipping unreadable index line")
+        return self._entries
+
+    def _prune(self, entries):
+        cutoff = (datetime.now() - timedelta(days=self.max_days)).isoformat(timespec="seconds")
+        cap = self.max_mb * 1024 * 1024
+
+        references = Counter(e["image"] for e in entries if e.get("image"))
+        image_bytes = {e["image"]: e.get("image_bytes", 0) for e in entries if e.get("image")}
+        total = sum(image_bytes.values()) + sum(len(e.get("text", "")) for e in entries)
+
+        dropped = 0
+        while dropped < len(entries):
+            oldest = entries[dropped]
+            if oldest.get("archived_at", "") >= cutoff and total <= cap:
+                break
+            total -= len(oldest.get("text", ""))
+            name = oldest.get("image")
+            if name:
+                references[name] -= 1
+                if references[name] <= 0:
+                    total -= image_bytes.get(name, 0)
+                    try:
+                        os.remove(self.image_path(name))
+                    except OSError:
+                        pass
+            dropped += 1
+
+        if not dropped:
+            return
+
+        del entries[:dropped]
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.index_path)
+        log_message(f"[Archive] Dropped {dropped} old capture(s), {len(entries)} kept")
+
+
+#############################################################################
+# Re-matches every archived OCR text with the given matcher (in parallel    #
+# with workers > 1) and writes a report of the captures whose matches       #
+# differ from what was recorded. History itself is left untouched.         #
+#############################################################################
+def reprocess(archive, matcher, workers=0, fuzzy=True, output=None) -> dict:
+    from term_matcher import match_many
+
+    entries = archive.entries()
+    results = match_many(matcher, [entry.get("text", "") for entry in entries], workers=workers, fuzzy=fuzzy)
+
+    changed = []
+    for entry, matches in zip(entries, results):
+        before = Counter((m["term"], str(m.get("stack_size", 1))) for m in entry.get("matches", []))
+        after = Counter((m["term"], str(m["stack_size"])) for m in matches)
+        if before == after:
+            continue
+        changed.append({
+            "timestamp": entry.get("timestamp"),
+            "records": entry.get("records", []),
+            "image": entry.get("image"),
+            "text": entry.get("text", ""),
+            "added": [{"term": term, "stack_size": size} for term, size in (after - before).elements()],
+            "removed": [{"term": term, "stack_size": size} for term, size in (before - after).elements()],
+        })
+
+    report = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "captures": len(entries),
+        "changed": len(changed),
+        "captures_changed": changed,
+    }
+
+    if output is None:
+        output = os.path.join(archive.folder, f"reprocess_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    log_message(f"[Archive] Re-matched {len(entries)} capture(s), {len(changed)} changed, report in {output}")
+    report["path"] = output
+    return report
+
+
+ARCHIVE = CaptureArchive()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Curio Tracker capture archive")
+    parser.add_argument("--folder", default=ARCHIVE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="number of archived captures and their size on disk")
+    rematch = sub.add_parser("reprocess", help="re-match the archive and write a diff report")
+    rematch.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    rematch.add_argument("--no-fuzzy", action="store_true")
+    rematch.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    archive = CaptureArchive(args.folder)
+    if args.command == "stats":
+        entries = archive.entries()
+        images = {e["image"]: e.get("image_bytes", 0) for e in entries if e.get("image")}
+        print(f"{len(entries)} capture(s), {len(images)} image(s), "
+              f"{sum(images.values()) / (1024 * 1024):.1f} MB of images in {archive.folder}")
+        return 0
+
+    import curio_tracker as tracker
+
+    report = reprocess(archive, tracker.MATCHER, workers=args.workers, fuzzy=not args.no_fuzzy, output=args.output)
+    print(f"{report['changed']}/{report['captures']} capture(s) changed, report in {report['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
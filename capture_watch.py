@@ -0,0 +1,231 @@
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import ImageGrab
+
+import config as c
+import curio_tracker as tracker
+import ocr_utils as utils
+from logger import log_message
+from ocr_filters import TOOLTIP_MIN_WIDTH_RATIO, TOOLTIP_MIN_HEIGHT_RATIO
+
+WATCH_SAMPLE_WIDTH = 480  # the window is diffed at this width, whatever its real resolution
+WATCH_DIFF_THRESHOLD = 24  # grey levels
+WATCH_STATIC_RATIO = 0.98  # share of a changed box that must be still on the next sample
+WATCH_PENDING_SAMPLES = 5  # drop a changed box that has not settled after this many samples
+WATCH_MIN_INTERVAL = 0.1
+WATCH_MAX_INTERVAL = 5.0
+WATCH_MIN_TEXT_PIXELS = 200
+WATCH_CROP_PADDING = 2  # sample pixels added around a box before grabbing it at full resolution
+_HALFTONE = 4  # GDI stretch mode that averages, like INTER_AREA
+_SRCCOPY = 0x00CC0020
+
+
+#############################################################################
+# Optional watch mode: grabs a small grey sample of the game window, diffs  #
+# it against the previous one and looks for a tooltip sized block that      #
+# changed and then stayed still. The game world keeps animating, a tooltip  #
+# does not, so only freshly opened (or changed) tooltips fire a full        #
+# resolution grab and OCR of their box. A tooltip that stays open causes    #
+# no further change and is read once, one that reappears is caught by the   #
+# usual duplicate check in write_entry.                                     #
+#                                                                           #
+# cpu_budget is the share (percent) of one core the watcher may use, it     #
+# sleeps in proportion to the time each sample (and OCR) took. While the    #
+# game window is missing it only looks for it every WATCH_MAX_INTERVAL.     #
+#############################################################################
+class CaptureWatcher:
+    def __init__(self, cpu_budget=c.DEFAULT_WATCH_CPU_BUDGET):
+        self.cpu_budget = cpu_budget
+        self._thread = None
+        self._stop = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, root, on_items=None):
+        if self.running:
+            return
+        # Each run gets its own event, a stopped thread still finishing a sample can't be revived
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(root, on_items, self._stop), daemon=True)
+        self._thread.start()
+        log_message(f"[Watch] Watch mode started (CPU budget {self.cpu_budget}%)")
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread = None
+        log_message("[Watch] Watch mode stopped")
+
+    def _run(self, root, on_items, stop):
+        previous = None
+        pending = []  # [(box in sample pixels, samples waited)]
+        window_found = True
+
+        while not stop.is_set():
+            bbox = tracker.get_poe_bbox(quiet=True)
+            if not bbox:
+                if window_found:
+                    log_message(c.not_found_target_txt)
+                    window_found = False
+                previous, pending = None, []
+                stop.wait(WATCH_MAX_INTERVAL)
+                continue
+            window_found = True
+
+            started = time.perf_counter()
+            try:
+                previous, pending = self._sample(root, on_items, bbox, previous, pending)
+            except Exception as e:
+                log_message(f"[Watch] Sample failed: {e}")
+                previous, pending = None, []
+
+            elapsed = time.perf_counter() - started
+            budget = max(c.WATCH_CPU_BUDGET_MIN, min(c.WATCH_CPU_BUDGET_MAX, float(self.cpu_budget)))
+            delay = elapsed * (100.0 / budget - 1.0)
+            stop.wait(max(WATCH_MIN_INTERVAL, min(WATCH_MAX_INTERVAL, delay)))
+
+    def _sample(self, root, on_items, bbox, previous, pending):
+        sample, scale = grab_sample(bbox, WATCH_SAMPLE_WIDTH)
+
+        if previous is None or previous.shape != sample.shape:
+            return sample, []
+
+        changed = cv2.compare(cv2.absdiff(previous, sample), WATCH_DIFF_THRESHOLD, cv2.CMP_GT)
+
+        still_pending = []
+        for box, waited in pending:
+            left, top, right, bottom = box
+            moving = cv2.countNonZero(changed[top:bottom, left:right])
+            if moving <= (right - left) * (bottom - top) * (1.0 - WATCH_STATIC_RATIO):
+                self._capture_box(root, on_items, bbox, box, scale)
+            elif waited + 1 < WATCH_PENDING_SAMPLES:
+                still_pending.append((box, waited + 1))
+
+        for box in find_changed_boxes(changed):
+            if not any(_overlaps(box, other) for other, _ in still_pending):
+                still_pending.append((box, 0))
+
+        return sample, still_pending
+
+    def _capture_box(self, root, on_items, bbox, box, scale):
+        win_left, win_top, win_right, win_bottom = bbox
+        width, height = win_right - win_left, win_bottom - win_top
+        left, top, right, bottom = box
+        # Only the settled box is grabbed at full resolution
+        crop = np.array(ImageGrab.grab(bbox=(
+            win_left + max(0, int((left - WATCH_CROP_PADDING) * scale)),
+            win_top + max(0, int((top - WATCH_CROP_PADDING) * scale)),
+            win_left + min(width, int((right + WATCH_CROP_PADDING) * scale)),
+            win_top + min(height, int((bottom + WATCH_CROP_PADDING) * scale))
+        )))
+
+        _, filtered = tracker.prepare_ocr_image(crop)
+        if cv2.countNonZero(filtered) < WATCH_MIN_TEXT_PIXELS:
+            return  # a tooltip closing, or a box without item text
+
+        if c.DEBUGGING:
+            log_message(f"[Watch] Reading settled region {box} of the {width}x{height} window")
+
+        with tracker.CAPTURE_LOCK:
+            text, strips = tracker.ocr_mask(filtered)
+            items = tracker.write_entry(root, text, utils.now_timestamp(), allow_dupes=False, quiet=True,
+                                        image=filtered, stack_strips=strips)
+        if on_items and items:
+            on_items(items)
+
+
+#############################################################################
+# Grey sample of the window at sample_width, plus the window pixels per     #
+# sample pixel. On Windows GDI scales it down while copying from the        #
+# screen, so the full resolution frame is never materialised; elsewhere     #
+# the window is grabbed and resized.                                        #
+#############################################################################
+def grab_sample(bbox, sample_width):
+    left, top, right, bottom = bbox
+    width, height = right - left, bottom - top
+    scale = max(1.0, width / sample_width)
+    size = (max(1, int(width / scale)), max(1, int(height / scale)))
+
+    if sys.platform == "win32":
+        sample = _stretch_grab(bbox, size)
+        if sample is not None:
+            return sample, scale
+
+    frame = np.array(ImageGrab.grab(bbox=bbox))
+    return cv2.resize(cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY), size, interpolation=cv2.INTER_AREA), scale
+
+
+def _stretch_grab(bbox, size):
+    import ctypes
+    from ctypes import wintypes
+
+    class BITMAPINFOHEADER(ctypes.Structure):
+        _fields_ = [("biSize", wintypes.DWORD), ("biWidth", wintypes.LONG), ("biHeight", wintypes.LONG),
+                    ("biPlanes", wintypes.WORD), ("biBitCount", wintypes.WORD), ("biCompression", wintypes.DWORD),
+                    ("biSizeImage", wintypes.DWORD), ("biXPelsPerMeter", wintypes.LONG),
+                    ("biYPelsPerMeter", wintypes.LONG), ("biClrUsed", wintypes.DWORD),
+                    ("biClrImportant", wintypes.DWORD)]
+
+    user32, gdi32 = ctypes.windll.user32, ctypes.windll.gdi32
+    for fn in (user32.GetDC, gdi32.CreateCompatibleDC, gdi32.CreateCompatibleBitmap, gdi32.SelectObject):
+        fn.restype = ctypes.c_void_p
+
+    left, top, right, bottom = bbox
+    width, height = size
+    screen = ctypes.c_void_p(user32.GetDC(None))
+    memory = ctypes.c_void_p(gdi32.CreateCompatibleDC(screen))
+    bitmap = ctypes.c_void_p(gdi32.CreateCompatibleBitmap(screen, width, height))
+    previous = ctypes.c_void_p(gdi32.SelectObject(memory, bitmap))
+    try:
+        gdi32.SetStretchBltMode(memory, _HALFTONE)
+        gdi32.SetBrushOrgEx(memory, 0, 0, None)
+        if not gdi32.StretchBlt(memory, 0, 0, width, height, screen, left, top, right - left, bottom - top,
+                                _SRCCOPY):
+            return None
+
+        # top-down 32 bit BGRX rows
+        header = BITMAPINFOHEADER(biSize=ctypes.sizeof(BITMAPINFOHEADER), biWidth=width, biHeight=-height,
+                                  biPlanes=1, biBitCount=32)
+        pixels = np.empty((height, width, 4), dtype=np.uint8)
+        if not gdi32.GetDIBits(memory, bitmap, 0, height, pixels.ctypes.data_as(ctypes.c_void_p),
+                               ctypes.byref(header), 0):
+            return None
+    finally:
+        gdi32.SelectObject(memory, previous)
+        gdi32.DeleteObject(bitmap)
+        gdi32.DeleteDC(memory)
+        user32.ReleaseDC(None, screen)
+    return cv2.cvtColor(pixels, cv2.COLOR_BGRA2GRAY)
+
+
+#############################################################################
+# Tooltip sized boxes (left, top, right, bottom) of changed sample pixels.  #
+#############################################################################
+def find_changed_boxes(changed):
+    height, width = changed.shape[:2]
+    if not cv2.countNonZero(changed):
+        return []
+
+    changed = cv2.dilate(changed, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(changed, connectivity=8)
+
+    boxes = []
+    for i in range(1, count):
+        x, y, w, h, _ = stats[i]
+        if w >= width * TOOLTIP_MIN_WIDTH_RATIO and h >= height * TOOLTIP_MIN_HEIGHT_RATIO:
+            boxes.append((int(x), int(y), int(x + w), int(y + h)))
+    return boxes
+
+
+def _overlaps(a, b) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+WATCHER = CaptureWatcher()
@@ -55,7 +55,8 @@ DEFAULT_SETTINGS = {
         'duplicate_latest_key': 'alt+1',
         'delete_latest_key': 'alt+2',
         'show_highest_value_key': 'alt+s',
-        "cycle_bp_enchantment_key": "alt+4"
+        "cycle_bp_enchantment_key": "alt+4",
+        "watch_mode_key": "alt+w"
     },
     'DEFAULT': {
         'pytesseract_path': r'C:\Program Files\Tesseract-OCR\tesseract.exe',
@@ -266,6 +267,8 @@ site_config_cache_file_name = "fetch/site_config.json"
 terms_cache_file_name = "fetch/terms.json"
 experimental_items_cache_file_name = "fetch/experimental_items.json"
 enchantments_trade_cache_file_name = "fetch/enchantments_trade.json"
+user_words_file_name = "fetch/curio.user-words"
+user_patterns_file_name = "fetch/curio.user-patterns"
 
 target_application = "Path of Exile"
 not_found_target_txt = "Path of Exile window not found."
@@ -303,6 +306,34 @@ DEFAULT_TOAST_DURATION = 5
 DEFAULT_TOAST_ENABLE = True
 DEFAULT_TOP_RIGHT_CAPTURE_PERCENT = 0.01
 
+DEFAULT_OCR_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+OCR_WORKERS_MIN = 0
+OCR_WORKERS_MAX = 8
+
+DEFAULT_OCR_CACHE_SIZE = 16
+OCR_CACHE_SIZE_MIN = 0
+OCR_CACHE_SIZE_MAX = 128
+
+DEFAULT_OCR_RESCUE_CONFIDENCE = 70  # lines with a word below this are re-read upscaled, 0 = off
+OCR_RESCUE_CONFIDENCE_MIN = 0
+OCR_RESCUE_CONFIDENCE_MAX = 100
+
+DEFAULT_WATCH_CPU_BUDGET = 5  # percent of one core
+WATCH_CPU_BUDGET_MIN = 1
+WATCH_CPU_BUDGET_MAX = 50
+
+DEFAULT_STAGE_TIMING_ENABLED = False
+DEFAULT_FUZZY_MATCHING_ENABLED = False
+DEFAULT_OCR_VOCABULARY_ENABLED = True
+
+DEFAULT_ARCHIVE_ENABLED = False
+DEFAULT_ARCHIVE_MAX_DAYS = 30
+ARCHIVE_MAX_DAYS_MIN = 1
+ARCHIVE_MAX_DAYS_MAX = 365
+DEFAULT_ARCHIVE_MAX_MB = 256
+ARCHIVE_MAX_MB_MIN = 16
+ARCHIVE_MAX_MB_MAX = 8192
+
 TOAST_Y_OFFSET_MIN = 0
 TOAST_Y_OFFSET_MAX = 500
 TOAST_X_OFFSET_MIN = -4000
@@ -1,4 +1,6 @@
 import csv
+import io
+import os
 from datetime import datetime
 from pathlib import Path
 
@@ -7,24 +9,94 @@ from data_manager import BaseDataManager
 from load_utils import load_csv
 from logger import log_message
 
+TAIL_BLOCK_SIZE = 64 * 1024
 
+
+#############################################################################
+# Record numbers come from an in-memory max, seeded by one full pass and    #
+# kept in step with every write made here. Before it is used, the file's    #
+# (size, mtime) is compared with the one seen after the last write: when   #
+# the file only grew (rows appended by something else) just the new bytes  #
+# are parsed, any other change re-seeds with a full pass. So a capture no   #
+# longer parses the whole file to number and append its rows.              #
+#############################################################################
 class CSVManager(BaseDataManager):
     def __init__(self, file_path=None):
         base = Path(file_path or data_file_base)
         self.file_path = base.with_suffix(".csv")
         self.last_record_number = 0
+        self._max_record = None
+        self._file_state = None
 
     def load_dict(self):
         if not self.file_path.exists():
             return []
         return load_csv(self.file_path, as_dict=True, skip_header=False)
 
+    #########################################################################
+    # Recent rows without parsing the history: the file is read backwards  #
+    # in TAIL_BLOCK_SIZE blocks and each line goes through the same         #
+    # DictReader as load_dict. A line with an odd number of quotes belongs  #
+    # to a record spanning several lines, those fall back to load_dict      #
+    #########################################################################
+    def tail(self, n):
+        rows = []
+        if n > 0:
+            for row in self.iter_reverse():
+                rows.append(row)
+                if len(rows) == n:
+                    break
+        rows.reverse()
+        return rows
+
+    def iter_reverse(self):
+        header = self._read_header()
+        if header is None:
+            return
+
+        yielded = 0
+        for line in self._reverse_lines():
+            if line.count('"') % 2:
+                yield from list(reversed(self.load_dict()))[yielded:]
+                return
+            row = next(csv.DictReader([line], fieldnames=header), None)
+            if row is not None:
+                yielded += 1
+                yield row
+
+    def _read_header(self):
+        try:
+            with self.file_path.open("r", newline="", encoding="utf-8-sig") as f:
+                return next(csv.reader([f.readline()]), None)
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _reverse_lines(self):
+        with self.file_path.open("rb") as f:
+            start = len(f.readline())
+            position = f.seek(0, os.SEEK_END)
+            rest = b""
+            while position > start:
+                step = min(TAIL_BLOCK_SIZE, position - start)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + rest).split(b"\n")
+                rest = lines.pop(0)
+                for line in reversed(lines):
+                    if line.strip():
+                        yield line.decode("utf-8")
+            if rest.strip():
+                yield rest.decode("utf-8")
+
     def save_dict(self, root, rows, fieldnames):
         try:
             with self.file_path.open("w", newline="", encoding="utf-8") as f:
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
                 writer.writerows(rows)
+            numbers = [int(row[csv_record_header]) for row in rows if str(row.get(csv_record_header, "")).isdigit()]
+            self._max_record = max(numbers, default=0)
+            self._file_state = self._stat()
         except PermissionError as e:
             import toasts
             toasts.show_message(root, "!!! Unable to write to CSV (file may be open) !!!", duration=5000)
@@ -32,21 +104,11 @@ class CSVManager(BaseDataManager):
         except OSError as e:
             log_message(f"[ERROR] CSV write failed: {e}")
 
+    # force is kept for callers, the file check in _current_max_record runs every time
     def get_next_record_number(self, force=False):
         from settings import set_setting
 
-        if force or self.last_record_number == 0:
-            self.recalculate_record_number()
-
-        if self.file_path.exists():
-            rows = self.load_dict()
-            existing_numbers = {int(row[csv_record_header]) for row in rows if row.get(csv_record_header, "").isdigit()}
-            next_number = 1
-            while next_number in existing_numbers:
-                next_number += 1
-            self.last_record_number = next_number
-        else:
-            self.last_record_number += 1
+        self.last_record_number = self._current_max_record() + 1
 
         set_setting("Application", "csv_current_row", self.last_record_number)
         return self.last_record_number
@@ -54,8 +116,14 @@ class CSVManager(BaseDataManager):
     def recalculate_record_number(self):
         from settings import set_setting
 
+        self.last_record_number = self._scan_max_record()
+        set_setting("Application", "csv_current_row", self.last_record_number)
+        return self.last_record_number
+
+    def _scan_max_record(self):
         max_record = 0
-        if self.file_path.exists():
+        state = self._stat()
+        if state is not None:
             try:
                 with self.file_path.open("r", encoding="utf-8") as f:
                     reader = csv.DictReader(f)
@@ -66,9 +134,48 @@ class CSVManager(BaseDataManager):
             except Exception as e:
                 log_message(f"[ERROR] Could not read CSV for record number: {e}")
 
-        self.last_record_number = max_record
-        set_setting("Application", "csv_current_row", self.last_record_number)
-        return self.last_record_number
+        self._max_record = max_record
+        self._file_state = state
+        return max_record
+
+    def _stat(self):
+        try:
+            st = os.stat(self.file_path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _current_max_record(self):
+        state = self._stat()
+        if self._max_record is None or state != self._file_state:
+            appended = None
+            if self._max_record is not None and state and self._file_state and state[0] > self._file_state[0]:
+                appended = self._read_appended_records(self._file_state[0])
+            if appended is None:
+                return self._scan_max_record()
+            self._max_record = max([self._max_record] + appended)
+            self._file_state = state
+        return self._max_record
+
+    # Record numbers of the rows written after offset, None when they can't be read
+    def _read_appended_records(self, offset):
+        try:
+            header = self._read_header() or []
+            with self.file_path.open("rb") as f:
+                if csv_record_header not in header or offset < len(f.readline()):
+                    return None
+                column = header.index(csv_record_header)
+                f.seek(offset)
+                tail = f.read().decode("utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            log_message(f"[ERROR] Could not read appended CSV rows: {e}")
+            return None
+
+        records = []
+        for row in csv.reader(io.StringIO(tail, newline="")):
+            if len(row) > column and row[column].isdigit():
+                records.append(int(row[column]))
+        return records
 
     def modify_record(self, root, record_number, item_name, updates=None, delete=False):
         updates = updates or {}
@@ -108,22 +215,14 @@ class CSVManager(BaseDataManager):
 
         write_header = not self.file_path.exists()
         fieldnames = list(rows[0].keys())
-
-        if self.file_path.exists():
-            try:
-                with self.file_path.open("r", encoding="utf-8") as f:
-                    reader = list(csv.DictReader(f))
-                    if reader:
-                        val = reader[-1].get(csv_record_header, "0")
-                        if str(val).isdigit():
-                            self.last_record_number = int(val)
-            except Exception as e:
-                log_message(f"[ERROR] Failed reading last record for append: {e}")
+        max_record = self._current_max_record()
 
         for row in rows:
             if not row.get(csv_record_header):
-                self.last_record_number += 1
-                row[csv_record_header] = str(self.last_record_number)
+                max_record += 1
+                row[csv_record_header] = str(max_record)
+            elif str(row[csv_record_header]).isdigit():
+                max_record = max(max_record, int(row[csv_record_header]))
 
         try:
             with self.file_path.open("a", newline="", encoding="utf-8") as f:
@@ -138,6 +237,10 @@ class CSVManager(BaseDataManager):
             log_message(f"[ERROR] PermissionError: {e}")
         except OSError as e:
             log_message(f"[ERROR] CSV write failed: {e}")
+        else:
+            self._max_record = max_record
+            self._file_state = self._stat()
+        self.last_record_number = max_record
 
         from settings import set_setting
         set_setting("Application", "csv_current_row", self.last_record_number)
@@ -214,16 +317,13 @@ class CSVManager(BaseDataManager):
             )
 
     def duplicate_latest(self, root):
-        rows = self.load_dict()
+        rows = self.tail(1)
         if not rows:
             log_message("[ERROR] CSV file has no entries to duplicate.")
             return None
 
         last_row = rows[-1].copy()
 
-        # Ensure last_record_number is current
-        self.recalculate_record_number()
-
         # Assign next unique number
         record_number = self.get_next_record_number()
         last_row[csv_record_header] = str(record_number)
@@ -231,9 +331,7 @@ class CSVManager(BaseDataManager):
         if csv_time_header in last_row:
             last_row[csv_time_header] = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
-        # Append and save
-        rows.append(last_row)
-        self.save_dict(root, rows, fieldnames=list(last_row.keys()))
+        self.append_rows([last_row], root)
 
         log_message(f"[INFO] Duplicated latest CSV entry → Record {record_number}")
         return last_row
@@ -11,6 +11,7 @@ from config import LEAGUES_TO_FETCH, APP_DISPLAY_NAME, DISCORD_USERNAME, CONTACT
 from load_utils import get_datasets, OUTPUT_CURRENCY_CSV
 from logger import log_message
 from shared_lock import is_recent_run, update_lock
+from text_normalize import normalize_name_for_lookup
 from version_utils import VERSION
 
 # === THREADING FLAGS ===
@@ -59,19 +60,6 @@ ITEM_TYPE_MAP = {
 }
 
 
-def normalize_name_for_lookup(name: str) -> str:
-    if not name:
-        return name
-
-    normalized = name
-    normalized = normalized.replace(" Of The ", " of the ")
-    normalized = normalized.replace(" Of ", " of ")
-    normalized = normalized.replace("-Attuned", "-attuned")
-    normalized = normalized.replace("Three-Step", "Three-step")
-
-    return normalized
-
-
 SESSION = requests.Session()
 SESSION.headers.update(HEADERS)
 
@@ -39,6 +39,7 @@ keybinds = [
     ("Show Highest Value", hotkey_default('show_highest_value'), 'show_highest_value'),
     ("Debugging", hotkey_default('debug'), 'debug'),
     ("Cycle BP Enchantment", hotkey_default('cycle_bp_enchantment'), 'cycle_bp_enchantment'),
+    ("Toggle Watch Mode", hotkey_default('watch_mode'), 'watch_mode'),
 ]
 
 DEFAULT_KEYBINDS = [
@@ -51,6 +52,7 @@ DEFAULT_KEYBINDS = [
     ("Show Highest Value", 'alt+3', 'show_highest_value'),
     ("Debugging", 'alt+d', 'debug'),
     ("Cycle BP Enchantment", "alt+4", "cycle_bp_enchantment"),
+    ("Toggle Watch Mode", "alt+w", "watch_mode"),
 ]
 
 # ---------------- Runtime storage ----------------
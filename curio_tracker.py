@@ -3,43 +3,44 @@ import os
 import platform
 import re
 import subprocess
+import threading
 import time
 import tkinter as tk
-from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict
 
 import cv2
 import numpy as np
-import pyautogui
-import pygetwindow as gw
-import pyperclip
-import pytesseract
 from PIL import ImageGrab
 from termcolor import colored
 
+import capture_archive
 import config as c
 import currency_utils
+import layout_reader
+import ocr_cache
+import ocr_engine
 import ocr_utils as utils
+import ocr_vocabulary
+import stack_size_ocr
 import toasts
 from config import data_file_base
-from csv_manager import CSVManager
-from data_manager import BaseDataManager
-from json_manager import JSONManager
-from load_utils import get_datasets
+from data_manager import BaseDataManager, create_data_manager
+from load_utils import get_datasets, USER_WORDS_FILE, USER_PATTERNS_FILE
 from logger import log_message
+from ocr_filters import filter_item_text, find_tooltip_regions, hdr_remove_shine, TOOLTIP_MAX_COVERAGE, \
+    choose_ocr_scale, resize_for_ocr
 from ocr_utils import build_parsed_item
 from settings import get_setting, set_setting
+from stage_timing import span
+from term_matcher import TermMatcher
 
 datasets = get_datasets(force_reload=True)
 saved_mode = get_setting("Application", "export_mode", default="CSV").upper()
 base = Path(data_file_base)
 
-if saved_mode == "JSON":
-    data_mgr = JSONManager(base)
-else:
-    data_mgr = CSVManager(base)
+data_mgr = create_data_manager(saved_mode, base)
 
 # default values in case they only run area lvl 83 blueprints
 blueprint_area_level = c.default_bp_lvl
@@ -53,36 +54,18 @@ duplicate_duration_time = c.time_last_dupe_check_seconds
 stack_sizes = {}
 
 non_dup_count = 0
+fuzzy_accept_count = 0
 attempt = 1
 listener_ref = None
 parsed_items = []
 
+# Hotkey, snippet and watch mode captures run on their own threads but share the record
+# numbers and the state above (parsed_items, recent_terms, attempt), one capture at a time
+CAPTURE_LOCK = threading.RLock()
+
 MAX_RECENT_TERMS = 5  # keep last 5 entries in memory
 recent_terms = []  # list of tuples: (term, datetime)
 
-VALID_STACK_MAX_VALUES = frozenset({20, 30, 40})
-
-OCR_DIGIT_TRANSLATION = str.maketrans({
-    "O": "0", "o": "0",
-    "I": "1", "l": "1", "!": "1", "i": "1",
-    "B": "8",
-    "S": "5", "s": "5",
-    "g": "9", "q": "9",
-    "\\": "/", "-": "/", "|": "/",
-})
-
-STACK_RATIO_PATTERN = re.compile(r"\b(\d{1,3})\s*[/|\\\-]\s*(\d{2})\b")
-
-OCR_COLOR_RANGES = tuple(
-    (np.asarray(lo, dtype=np.uint8), np.asarray(hi, dtype=np.uint8))
-    for lo, hi in (
-        (c.replica_l_hsv, c.replica_u_hsv),
-        (c.rare_l_hsv, c.rare_u_hsv),
-        (c.currency_l_hsv, c.currency_u_hsv),
-        (c.scarab_l_hsv, c.scarab_u_hsv),
-        (c.enchant_l_hsv, c.enchant_u_hsv),
-    )
-)
 
 def populate_recent_terms(within_seconds: int = None, max_items: int = None):
     global recent_terms
@@ -91,16 +74,14 @@ def populate_recent_terms(within_seconds: int = None, max_items: int = None):
     within_seconds = within_seconds or int(duplicate_duration_time or 60)
 
     try:
-        rows = data_mgr.load_dict()
+        last_rows = data_mgr.tail(max_items)
     except Exception:
-        rows = []
+        last_rows = []
 
-    if not rows:
+    if not last_rows:
         recent_terms = []
         return
 
-    # Take last max_items rows
-    last_rows = rows[-max_items:]
     parsed = []
     now = datetime.now()
 
@@ -197,41 +178,20 @@ term_types = datasets["terms"]
 all_terms = set(term_types.keys())
 body_armors = datasets["body_armors"]
 owned_items = {}
-PRECOMP_TERMS = []
-for term in all_terms:
-    cleaned = utils.remove_possessive_s(term)
-    normalized_term = utils.normalize_for_search(cleaned)
-    term_type = term_types.get(term, "")
-    term_type_cmp = utils.smart_title_case(term_type) if isinstance(term_type, str) else ""
-    enchant_parts = None
-
-    if ";" in cleaned and term_type_cmp in (c.ARMOR_ENCHANT_TYPE, c.WEAPON_ENCHANT_TYPE):
-        enchant_parts = tuple(
-            utils.normalize_for_search(utils.smart_title_case(part.strip()))
-            for part in cleaned.split(";", 1)
-        )
-
-    PRECOMP_TERMS.append((
-        term,
-        normalized_term,
-        enchant_parts
-    ))
-
-def build_enchant_type_lookup(term_types):
-    lookup = defaultdict(set)
-    for raw_term, type_name in term_types.items():
-        norm = utils.normalize_for_search(utils.smart_title_case(raw_term))  # full term
-        lookup[norm].add(type_name)
-    return lookup
 
+##############################################################################
+# Term matcher built once at import, shared by live captures and re-matching #
+##############################################################################
+MATCHER = TermMatcher(term_types, body_armors)
 
-enchant_type_lookup = build_enchant_type_lookup(term_types)
 
+def get_poe_bbox(quiet=False):
+    import pygetwindow as gw  # desktop only, keeps this module importable headless
 
-def get_poe_bbox():
     windows = [w for w in gw.getWindowsWithTitle(c.target_application) if w.visible]
     if not windows:
-        log_message(c.not_found_target_txt)
+        if not quiet:
+            log_message(c.not_found_target_txt)
         return None
     win = windows[0]
     return win.left, win.top, win.left + win.width, win.top + win.height
@@ -242,7 +202,8 @@ def get_poe_bbox():
 #                                                                           #
 #    Args:                                                                  #
 #        image_np (np.ndarray): The image as a NumPy array (RGB).           #
-#        scale (int): Scale factor for resizing before OCR.                 #
+#        scale (float | "auto"): Resize factor before OCR, "auto" picks     #
+#            it from the measured glyph height (choose_ocr_scale).          #
 #        psm (int): Page segmentation mode for Tesseract.                   #
 #        lang (str): Language for Tesseract OCR.                            #
 #        apply_filter (bool): Whether to run filter_item_text() first.      #
@@ -250,31 +211,42 @@ def get_poe_bbox():
 #    Returns:                                                               #
 #        str: The OCR'd text in smart title case.                           #
 #############################################################################
-def ocr_from_image(image_np, scale=1, psm=6, lang="eng", apply_filter=True):
+def ocr_from_image(image_np, scale="auto", psm=6, lang="eng", apply_filter=True):
     if apply_filter:
-        if c.IS_HDR_ENABLED:
-            image_np = hdr_remove_shine(image_np)
-            if c.DEBUGGING:
-                cv2.imwrite("hdr_fixed.png", cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR))
-
-        image_np_filtered = filter_item_text(image_np)
-        if c.DEBUGGING:
-            cv2.imwrite("filtered.png", cv2.cvtColor(image_np_filtered, cv2.COLOR_RGB2BGR))
+        image_np, image_np_filtered = prepare_ocr_image(image_np)
     else:
         image_np_filtered = image_np
+    text, _ = ocr_mask(image_np_filtered, scale=scale, psm=psm, lang=lang)
+    return text, image_np
 
-    if scale != 1:
-        image_np_filtered = cv2.resize(
-            image_np_filtered,
-            (int(image_np_filtered.shape[1]) * scale, int(image_np_filtered.shape[0]) * scale),
-            interpolation=cv2.INTER_LANCZOS4
-        )
 
-    text = pytesseract.image_to_string(
-        image_np_filtered,
-        config=f"--psm {psm}",
-        lang=lang
-    )
+#############################################################################
+# OCR of an already filtered mask. Returns its title-cased text and the     #
+# "Stack Size:" strips found in the word layout of that same pass, in mask  #
+# pixels (see stack_size_ocr). The strips are None when the low confidence  #
+# rescue is off, the plain pass has no word layout.                         #
+#############################################################################
+def ocr_mask(mask, scale="auto", psm=6, lang="eng"):
+    min_confidence = ocr_rescue_confidence()
+    cache_variant = ("mask", scale, psm, lang, min_confidence)
+    cached = ocr_cache.CAPTURE_CACHE.get(mask, cache_variant)
+    if cached is not None:
+        return cached
+
+    if scale == "auto":
+        with span("scale"):
+            scale = choose_ocr_scale(mask)
+    image_np_filtered = resize_for_ocr(mask, scale)
+
+    with span("ocr"):
+        if min_confidence:
+            text, words = ocr_engine.ENGINE.image_to_string_and_data(image_np_filtered, psm=psm, lang=lang,
+                                                                     min_confidence=min_confidence)
+            strips = stack_size_ocr.find_stack_strips(words, image_np_filtered.shape[1],
+                                                      scale=image_np_filtered.shape[1] / mask.shape[1])
+        else:
+            text = ocr_engine.ENGINE.image_to_string(image_np_filtered, psm=psm, lang=lang)
+            strips = None
 
     if c.DEBUGGING:
         print("Filtered image stats:", image_np_filtered.min(), image_np_filtered.max())
@@ -285,157 +257,32 @@ def ocr_from_image(image_np, scale=1, psm=6, lang="eng", apply_filter=True):
             cv2.waitKey(0)
             cv2.destroyAllWindows()
 
-    return utils.smart_title_case(text), image_np
-
-
-#############################################################################
-# Experimental Shine Removal & Readability improvements for                 #
-# HDR Curio Tracking                                                        #
-#############################################################################
-def hdr_remove_shine(image_np):
-    if image_np.shape[-1] == 4:
-        image_np = cv2.cvtColor(image_np, cv2.COLOR_RGBA2RGB)
-
-    hsv = cv2.cvtColor(image_np, cv2.COLOR_RGB2HSV)
-
-    hue, sat, val = cv2.split(hsv)
-
-    height, width = val.shape
-
-    kernel = int(min(height, width) * 0.05)
-    kernel = max(31, min(kernel, 61))
-
-    if kernel % 2 == 0:
-        kernel += 1
-
-    bg = cv2.GaussianBlur(val, (kernel, kernel), 0)
-
-    shine = cv2.subtract(val, bg)
-
-    val_float = val.astype(np.float32)
-
-    mask = (shine > 210) & (val > 240)
-
-    val_float[mask] *= 0.90
-
-    val = np.clip(val_float, 0, 255).astype(np.uint8)
+    result = utils.smart_title_case(text), strips
+    ocr_cache.CAPTURE_CACHE.put(mask, result, cache_variant)
+    return result
 
-    hsv = cv2.merge((hue, sat, val))
 
-    rgb = cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB)
+def ocr_rescue_confidence():
+    return int(get_setting("Application", "ocr_rescue_confidence", c.DEFAULT_OCR_RESCUE_CONFIDENCE))
 
-    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
 
-    clahe = cv2.createCLAHE(
-        clipLimit=1.5,
-        tileGridSize=(8, 8)
-    )
-
-    gray = clahe.apply(gray)
-    if c.DEBUGGING:
-        cv2.imwrite("shine_mask.png", mask.astype(np.uint8) * 255)
-        print(
-            "VAL:",
-            val.min(),
-            val.max(),
-            "SHINE:",
-            shine.min(),
-            shine.max(),
-            "PERCENTILES:",
-            np.percentile(shine, [90, 95, 99, 99.9])
-        )
-    return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
-
-
-#############################################################
-# Saves the information on the screen based on colors       #
-# which is afterwards extracted as text                     #
-#############################################################
-def filter_item_text(image_np, fullscreen=False):
-    img_bgr = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-    hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
-
-    # Create combined mask
-    combined_mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
-    for lo, hi in OCR_COLOR_RANGES:
-        current_mask = cv2.inRange(hsv, lo, hi)
-        cv2.bitwise_or(combined_mask, current_mask, dst=combined_mask)
-
-    # Morphological operations
-    kernel = np.ones((1, 1), np.uint8)
-    combined_mask = cv2.morphologyEx(combined_mask, cv2.MORPH_CLOSE, kernel)
+#############################################################################
+# Applies the HDR fix (if enabled) and the colour filter, returns the       #
+# (possibly HDR corrected) image and the filtered text mask.                #
+#############################################################################
+def prepare_ocr_image(image_np):
+    if c.IS_HDR_ENABLED:
+        with span("hdr"):
+            image_np = hdr_remove_shine(image_np)
+        if c.DEBUGGING:
+            cv2.imwrite("hdr_fixed.png", cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR))
 
-    # Debugging overlay
+    with span("filter"):
+        image_np_filtered = filter_item_text(image_np)
     if c.DEBUGGING:
-        contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        debug_image = cv2.bitwise_and(img_bgr, img_bgr, mask=combined_mask)
-        cv2.drawContours(debug_image, contours, -1, (0, 0, 255), 1)
-        cv2.imwrite("ocr_debug_highlighted.png", debug_image)
-
-    return cv2.cvtColor(combined_mask, cv2.COLOR_GRAY2RGB)
+        cv2.imwrite("filtered.png", image_np_filtered)
 
-
-####################################################################
-# Checks for a match of x/y and if currency applies the stack size #
-####################################################################
-def extract_currency_value(lines, title_lines, matched_term, term_types):
-    if term_types.get(matched_term) not in {c.CURRENCY_TYPE, c.SCARAB_TYPE}:
-        return None
-
-    matched_title = matched_term.title()
-    idx = next((i for i, line in enumerate(title_lines) if matched_title in line), None)
-    if idx is None:
-        return None
-
-    # Search current and next 2 lines
-    for j in range(idx, min(idx + 3, len(lines))):
-        line = lines[j].translate(OCR_DIGIT_TRANSLATION)
-
-        # Match flexible patterns like 19/20, 19 / 20, 19|20, etc.
-        match = STACK_RATIO_PATTERN.search(line)
-        if match:
-            raw_current, raw_max = match.groups()
-
-            try:
-                current = int(raw_current)
-                maximum = int(raw_max)
-            except ValueError:
-                continue
-
-            if maximum in VALID_STACK_MAX_VALUES and 0 <= current <= maximum:
-                return current, maximum
-
-            # Fallback fix: take last digit of current if it's obviously wrong
-            if maximum in VALID_STACK_MAX_VALUES:
-                current_last = int(str(current)[-1])
-                if current_last <= maximum:
-                    return current_last, maximum
-
-    return 1, 20
-
-
-#################################################
-# Check if a term or combo term is in the text. #
-#################################################
-def is_term_match(normalized_term, normalized_lines, enchant_parts=None) -> bool:
-    # --- Handle Enchant Combos ---
-    if enchant_parts is not None:
-        part1, part2 = enchant_parts
-
-        for i, line in enumerate(normalized_lines):
-            if part1 in line or part2 in line:
-                # Look ahead 2 lines for the other part
-                for j in range(1, 3):
-                    if i + j < len(normalized_lines):
-                        if (part1 in line and part2 in normalized_lines[i + j]) or (
-                                part2 in line and part1 in normalized_lines[i + j]):
-                            if c.DEBUGGING:
-                                print(f"[EnchantCombo] Found combo '{part1}' & '{part2}' at lines {i} and {i + j}")
-                            return True
-        return False
-
-    # --- Standard Term Matching ---
-    return any(normalized_term in line for line in normalized_lines)
+    return image_np, image_np_filtered
 
 
 def is_duplicate_recent_entry(value):
@@ -500,122 +347,42 @@ def clear_recent_terms():
 #################################################
 # Gets all matched terms from the list          #
 #################################################
-def get_matched_terms(text, allow_dupes=False) -> List[Dict]:
-    global non_dup_count
-
-    all_candidates = []
-    original_terms_source = all_terms
-    original_text = text
-
-    text_clean = utils.remove_possessive_s(text)
-    normalized_lines = tuple(
-        utils.normalize_for_search(line)
-        for line in text_clean.splitlines()
-    )
-
-    for original_term, normalized_term, enchant_parts in PRECOMP_TERMS:
-        if is_term_match(normalized_term, normalized_lines, enchant_parts):
-            duplicate = is_duplicate_recent_entry(original_term)
-            all_candidates.append((original_term, duplicate))
-
-    #########################################################################################
-    # SPECIFICALLY FOR ENCHANTS TO NOT COUNT TWICE FOR MATCHES i.e                          #
-    # "8% Increased Explicit Ailment Modifier Magnitudes" and                               #
-    # "8% Increased Explicit Ailment Modifier Magnitudes; Has 1 White Socket"               #
-    # if it contains "Has 1 White Socket" it will write it/save it as the 2nd one instead   #
-    #########################################################################################
-    suppress_parts = set()
-    full_enchant_terms = set()
-    for term_title, _ in all_candidates:
-        if ";" in term_title and (term_types.get(term_title) in (c.ARMOR_ENCHANT_TYPE, c.WEAPON_ENCHANT_TYPE)):
-            part1, part2 = [utils.smart_title_case(p.strip()) for p in term_title.split(";", 1)]
-            suppress_parts.add(part1)
-            suppress_parts.add(part2)
-            full_enchant_terms.add(term_title)
-
-    if suppress_parts and not full_enchant_terms and c.DEBUGGING:
-        log_message("[Suppress] Found sub-parts to suppress but no full enchant terms present")
-
-    ############################################################
-    # Group candidates by term type and filter by match length #
-    ############################################################
-    sorted_terms = sorted(all_candidates, key=lambda x: len(x[0]), reverse=True)
-    final_matches = []
-    seen = set()
-
-    for term_title, duplicate in sorted_terms:
-        # Skip shorter terms already covered by a longer kept match
-        if any(term_title in existing for existing in seen):
-            continue  # do not add it at all
-
-        seen.add(term_title)
-        final_matches.append((term_title, duplicate))
-
-    #######################################
-    # Final filtering of suppressed terms #
-    #######################################
-    matched = []
-
-    for term_title, duplicate in final_matches:
-        if term_title in suppress_parts and term_title not in full_enchant_terms:
-            continue
+def get_matched_terms(text, allow_dupes=False, context=None) -> List[Dict]:
+    global non_dup_count, fuzzy_accept_count
 
-        armor_flag = False
-        weapon_flag = False
-
-        item_type = term_types.get(term_title)
-        base_part = term_title.split(";", 1)[0].strip()
-        norm_key = utils.normalize_for_search(utils.smart_title_case(base_part))
-        possible_types = enchant_type_lookup.get(norm_key, [])
-
-        # Only assign flags if item_type is an enchant type
-        if item_type in (c.ARMOR_ENCHANT_TYPE, c.WEAPON_ENCHANT_TYPE):
-            if possible_types:
-                if all(t == c.ARMOR_ENCHANT_TYPE for t in possible_types):
-                    armor_flag = True
-                elif all(t == c.WEAPON_ENCHANT_TYPE for t in possible_types):
-                    weapon_flag = True
-                else:
-                    # Term exists in both armor and weapon types
-                    # Use proximity logic to disambiguate
-                    if utils.is_armor_enchant_by_body_armor_order(term_title, text, body_armors, enchant_type_lookup):
-                        armor_flag = True
-                    else:
-                        weapon_flag = True
-        else:
-            # For non-enchant types, force flags false
-            armor_flag = False
-            weapon_flag = False
+    fuzzy = get_setting("Application", "fuzzy_matching_enabled", c.DEFAULT_FUZZY_MATCHING_ENABLED)
+    context = context or utils.CaptureContext(text)
+    matches = MATCHER.match(context, fuzzy=fuzzy)
+
+    duplicates = {}
+    for match in matches:
+        term_title = match["term"]
+        if match["confidence"] < 1.0:
+            fuzzy_accept_count += 1
+            log_message(f"[Fuzzy] Accepted '{term_title}' for OCR line '{context.lines[match['line']]}' "
+                        f"(confidence {match['confidence']:.2f}, {fuzzy_accept_count} fuzzy accepts so far)")
+
+        duplicate = duplicates.get(term_title)
+        if duplicate is None:
+            duplicate = duplicates[term_title] = is_duplicate_recent_entry(term_title)
 
-        # Append result, respecting duplicate flags and allowance
+        # Respect duplicate flags and allowance
         if allow_dupes or not duplicate:
             non_dup_count += 1
-            matched.append({
-                "term": term_title,
-                "duplicate": False,
-                "armor_enchant_flag": armor_flag,
-                "weapon_enchant_flag": weapon_flag,
-            })
+            match["duplicate"] = False
         else:
-            matched.append({
-                "term": term_title,
-                "duplicate": True,
-                "armor_enchant_flag": armor_flag,
-                "weapon_enchant_flag": weapon_flag,
-            })
+            match["duplicate"] = True
 
-    return matched
+    return matches
 
 
-def process_text(root, text, allow_dupes=False, matched_terms=None) -> None:
+def process_text(root, text, allow_dupes=False, matched_terms=None, quiet=False, context=None) -> None:
     global stack_sizes, attempt
     results = []
 
+    context = context or utils.CaptureContext(text)
     if matched_terms is None:
-        matched_terms = get_matched_terms(text, allow_dupes)
-
-    raw_lines = text.splitlines()
-    title_lines = tuple(line.title() for line in raw_lines)
+        matched_terms = get_matched_terms(text, allow_dupes, context)
 
     for match in matched_terms:
         term_title = match["term"]
@@ -626,18 +393,11 @@ def process_text(root, text, allow_dupes=False, matched_terms=None) -> None:
 
         item_type = term_types.get(utils.smart_title_case(term_title))
 
-        # Extract stack size / currency ratio
-        ratio = extract_currency_value(raw_lines, title_lines, term_title, term_types)
-        if ratio:
-            stack_size = f"{ratio[0]}"
-            stack_sizes[term_title] = stack_size
-            if c.DEBUGGING:
-                print(f"Ratio for {term_title}: {ratio[0]}/{ratio[1]}")
-        else:
-            stack_size = 1
-            stack_sizes[term_title] = stack_size
-            if c.DEBUGGING:
-                print("[Currency Ratio] None found.")
+        # Stack size / currency ratio, read by the matcher from the term's own line
+        stack_size = f"{match.get('stack_size', 1)}"
+        stack_sizes[term_title] = stack_size
+        if c.DEBUGGING:
+            print(f"Stack size for {term_title}: {stack_size}")
 
         stack_size_txt = (
             c.stack_size_found.format(stack_size)
@@ -647,10 +407,12 @@ def process_text(root, text, allow_dupes=False, matched_terms=None) -> None:
 
         # Format result
         type = c.ARMOR_ENCHANT_TYPE if armor_flag else c.WEAPON_ENCHANT_TYPE if weapon_flag else item_type
+        confidence = match.get("confidence", 1.0)
+        fuzzy_txt = f" (fuzzy match, {confidence:.0%} confidence)" if confidence < 1.0 else ""
         if duplicate and not allow_dupes:
             results.append(f"{type}: {term_title} (Duplicate - Skipping)")
         else:
-            results.append(f"{type}: {term_title}{stack_size_txt}")
+            results.append(f"{type}: {term_title}{stack_size_txt}{fuzzy_txt}")
 
     if c.DEBUGGING:
         highlighted = utils.smart_title_case(text)
@@ -666,22 +428,75 @@ def process_text(root, text, allow_dupes=False, matched_terms=None) -> None:
     if results:
         log_message(c.matches_found, results)
         attempt = 1
-    else:
+    elif not quiet:
         status = f"{c.matches_not_found} Attempt: #{attempt}"
         toasts.show_message(root, status)
         log_message(status)
         attempt += 1
 
 
-def write_entry(root, text, timestamp, allow_dupes=False) -> None:
+#############################################################################
+# A currency or scarab whose "x/y" ratio was not in the OCR text would be   #
+# stored with the stack size 1. Only then the "Stack Size:" strips of the   #
+# capture are read again on their own (see stack_size_ocr), located from    #
+# the word layout of the capture's OCR pass when it passed them as strips.  #
+# The i-th strip belongs to the i-th stack in text order, so the ratios are #
+# only used when their number lines up with the stacks that were matched.   #
+#############################################################################
+def reread_missing_stack_sizes(matched_terms, image, strips=None):
+    mask = prepare_ocr_image(image)[1] if image.ndim == 3 else image
+    if strips is not None:
+        ratios = stack_size_ocr.reread_stack_sizes(ocr_engine.ENGINE, mask, strips)
+    else:
+        height, width = mask.shape[:2]
+        boxes = find_tooltip_regions(mask)
+        covered = sum((r - l) * (b - t) for l, t, r, b in boxes) / float(width * height)
+        if not boxes or covered > TOOLTIP_MAX_COVERAGE:
+            boxes = [(0, 0, width, height)]
+
+        ratios = []
+        for left, top, right, bottom in boxes:
+            ratios.extend(stack_size_ocr.reread_stack_sizes(ocr_engine.ENGINE, mask[top:bottom, left:right]))
+
+    stacks = [match for match in matched_terms if utils.is_currency_or_scarab(match.get("type"))]
+    pending = [match for match in stacks if not match.get("stack_size_read", True)]
+    if len(ratios) == len(stacks):
+        pairs = [(match, ratio) for match, ratio in zip(stacks, ratios) if not match.get("stack_size_read", True)]
+    elif len(ratios) == len(pending) == 1:
+        pairs = [(pending[0], ratios[0])]
+    else:
+        log_message(f"[Stack] {len(ratios)} stack size strip(s) for {len(stacks)} stack(s), not re-read")
+        return
+
+    for match, ratio in pairs:
+        if ratio is None:
+            continue
+        match["stack_size"] = ratio[0]
+        match["stack_size_read"] = True
+        log_message(f"[Stack] Re-read stack size of '{match['term']}': {ratio[0]}/{ratio[1]}")
+
+
+def write_entry(root, text, timestamp, allow_dupes=False, quiet=False, image=None, stack_strips=None) -> list:
+    with CAPTURE_LOCK:
+        return _write_entry(root, text, timestamp, allow_dupes, quiet, image, stack_strips)
+
+
+def _write_entry(root, text, timestamp, allow_dupes, quiet, image, stack_strips) -> list:
     global stack_sizes, parsed_items, data_mgr
-    parsed_items = []
+    items = []
+    parsed_items = items
 
-    matched_terms = get_matched_terms(text, allow_dupes)
-    process_text(root, text, allow_dupes, matched_terms)
+    context = utils.CaptureContext(text)
+    with span("match"):
+        matched_terms = get_matched_terms(text, allow_dupes, context)
+    if image is not None and not all(match.get("stack_size_read", True) for match in matched_terms):
+        with span("stack"):
+            reread_missing_stack_sizes(matched_terms, image, stack_strips)
+    process_text(root, text, allow_dupes, matched_terms, quiet=quiet, context=context)
 
     if not matched_terms:
-        return
+        capture_archive.ARCHIVE.add(timestamp, text, image)
+        return items
 
     rows_to_write = []
 
@@ -691,7 +506,7 @@ def write_entry(root, text, timestamp, allow_dupes=False) -> None:
         term_title = match["term"]
         duplicate = match["duplicate"]
         item_type = term_types.get(utils.smart_title_case(term_title))
-        stack_size = stack_sizes.get(term_title, 1)
+        stack_size = f"{match.get('stack_size', stack_sizes.get(term_title, 1))}"
 
         if not allow_dupes and duplicate:
             continue
@@ -729,7 +544,7 @@ def write_entry(root, text, timestamp, allow_dupes=False) -> None:
             bp_enchantment=c.SET_BP_ENCHANTMENT_FOR_RUNS
         )
 
-        parsed_items.append(item)
+        items.append(item)
 
         row_dict = {
             c.csv_record_header: current_number,
@@ -757,28 +572,25 @@ def write_entry(root, text, timestamp, allow_dupes=False) -> None:
         rows_to_write.append(row_dict)
 
     if rows_to_write:
-        data_mgr.ensure_data_file()
-        data_mgr.append_rows(rows_to_write, root)
+        with span("storage"):
+            data_mgr.ensure_data_file()
+            data_mgr.append_rows(rows_to_write, root)
 
     data_mgr.last_record_number = next_record_number - 1
+    capture_archive.ARCHIVE.add(timestamp, text, image, [row[c.csv_record_header] for row in rows_to_write],
+                                matched_terms)
+    return items
 
 
 def reload_data_manager():
     from settings import get_setting
-    from csv_manager import CSVManager
-    from json_manager import JSONManager
     from config import data_file_base
     from pathlib import Path
 
     _base = Path(data_file_base)
     _saved_mode = get_setting("Application", "export_mode", default="CSV").upper()
 
-    if _saved_mode == "JSON":
-        _data_mgr = JSONManager(_base)
-    else:
-        _data_mgr = CSVManager(_base)
-
-    return _data_mgr
+    return create_data_manager(_saved_mode, _base)
 
 
 def build_row_dict(record_number, term_title, item_type, stack_size, timestamp):
@@ -905,11 +717,10 @@ def load_all_parsed_items(_data_mgr: BaseDataManager):
 
 
 def load_recent_parsed_items(_data_mgr: BaseDataManager, within_seconds=120, max_items=5):
-    rows = _data_mgr.load_dict()
-    if not rows:
+    last_rows = _data_mgr.tail(max_items)
+    if not last_rows:
         return []
 
-    last_rows = rows[-max_items:]
     timestamps = []
     for row in last_rows:
         ts_str = row.get(c.csv_time_header)
@@ -937,17 +748,84 @@ def load_recent_parsed_items(_data_mgr: BaseDataManager, within_seconds=120, max
 # OCR reads the texts and checks for matches.       #
 # If a match is found, it will save it in the .csv  #
 #####################################################
-def capture_once(root):
+def capture_once(root) -> list:
     validate_attempt(c.capturing_prompt)
     bbox = get_poe_bbox()
     if not bbox:
-        return
+        return []
 
-    screenshot_np = np.array(ImageGrab.grab(bbox=bbox))
-    full_text, filtered = ocr_from_image(screenshot_np)
+    with CAPTURE_LOCK, span("capture_once"):
+        with span("grab"):
+            screenshot_np = np.array(ImageGrab.grab(bbox=bbox))
+        full_text, filtered, strips = ocr_tooltip_regions(screenshot_np)
+
+        os.makedirs(c.saves_dir, exist_ok=True)
+        return write_entry(root, full_text, utils.now_timestamp(), allow_dupes=False, image=filtered,
+                           stack_strips=strips)
 
-    os.makedirs(c.saves_dir, exist_ok=True)
-    write_entry(root, full_text, utils.now_timestamp(), allow_dupes=False)
+
+#####################################################
+# Filters the full window once, then OCRs only the  #
+# detected tooltip crops (falls back to the full    #
+# filtered frame when nothing tooltip-like is found)#
+# Returns the text, the mask and the Stack Size     #
+# strips (see ocr_mask)                             #
+#####################################################
+def ocr_tooltip_regions(screenshot_np):
+    _, filtered = prepare_ocr_image(screenshot_np)
+    full_text, strips = ocr_filtered_regions(filtered)
+    return full_text, filtered, strips
+
+
+#####################################################
+# OCR text is cached per tooltip crop, so the rest  #
+# of the window (cursor, mobs, minimap) changing    #
+# between presses doesn't defeat the cache. Only    #
+# the crops that miss are sent to the OCR workers.  #
+# Returns the text and the Stack Size strips        #
+#####################################################
+def ocr_filtered_regions(filtered):
+    height, width = filtered.shape[:2]
+    with span("regions"):
+        boxes = find_tooltip_regions(filtered)
+    covered = sum((r - l) * (b - t) for l, t, r, b in boxes) / float(width * height)
+
+    if not boxes or covered > TOOLTIP_MAX_COVERAGE:
+        log_message(f"[Regions] No tooltip crop used for {width}x{height} frame (boxes={boxes})")
+        return ocr_mask(filtered)
+
+    log_message(f"[Regions] {len(boxes)} tooltip region(s) in {width}x{height} frame, "
+                f"{covered:.1%} of pixels sent to OCR: {boxes}")
+
+    min_confidence = ocr_rescue_confidence()
+    cache_variant = ("region", min_confidence)
+    crops = [filtered[top:bottom, left:right] for left, top, right, bottom in boxes]
+    results = [ocr_cache.CAPTURE_CACHE.get(crop, cache_variant) for crop in crops]
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    if missing:
+        with span("scale"):
+            scaled = [resize_for_ocr(crops[i], choose_ocr_scale(crops[i])) for i in missing]
+        with span("ocr"):
+            read = ocr_engine.DISPATCHER.image_to_string_and_data_many(scaled, psm=6,
+                                                                       min_confidence=min_confidence)
+
+        # strips are kept relative to their crop, a cached crop can show up anywhere in the window
+        for i, image, (text, words) in zip(missing, scaled, read):
+            strips = None
+            if words is not None:
+                strips = stack_size_ocr.find_stack_strips(words, image.shape[1],
+                                                          scale=image.shape[1] / crops[i].shape[1])
+            results[i] = utils.smart_title_case(text), strips
+            ocr_cache.CAPTURE_CACHE.put(crops[i], results[i], cache_variant)
+
+    strips = []
+    for (left, top, _, _), (_, crop_strips) in zip(boxes, results):
+        if crop_strips is None:
+            strips = None
+            break
+        strips.extend((l + left, t + top, r + left, b + top) for l, t, r, b in crop_strips)
+    return "\n".join(text for text, _ in results), strips
 
 
 def capture_snippet(root, on_done):
@@ -955,6 +833,8 @@ def capture_snippet(root, on_done):
     system = platform.system().lower()
 
     if system == "windows":
+        import pyperclip
+
         pyperclip.copy("")
 
         subprocess.Popen(["explorer", "ms-screenclip:"])
@@ -977,15 +857,17 @@ def capture_snippet(root, on_done):
             log_message("Snippet cancelled or failed.")
             return
 
-        screenshot_np = np.array(img)
-        full_text, _ = ocr_from_image(screenshot_np)
+        with CAPTURE_LOCK, span("capture_snippet"):
+            screenshot_np = np.array(img)
+            _, filtered = prepare_ocr_image(screenshot_np)
+            full_text, strips = ocr_mask(filtered)
 
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        os.makedirs(c.saves_dir, exist_ok=True)
-        write_entry(root, full_text, timestamp, allow_dupes=True)
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            os.makedirs(c.saves_dir, exist_ok=True)
+            items = write_entry(root, full_text, timestamp, allow_dupes=True, image=filtered, stack_strips=strips)
 
         if on_done:
-            on_done(parsed_items)
+            on_done(items)
 
     else:
         bbox = get_poe_bbox()
@@ -1027,18 +909,22 @@ def capture_snippet(root, on_done):
                 return
 
             bbox = (x1, y1, x2, y2)
-            screenshot_np = np.array(ImageGrab.grab(bbox))
-            if screenshot_np is None or screenshot_np.size == 0:
-                log_message(c.snippet_txt_failed)
-                return
-
-            full_text, filtered = ocr_from_image(screenshot_np, scale=2)
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            os.makedirs(c.saves_dir, exist_ok=True)
-            write_entry(root, full_text, timestamp, allow_dupes=True)
+            with CAPTURE_LOCK, span("capture_snippet"):
+                with span("grab"):
+                    screenshot_np = np.array(ImageGrab.grab(bbox))
+                if screenshot_np is None or screenshot_np.size == 0:
+                    log_message(c.snippet_txt_failed)
+                    return
+
+                _, filtered = prepare_ocr_image(screenshot_np)
+                full_text, strips = ocr_mask(filtered)
+                timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                os.makedirs(c.saves_dir, exist_ok=True)
+                items = write_entry(root, full_text, timestamp, allow_dupes=True, image=filtered,
+                                    stack_strips=strips)
 
             if on_done:
-                on_done(filtered)
+                on_done(items)
 
         canvas.bind("<Button-1>", on_mouse_down)
         canvas.bind("<B1-Motion>", on_mouse_drag)
@@ -1054,30 +940,27 @@ def capture_snippet(root, on_done):
 def capture_layout(root):
     global blueprint_area_level, blueprint_layout, attempt
 
+    import pyautogui
+
     validate_attempt(c.layout_prompt)
 
-    screenshot = pyautogui.screenshot()
-    full_width, full_height = screenshot.size
+    with span("capture_layout"):
+        full_width, full_height = pyautogui.size()
+        left, top, right, bottom = utils.get_top_right_layout(full_width, full_height)
+        with span("grab"):
+            cropped = pyautogui.screenshot(region=(left, top, right - left, bottom - top))
 
-    cropped = screenshot.crop(utils.get_top_right_layout(full_width, full_height))
+        with span("layout"):
+            found_layout, area_level, source = layout_reader.READER.read(
+                np.array(cropped.convert("RGB")), (full_width, full_height), ocr_engine.ENGINE
+            )
 
-    # Run OCR on the cropped region
-    text = utils.smart_title_case(pytesseract.image_to_string(cropped, config=r'--oem 3 --psm 6'))
     if c.DEBUGGING:
-        print("OCR Text:\n", text)
+        print(f"Layout read by {source}: {found_layout} / {area_level}")
         if c.OCR_DEBUGGING:
             cropped.show()
 
-    # Search for layout keyword
-    found_layout = None
-    for keyword in c.layout_keywords:
-        if utils.smart_title_case(keyword) in text:
-            found_layout = keyword
-            break
-
-    # Search for monster level using regex
-    match = re.search(r"Monster Level[: ]+(\d+)", text, re.IGNORECASE)
-    area_level = match.group(1) if match else c.default_bp_lvl
+    area_level = area_level or c.default_bp_lvl
 
     # Report results
     if found_layout and area_level:
@@ -1095,6 +978,14 @@ def capture_layout(root):
         attempt += 1
 
 
+def set_ocr_vocabulary(enabled: bool):
+    variables = ocr_vocabulary.tesseract_variables(USER_WORDS_FILE, USER_PATTERNS_FILE) if enabled else {}
+    ocr_engine.ENGINE.set_vocabulary(variables)
+    ocr_engine.DISPATCHER.set_vocabulary(variables)
+    ocr_cache.CAPTURE_CACHE.clear()  # texts read with the other vocabulary
+    log_message(f"[OCR] Terms vocabulary {'enabled' if variables else 'disabled'}")
+
+
 def set_duplicate_duration(duration: int):
     from settings import set_setting
     global duplicate_duration_time
@@ -32,4 +32,29 @@ class BaseDataManager(ABC):
 
     @abstractmethod
     def recalculate_record_number(self):
-        pass
\ No newline at end of file
+        pass
+
+    # The last n rows, oldest first. Backends that can read from the end override it
+    def tail(self, n):
+        if n <= 0:
+            return []
+        return self.load_dict()[-n:]
+
+    # Rows newest first
+    def iter_reverse(self):
+        return reversed(self.load_dict())
+
+
+DATA_MODES = ("CSV", "JSON", "SQLITE")
+
+
+def create_data_manager(mode, file_path=None) -> BaseDataManager:
+    mode = str(mode or "CSV").upper()
+    if mode == "JSON":
+        from json_manager import JSONManager
+        return JSONManager(file_path)
+    if mode == "SQLITE":
+        from sqlite_manager import SQLiteManager
+        return SQLiteManager(file_path)
+    from csv_manager import CSVManager
+    return CSVManager(file_path)
@@ -0,0 +1,229 @@
+from difflib import SequenceMatcher
+
+
+def char_masks(word: str) -> dict:
+    masks = {}
+    for i, ch in enumerate(word):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+
+def lcs_length(a: str, b: str, a_masks=None) -> int:
+    """Bit-parallel LCS length (Allison-Dix / Hyyro), one word-sized step per character of b."""
+    if a_masks is None:
+        a_masks = char_masks(a)
+    full = (1 << len(a)) - 1
+    v = full
+    for ch in b:
+        u = v & a_masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(a) - bin(v).count("1")
+
+
+def indel_distance(a: str, b: str, a_masks=None) -> int:
+    """Insertions + deletions needed to turn a into b, i.e. len(a) + len(b) - 2 * LCS."""
+    return len(a) + len(b) - 2 * lcs_length(a, b, a_masks)
+
+
+def max_indel_for_ratio(length: int, threshold: float) -> int:
+    """
+    Largest indel distance a word of `length` can have from any word it reaches a
+    SequenceMatcher ratio >= threshold with. ratio = 2M / (|a| + |b|) and M never
+    exceeds the LCS, so ratio >= t implies indel <= (1 - t)(|a| + |b|), and the
+    length ratio bound 2 min(|a|, |b|) >= t(|a| + |b|) caps |a| at |b|(2 - t) / t.
+    """
+    return int((1.0 - threshold) * length * 2.0 / threshold + 1e-9)
+
+
+#############################################################################
+# BK-tree over indel distance. A query only descends into children whose   #
+# edge distance is within radius of the query's distance to the node, so   #
+# it touches a fraction of the words instead of every one of them.         #
+#############################################################################
+class BKTree:
+    def __init__(self, words=()):
+        self._root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        if self._root is None:
+            self._root = (word, char_masks(word), {})
+            return
+
+        node = self._root
+        while True:
+            distance = indel_distance(node[0], word, node[1])
+            if distance == 0:
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (word, char_masks(word), {})
+                return
+            node = child
+
+    def search(self, word: str, radius: int) -> list:
+        if self._root is None:
+            return []
+
+        found = []
+        stack = [self._root]
+        while stack:
+            node_word, node_masks, children = stack.pop()
+            distance = indel_distance(node_word, word, node_masks)
+            if distance <= radius:
+                found.append(node_word)
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+#############################################################################
+# Fuzzy lookup of (possibly multi-word) phrases in a token stream, with the #
+# exact acceptance rule of the old SequenceMatcher scan: a single word      #
+# phrase needs ratio >= single_threshold against one token, a multi word    #
+# phrase needs ratio >= multi_threshold for each word against consecutive  #
+# tokens. Each distinct token makes one BK-tree query for its candidate     #
+# words, the candidates are then confirmed with the same ratio as before.  #
+#############################################################################
+class FuzzyPhraseIndex:
+    def __init__(self, phrases, single_threshold=0.8, multi_threshold=0.7):
+        self.single_threshold = single_threshold
+        self.multi_threshold = multi_threshold
+        self._loose = min(single_threshold, multi_threshold)
+
+        self._single = {}  # word -> phrase label
+        self._multi = {}  # first word -> [(parts, label)]
+        words = set()
+        for parts, label in phrases:
+            if not parts:
+                continue
+            words.update(parts)
+            if len(parts) == 1:
+                self._single.setdefault(parts[0], label)
+            else:
+                self._multi.setdefault(parts[0], []).append((tuple(parts), label))
+
+        self._tree = BKTree(sorted(words))
+
+    def first_match(self, tokens):
+        """
+        tokens: words in text order. Returns (token index, matched label, number of
+        tokens) of the earliest token a phrase matches at, or None.
+        """
+        ratios = {}
+
+        def ratio(part, tok):
+            key = (part, tok)
+            value = ratios.get(key)
+            if value is None:
+                value = ratios[key] = SequenceMatcher(None, part, tok).ratio()
+            return value
+
+        close_words = {}
+        for i, tok in enumerate(tokens):
+            candidates = close_words.get(tok)
+            if candidates is None:
+                radius = max_indel_for_ratio(len(tok), self._loose)
+                candidates = close_words[tok] = [
+                    part for part in self._tree.search(tok, radius) if ratio(part, tok) >= self._loose
+                ]
+
+            for part in candidates:
+                label = self._single.get(part)
+                if label is not None and ratio(part, tok) >= self.single_threshold:
+                    return i, label, 1
+
+                if ratio(part, tok) < self.multi_threshold:
+                    continue
+                for parts, label in self._multi.get(part, ()):
+                    if i + len(parts) > len(tokens):
+                        continue
+                    if all(ratio(p, tokens[i + k]) >= self.multi_threshold for k, p in enumerate(parts[1:], 1)):
+                        return i, label, len(parts)
+
+        return None
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance of a and b, or max_distance + 1 as soon as it must exceed
+    max_distance. Only the diagonal band |i - j| <= max_distance can hold a value
+    within the bound, so each row computes at most 2 * max_distance + 1 cells.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i, ch_a in enumerate(a, 1):
+        lo = max(1, i - max_distance)
+        hi = min(len(b), i + max_distance)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= max_distance else over
+        best = current[0]
+        for j in range(lo, hi + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch_a != b[j - 1]))
+            if value > over:
+                value = over
+            current[j] = value
+            if value < best:
+                best = value
+        if best > max_distance:
+            return over
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else over
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    found = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+#############################################################################
+# SymSpell style symmetric delete index. Every word is stored under all     #
+# strings reachable by deleting up to max_distance characters from its      #
+# prefix, a query generates the same deletes of its own prefix, so a        #
+# lookup is a few dozen dict hits plus an exact (bounded) Levenshtein check #
+# of the handful of candidates, independent of how many words are indexed. #
+#############################################################################
+class SymSpellIndex:
+    def __init__(self, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._words = {}  # word -> (value, max distance for this word)
+        self._deletes = {}
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, word: str, value, max_distance=None):
+        if word in self._words:
+            return
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        self._words[word] = (value, limit)
+        for key in _deletes(word[:self.prefix_length], limit):
+            self._deletes.setdefault(key, []).append(word)
+
+    def lookup(self, query: str) -> list:
+        """[(distance, word, value)] of every word within its own distance of query, closest first."""
+        seen = set()
+        found = []
+        for key in _deletes(query[:self.prefix_length], self.max_distance):
+            for word in self._deletes.get(key, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                value, limit = self._words[word]
+                distance = bounded_levenshtein(query, word, limit)
+                if distance <= limit:
+                    found.append((distance, word, value))
+        found.sort(key=lambda entry: (entry[0], entry[1]))
+        return found
@@ -6,6 +6,7 @@ from PIL import Image
 import customtkinter as ctk
 
 import load_utils
+import stage_timing
 from fonts import make_font
 from version_utils import VERSION
 
@@ -251,7 +252,8 @@ class CustomAboutPopup:
             f"Heist Curio Tracker\n"
             f"Version: {VERSION}\n"
             f"Data directory: {self.data_directory}\n"
-            f"Logs directory: {self.logs_directory}"
+            f"Logs directory: {self.logs_directory}\n"
+            f"\n{stage_timing.TIMINGS.format_report()}"
         )
 
         try:
@@ -6,7 +6,8 @@ from tkinter import messagebox
 from customtkinter import *
 
 import config
-from csv_manager import CSVManager
+from data_manager import create_data_manager
+from settings import get_setting
 
 
 class DataToolsPopup:
@@ -292,9 +293,9 @@ class DataToolsPopup:
         return ""
 
     def _upgrade_current_file(self):
-        csv_manager = CSVManager(config.data_file_base)
-        csv_manager.upgrade_structure()
-        csv_manager.recalculate_record_number()
+        data_mgr = create_data_manager(get_setting("Application", "export_mode", default="CSV"), config.data_file_base)
+        data_mgr.upgrade_structure()
+        data_mgr.recalculate_record_number()
 
     def _create_backup(self):
         if not os.path.exists(self.data_file):
@@ -27,7 +27,8 @@ class InfoPanelPopup:
             "duplicate_latest": lambda: f"Press {curio_keybinds.get_display_hotkey('duplicate_latest')} to duplicate the latest saved entry.",
             "delete_latest": lambda: f"Press {curio_keybinds.get_display_hotkey('delete_latest')} to delete the latest saved entry (must be loaded in the tool)",
             "show_highest_value": lambda: f"Press {curio_keybinds.get_display_hotkey('show_highest_value')} to show the highest value entry from current wing",
-            "cycle_bp_enchantment": lambda: f"Press {curio_keybinds.get_display_hotkey('cycle_bp_enchantment')} to cycle through the enchantment type on the blueprint"
+            "cycle_bp_enchantment": lambda: f"Press {curio_keybinds.get_display_hotkey('cycle_bp_enchantment')} to cycle through the enchantment type on the blueprint",
+            "watch_mode": lambda: f"Press {curio_keybinds.get_display_hotkey('watch_mode')} to toggle watch mode (captures tooltips as they appear)"
         }
 
         # Wrap text labels properly
@@ -2,6 +2,7 @@ import customtkinter as ctk
 
 import config
 from csv_to_json import csv_to_nested_json
+from data_manager import DATA_MODES
 from gui import keybinds_popup
 from gui.about_popup import CustomAboutPopup
 from gui.data_tools_popup import show_data_tools_popup
@@ -61,10 +62,10 @@ def create_settings_menu(tabview, tracker, theme_manager, tree_manager: TreeMana
     csv_json_mode = {"mode": saved_mode}
 
     def toggle_csv_json():
-        if csv_json_mode["mode"] == "CSV":
-            csv_json_mode["mode"] = "JSON"
-        else:
-            csv_json_mode["mode"] = "CSV"
+        # CSV -> JSON -> SQLITE -> CSV
+        current = csv_json_mode["mode"].upper()
+        index = DATA_MODES.index(current) if current in DATA_MODES else -1
+        csv_json_mode["mode"] = DATA_MODES[(index + 1) % len(DATA_MODES)]
 
         csv_json_button.configure(text=f"Data: {csv_json_mode['mode']}")
         set_setting("Application", "export_mode", csv_json_mode["mode"])
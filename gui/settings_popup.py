@@ -5,8 +5,12 @@ from tkinter import colorchooser
 
 import customtkinter as ctk
 
+import capture_archive
 import config as c
+import capture_watch
 import curio_collection_fetch
+import ocr_cache
+import stage_timing
 import toasts
 from fonts import update_all_fonts, make_font, init_font_var
 from load_utils import get_datasets
@@ -127,6 +131,36 @@ class UnifiedSettingsSection:
         self.top_right_target_area_percent_var = ctk.StringVar(
             value=str(get_setting("Application", "top_right_target_area_percent", c.DEFAULT_TOP_RIGHT_CAPTURE_PERCENT))
         )
+        self.ocr_workers_var = ctk.StringVar(
+            value=str(get_setting("Application", "ocr_workers", c.DEFAULT_OCR_WORKERS))
+        )
+        self.ocr_rescue_confidence_var = ctk.StringVar(
+            value=str(get_setting("Application", "ocr_rescue_confidence", c.DEFAULT_OCR_RESCUE_CONFIDENCE))
+        )
+        self.ocr_cache_size_var = ctk.StringVar(
+            value=str(get_setting("Application", "ocr_cache_size", c.DEFAULT_OCR_CACHE_SIZE))
+        )
+        self.watch_cpu_budget_var = ctk.StringVar(
+            value=str(get_setting("Application", "watch_cpu_budget", c.DEFAULT_WATCH_CPU_BUDGET))
+        )
+        self.stage_timing_var = ctk.BooleanVar(
+            value=get_setting("Application", "stage_timing_enabled", c.DEFAULT_STAGE_TIMING_ENABLED)
+        )
+        self.fuzzy_matching_var = ctk.BooleanVar(
+            value=get_setting("Application", "fuzzy_matching_enabled", c.DEFAULT_FUZZY_MATCHING_ENABLED)
+        )
+        self.ocr_vocabulary_var = ctk.BooleanVar(
+            value=get_setting("Application", "ocr_vocabulary_enabled", c.DEFAULT_OCR_VOCABULARY_ENABLED)
+        )
+        self.archive_var = ctk.BooleanVar(
+            value=get_setting("Application", "archive_enabled", c.DEFAULT_ARCHIVE_ENABLED)
+        )
+        self.archive_max_days_var = ctk.StringVar(
+            value=str(get_setting("Application", "archive_max_days", c.DEFAULT_ARCHIVE_MAX_DAYS))
+        )
+        self.archive_max_mb_var = ctk.StringVar(
+            value=str(get_setting("Application", "archive_max_mb", c.DEFAULT_ARCHIVE_MAX_MB))
+        )
 
         self.toasts_var = ctk.BooleanVar(value=toasts.ARE_TOASTS_ENABLED)
         self.toasts_duration_var = ctk.StringVar(value=str(toasts.TOASTS_DURATION))
@@ -145,6 +179,7 @@ class UnifiedSettingsSection:
 
         self.csv_current_record_number_var = ctk.IntVar(value=get_setting("Application", "csv_current_row", 0))
         self.json_current_record_number_var = ctk.IntVar(value=get_setting("Application", "json_current_row", 0))
+        self.sqlite_current_record_number_var = ctk.IntVar(value=get_setting("Application", "sqlite_current_row", 0))
 
         self.enable_poeladder_var = ctk.BooleanVar(
             value=get_setting("Application", "enable_poeladder", c.ENABLE_POELADDER)
@@ -278,6 +313,64 @@ class UnifiedSettingsSection:
         area_entry = ctk.CTkEntry(frame, textvariable=self.top_right_target_area_percent_var, width=self.width)
         area_entry.grid(row=row, column=1, sticky="w")
         self.top_right_target_area_percent_var.trace_add("write", self._update_top_right_target_area_percent)
+        row += 1
+
+        ctk.CTkLabel(frame, text="OCR Worker Processes (restart):").grid(row=row, column=0, sticky="w")
+        workers_entry = ctk.CTkEntry(frame, textvariable=self.ocr_workers_var, width=self.width)
+        workers_entry.grid(row=row, column=1, sticky="w")
+        workers_entry.bind("<Return>", lambda e: self._update_ocr_workers())
+        workers_entry.bind("<FocusOut>", lambda e: self._update_ocr_workers())
+        row += 1
+
+        ctk.CTkLabel(frame, text="OCR Line Re-read Confidence (0 = off):").grid(row=row, column=0, sticky="w")
+        rescue_entry = ctk.CTkEntry(frame, textvariable=self.ocr_rescue_confidence_var, width=self.width)
+        rescue_entry.grid(row=row, column=1, sticky="w")
+        rescue_entry.bind("<Return>", lambda e: self._update_ocr_rescue_confidence())
+        rescue_entry.bind("<FocusOut>", lambda e: self._update_ocr_rescue_confidence())
+        row += 1
+
+        ctk.CTkLabel(frame, text="OCR Cache Size (0 = off):").grid(row=row, column=0, sticky="w")
+        cache_entry = ctk.CTkEntry(frame, textvariable=self.ocr_cache_size_var, width=self.width)
+        cache_entry.grid(row=row, column=1, sticky="w")
+        cache_entry.bind("<Return>", lambda e: self._update_ocr_cache_size())
+        cache_entry.bind("<FocusOut>", lambda e: self._update_ocr_cache_size())
+        row += 1
+
+        ctk.CTkLabel(frame, text="Watch Mode CPU Budget (%):").grid(row=row, column=0, sticky="w")
+        budget_entry = ctk.CTkEntry(frame, textvariable=self.watch_cpu_budget_var, width=self.width)
+        budget_entry.grid(row=row, column=1, sticky="w")
+        budget_entry.bind("<Return>", lambda e: self._update_watch_cpu_budget())
+        budget_entry.bind("<FocusOut>", lambda e: self._update_watch_cpu_budget())
+        row += 1
+
+        ctk.CTkCheckBox(frame, text="Log Capture Stage Timings", variable=self.stage_timing_var,
+                        command=self._toggle_stage_timing).grid(row=row, column=0, columnspan=2, sticky="w")
+        row += 1
+
+        ctk.CTkCheckBox(frame, text="Fuzzy Matching of Misread Names", variable=self.fuzzy_matching_var,
+                        command=self._toggle_fuzzy_matching).grid(row=row, column=0, columnspan=2, sticky="w")
+        row += 1
+
+        ctk.CTkCheckBox(frame, text="OCR With Terms Vocabulary", variable=self.ocr_vocabulary_var,
+                        command=self._toggle_ocr_vocabulary).grid(row=row, column=0, columnspan=2, sticky="w")
+        row += 1
+
+        ctk.CTkCheckBox(frame, text="Archive Raw Captures", variable=self.archive_var,
+                        command=self._toggle_archive).grid(row=row, column=0, columnspan=2, sticky="w")
+        row += 1
+
+        ctk.CTkLabel(frame, text="Archive Retention (days):").grid(row=row, column=0, sticky="w")
+        days_entry = ctk.CTkEntry(frame, textvariable=self.archive_max_days_var, width=self.width)
+        days_entry.grid(row=row, column=1, sticky="w")
+        days_entry.bind("<Return>", lambda e: self._update_archive_max_days())
+        days_entry.bind("<FocusOut>", lambda e: self._update_archive_max_days())
+        row += 1
+
+        ctk.CTkLabel(frame, text="Archive Size Cap (MB):").grid(row=row, column=0, sticky="w")
+        size_entry = ctk.CTkEntry(frame, textvariable=self.archive_max_mb_var, width=self.width)
+        size_entry.grid(row=row, column=1, sticky="w")
+        size_entry.bind("<Return>", lambda e: self._update_archive_max_mb())
+        size_entry.bind("<FocusOut>", lambda e: self._update_archive_max_mb())
 
     # -------------------------------
     # Toasts
@@ -380,6 +473,12 @@ class UnifiedSettingsSection:
         json_record_entry.grid(row=row, column=1, sticky="w")
         row += 1
 
+        ctk.CTkLabel(frame, text="SQLite Current Record:").grid(row=row, column=0, sticky="w")
+        sqlite_record_entry = ctk.CTkEntry(frame, state="disabled", textvariable=self.sqlite_current_record_number_var,
+                                           width=self.width)
+        sqlite_record_entry.grid(row=row, column=1, sticky="w")
+        row += 1
+
         ctk.CTkLabel(frame, text="Seconds Between Dupe Checks:").grid(row=row, column=0, sticky="w")
         row += 1
 
@@ -648,6 +747,118 @@ class UnifiedSettingsSection:
         log_message("Top Right Target Area Percent", percent)
         set_setting("Application", "top_right_target_area_percent", percent)
 
+    def _update_ocr_workers(self, *_):
+        val = self.ocr_workers_var.get().strip()
+
+        try:
+            workers = int(val)
+        except ValueError:
+            workers = c.DEFAULT_OCR_WORKERS
+
+        workers = max(c.OCR_WORKERS_MIN, min(c.OCR_WORKERS_MAX, workers))
+
+        self.ocr_workers_var.set(str(workers))
+        set_setting("Application", "ocr_workers", workers)
+        log_message("OCR Worker Processes", workers)
+
+    def _update_ocr_rescue_confidence(self, *_):
+        val = self.ocr_rescue_confidence_var.get().strip()
+
+        try:
+            confidence = int(val)
+        except ValueError:
+            confidence = c.DEFAULT_OCR_RESCUE_CONFIDENCE
+
+        confidence = max(c.OCR_RESCUE_CONFIDENCE_MIN, min(c.OCR_RESCUE_CONFIDENCE_MAX, confidence))
+
+        self.ocr_rescue_confidence_var.set(str(confidence))
+        set_setting("Application", "ocr_rescue_confidence", confidence)
+        ocr_cache.CAPTURE_CACHE.clear()  # texts read with the other confidence
+        log_message("OCR Line Re-read Confidence", confidence)
+
+    def _update_ocr_cache_size(self, *_):
+        val = self.ocr_cache_size_var.get().strip()
+
+        try:
+            size = int(val)
+        except ValueError:
+            size = c.DEFAULT_OCR_CACHE_SIZE
+
+        size = max(c.OCR_CACHE_SIZE_MIN, min(c.OCR_CACHE_SIZE_MAX, size))
+
+        self.ocr_cache_size_var.set(str(size))
+        set_setting("Application", "ocr_cache_size", size)
+        ocr_cache.CAPTURE_CACHE.resize(size)
+        log_message("OCR Cache Size", size)
+
+    def _update_watch_cpu_budget(self, *_):
+        val = self.watch_cpu_budget_var.get().strip()
+
+        try:
+            budget = int(val)
+        except ValueError:
+            budget = c.DEFAULT_WATCH_CPU_BUDGET
+
+        budget = max(c.WATCH_CPU_BUDGET_MIN, min(c.WATCH_CPU_BUDGET_MAX, budget))
+
+        self.watch_cpu_budget_var.set(str(budget))
+        set_setting("Application", "watch_cpu_budget", budget)
+        capture_watch.WATCHER.cpu_budget = budget
+        log_message("Watch Mode CPU Budget", budget)
+
+    def _toggle_stage_timing(self):
+        enabled = self.stage_timing_var.get()
+        set_setting("Application", "stage_timing_enabled", enabled)
+        log_message("Stage Timings", enabled)
+        stage_timing.TIMINGS.enabled = enabled
+
+    def _toggle_fuzzy_matching(self):
+        enabled = self.fuzzy_matching_var.get()
+        set_setting("Application", "fuzzy_matching_enabled", enabled)
+        log_message("Fuzzy Matching", enabled)
+
+    def _toggle_ocr_vocabulary(self):
+        enabled = self.ocr_vocabulary_var.get()
+        set_setting("Application", "ocr_vocabulary_enabled", enabled)
+        self.tracker.set_ocr_vocabulary(enabled)
+        log_message("OCR Terms Vocabulary", enabled)
+
+    def _toggle_archive(self):
+        enabled = self.archive_var.get()
+        set_setting("Application", "archive_enabled", enabled)
+        capture_archive.ARCHIVE.configure(enabled=enabled)
+        log_message("Capture Archive", enabled)
+
+    def _update_archive_max_days(self, *_):
+        val = self.archive_max_days_var.get().strip()
+
+        try:
+            days = int(val)
+        except ValueError:
+            days = c.DEFAULT_ARCHIVE_MAX_DAYS
+
+        days = max(c.ARCHIVE_MAX_DAYS_MIN, min(c.ARCHIVE_MAX_DAYS_MAX, days))
+
+        self.archive_max_days_var.set(str(days))
+        set_setting("Application", "archive_max_days", days)
+        capture_archive.ARCHIVE.configure(max_days=days)
+        log_message("Archive Retention (days)", days)
+
+    def _update_archive_max_mb(self, *_):
+        val = self.archive_max_mb_var.get().strip()
+
+        try:
+            size = int(val)
+        except ValueError:
+            size = c.DEFAULT_ARCHIVE_MAX_MB
+
+        size = max(c.ARCHIVE_MAX_MB_MIN, min(c.ARCHIVE_MAX_MB_MAX, size))
+
+        self.archive_max_mb_var.set(str(size))
+        set_setting("Application", "archive_max_mb", size)
+        capture_archive.ARCHIVE.configure(max_mb=size)
+        log_message("Archive Size Cap (MB)", size)
+
     # -------------------------------
     # PoE Ladder
     # -------------------------------
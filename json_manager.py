@@ -1,4 +1,5 @@
 import json
+import os
 from datetime import datetime
 from pathlib import Path
 
@@ -14,6 +15,7 @@ class JSONManager(BaseDataManager):
         base = Path(file_path or data_file_base)
         self.file_path = base.with_suffix(".json")
         self.last_record_number = 0
+        self._rows_cache = None
 
     def load_dict(self):
         if not self.file_path.exists():
@@ -39,6 +41,32 @@ class JSONManager(BaseDataManager):
             log_message(f"[ERROR] JSON load failed: {e}")
             return []
 
+    #########################################################################
+    # The nested document keeps rows grouped by player, league and          #
+    # blueprint, not in write order, so there is no end of file to read     #
+    # back from. Recent row lookups reuse the last parse instead, for as    #
+    # long as the file's (size, mtime) is unchanged                         #
+    #########################################################################
+    def tail(self, n):
+        if n <= 0:
+            return []
+        return [dict(row) for row in self._cached_rows()[-n:]]
+
+    def iter_reverse(self):
+        return (dict(row) for row in reversed(self._cached_rows()))
+
+    def _cached_rows(self):
+        try:
+            st = os.stat(self.file_path)
+            state = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            return []
+        if self._rows_cache is None or self._rows_cache[0] != state:
+            rows = self.load_dict()
+            st = os.stat(self.file_path)
+            self._rows_cache = ((st.st_size, st.st_mtime_ns), rows)
+        return self._rows_cache[1]
+
     def upgrade_json_enchantments(self, nested):
         changed = False
 
@@ -66,7 +94,7 @@ class JSONManager(BaseDataManager):
         if self.last_record_number == 0:
             self.last_record_number = get_setting("Application", "json_current_row", 0)
             if (self.last_record_number == 0 or force) and self.file_path.exists():
-                rows = self.load_dict()
+                rows = self.tail(1)
                 if rows:
                     last = rows[-1].get(csv_record_header)
                     if last and str(last).isdigit():
@@ -199,7 +227,7 @@ class JSONManager(BaseDataManager):
     def recalculate_record_number(self):
         from settings import set_setting
 
-        rows = self.load_dict()
+        rows = self.tail(1)
         if rows:
             last_row = rows[-1]
             self.last_record_number = int(last_row.get(csv_record_header, 0))
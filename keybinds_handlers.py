@@ -2,8 +2,12 @@ import sys
 import threading
 from tkinter import TclError
 
+import capture_archive
+import capture_watch
 import config as c
 import curio_tracker as tracker
+import ocr_engine
+import stage_timing
 import toasts
 from logger import log_message
 from ocr_utils import parse_item_name
@@ -15,12 +19,12 @@ are_toasts_enabled = get_setting('Application', 'are_toasts_enabled', True)  # d
 
 
 def handle_capture(root, tree_manager: TreeManager, controls):
-    tracker.capture_once(root)
+    items = tracker.capture_once(root)
 
     if c.DEBUGGING:
-        print(f"[DEBUG] Parsed items after capture: {len(tracker.parsed_items)}")
+        print(f"[DEBUG] Parsed items after capture: {len(items)}")
 
-    for item in tracker.parsed_items:
+    for item in items:
         if not item.duplicate:
             if are_toasts_enabled:
                 toasts.show(root, item, tree_manager=tree_manager, tracker=tracker)
@@ -56,6 +60,31 @@ def handle_snippet(root, tree_manager: TreeManager, controls):
     root.after(0, run_capture)
 
 
+def handle_watch_toggle(root, tree_manager: TreeManager, controls):
+    watcher = capture_watch.WATCHER
+    if watcher.running:
+        watcher.stop()
+        state = "Disabled"
+    else:
+        def show_items(items):
+            def show():
+                for item in items:
+                    if not item.duplicate:
+                        if are_toasts_enabled:
+                            toasts.show(root, item, tree_manager=tree_manager, tracker=tracker)
+                        tree_manager.add_item_to_tree(item)
+                controls.update_total_items_count()
+
+            root.after(0, show)
+
+        watcher.cpu_budget = get_setting("Application", "watch_cpu_budget", c.DEFAULT_WATCH_CPU_BUDGET)
+        watcher.start(root, on_items=show_items)
+        state = "Enabled"
+
+    if are_toasts_enabled:
+        toasts.show_message(root, f"Watch Mode: {state}", duration=2500)
+
+
 def handle_layout_capture(root, tree_manager, controls):
     tracker.capture_layout(root)
     # root.after(0, controls.refresh_blueprint_info)
@@ -65,6 +94,11 @@ def handle_exit(root):
     tracker.log_message(c.exiting_prompt)
 
     exit_event.set()
+    capture_watch.WATCHER.stop()
+    capture_archive.ARCHIVE.flush()  # captures still queued for the archive
+    ocr_engine.DISPATCHER.shutdown()
+    if stage_timing.TIMINGS.enabled:
+        stage_timing.TIMINGS.dump()
 
     try:
         def safe_quit_destroy(*args):
@@ -264,6 +298,7 @@ def register_handlers(root, tree_manager, controls):
         'delete_latest': lambda: handle_delete_latest(root, tree_manager, controls),
         'show_highest_value': lambda: handle_show_highest_value(root, tree_manager, controls),
         'debug': lambda: handle_debugging_toggle(),
-        'cycle_bp_enchantment': lambda: handle_cycle_bp_enchantment(root)
+        'cycle_bp_enchantment': lambda: handle_cycle_bp_enchantment(root),
+        'watch_mode': lambda: handle_watch_toggle(root, tree_manager, controls)
     }
 
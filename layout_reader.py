@@ -0,0 +1,242 @@
+import os
+import re
+
+import cv2
+import numpy as np
+
+import config as c
+import ocr_utils as utils
+from logger import log_message
+
+LAYOUT_TEMPLATE_DIR = os.path.join(c.base_path, "layout_templates")
+LAYOUT_TEMPLATE_THRESHOLD = 0.9  # normalised correlation a template needs to be trusted
+LEVEL_PATTERN = re.compile(r"Monster Level[: ]+(\d+)", re.IGNORECASE)
+LEVEL_LABEL = "Monster Level"
+LEVEL_MAX_DIGITS = 3
+
+
+#############################################################################
+# Reads the blueprint layout and monster level from the top right corner.  #
+# Both are fixed strings in a fixed font, so after one successful OCR at a  #
+# resolution their glyphs are kept as templates (one PNG per layout name,   #
+# the "Monster Level" label and every digit seen so far) and later reads    #
+# are plain template matches on the binarised crop, no Tesseract call.      #
+# Anything below LAYOUT_TEMPLATE_THRESHOLD, or a layout / digit without a   #
+# template yet, goes through OCR like before, which also learns from it.   #
+#############################################################################
+class LayoutReader:
+    def __init__(self, folder=LAYOUT_TEMPLATE_DIR, threshold=LAYOUT_TEMPLATE_THRESHOLD):
+        self.folder = folder
+        self.threshold = threshold
+        self._resolution = None
+        self._layouts = {}
+        self._label = None
+        self._digits = {}
+
+    # image is the RGB crop of the corner, returns (layout or None, level or None, "template" | "ocr")
+    def read(self, image, resolution, engine):
+        mask = binarize(image)
+        self._load(resolution)
+
+        found = self.match(mask)
+        if found:
+            return found[0], found[1], "template"
+
+        words = engine.image_to_data(image, psm=6)
+        text = utils.smart_title_case(words_to_text(words))
+        if c.DEBUGGING:
+            print("OCR Text:\n", text)
+
+        layout = next((k for k in c.layout_keywords if utils.smart_title_case(k) in text), None)
+        match = LEVEL_PATTERN.search(text)
+        level = match.group(1) if match else None
+        if layout and level:
+            self.learn(mask, words, layout, level, resolution)
+        return layout, level, "ocr"
+
+    def match(self, mask):
+        best_layout, best_score = None, self.threshold
+        for layout, template in self._layouts.items():
+            score = _best_match(mask, template)[0]
+            if score >= best_score:
+                best_layout, best_score = layout, score
+        if best_layout is None or self._label is None:
+            return None
+
+        score, (x, y) = _best_match(mask, self._label)
+        if score < self.threshold:
+            return None
+        height, width = self._label.shape
+        level = self._match_digits(mask[y:y + height, x + width:])
+        if level is None:
+            return None
+        return best_layout, level
+
+    def learn(self, mask, words, layout, level, resolution):
+        folder = self._resolution_folder(resolution)
+        learned = []
+
+        box = _find_phrase(words, layout)
+        if box is not None and layout not in self._layouts:
+            self._layouts[layout] = self._save(folder, f"layout_{_slug(layout)}.png", _crop(mask, box))
+            learned.append(layout)
+
+        label = _find_phrase(words, LEVEL_LABEL)
+        if label is not None and self._label is None:
+            self._label = self._save(folder, "label.png", _crop(mask, label))
+            learned.append(LEVEL_LABEL)
+
+        value = next((box for text, box, _ in _line_words(words) if text.strip(":") == level), None)
+        if value is not None:
+            glyphs = _split_glyphs(_crop(mask, value))
+            if len(glyphs) == len(level):
+                for digit, glyph in zip(level, glyphs):
+                    if digit not in self._digits:
+                        self._digits[digit] = self._save(folder, f"digit_{digit}.png", glyph)
+                        learned.append(digit)
+
+        if learned:
+            log_message(f"[Layout] Learned templates for {resolution[0]}x{resolution[1]}: {', '.join(learned)}")
+
+    def _match_digits(self, strip):
+        glyphs = _split_glyphs(strip)
+        if not glyphs or len(glyphs) > LEVEL_MAX_DIGITS or not self._digits:
+            return None
+
+        digits = []
+        for glyph in glyphs:
+            score, digit = max((_glyph_score(glyph, template), digit) for digit, template in self._digits.items())
+            if score < self.threshold:
+                return None
+            digits.append(digit)
+        return "".join(digits)
+
+    def _resolution_folder(self, resolution):
+        return os.path.join(self.folder, f"{resolution[0]}x{resolution[1]}")
+
+    def _load(self, resolution):
+        resolution = tuple(resolution)
+        if resolution == self._resolution:
+            return
+        self._resolution = resolution
+        self._layouts, self._label, self._digits = {}, None, {}
+
+        folder = self._resolution_folder(resolution)
+        if not os.path.isdir(folder):
+            return
+        slugs = {_slug(layout): layout for layout in c.layout_keywords}
+        for name in os.listdir(folder):
+            stem, ext = os.path.splitext(name)
+            if ext != ".png":
+                continue
+            template = cv2.imread(os.path.join(folder, name), cv2.IMREAD_GRAYSCALE)
+            if template is None:
+                continue
+            if stem == "label":
+                self._label = template
+            elif stem.startswith("digit_"):
+                self._digits[stem[len("digit_"):]] = template
+            elif stem.startswith("layout_") and stem[len("layout_"):] in slugs:
+                self._layouts[slugs[stem[len("layout_"):]]] = template
+
+    @staticmethod
+    def _save(folder, name, template):
+        os.makedirs(folder, exist_ok=True)
+        cv2.imwrite(os.path.join(folder, name), template)
+        return template
+
+
+def binarize(image):
+    gray = np.asarray(image)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return mask
+
+
+def words_to_text(words):
+    lines = {}
+    for text, _, line, _ in words:
+        lines.setdefault(line, []).append(text)
+    return "\n".join(" ".join(lines[line]) for line in sorted(lines))
+
+
+def _line_words(words):
+    return [(text, box, line) for text, box, line, _ in words]
+
+
+####################################################################
+# Union box of the consecutive words of one line that read phrase  #
+####################################################################
+def _find_phrase(words, phrase):
+    target = utils.smart_title_case(phrase).split()
+    entries = _line_words(words)
+    for i in range(len(entries) - len(target) + 1):
+        run = entries[i:i + len(target)]
+        if len({line for _, _, line in run}) != 1:
+            continue
+        if [utils.smart_title_case(text).strip(":") for text, _, _ in run] == target:
+            boxes = [box for _, box, _ in run]
+            return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                    max(b[2] for b in boxes), max(b[3] for b in boxes))
+    return None
+
+
+def _crop(mask, box):
+    left, top, right, bottom = box
+    return mask[max(0, top):bottom, max(0, left):right].copy()
+
+
+####################################################################
+# Columns of ink left to right, each trimmed to its rows of ink.   #
+# Stops at the first gap wider than the text height (end of word)  #
+####################################################################
+def _split_glyphs(strip):
+    if strip.size == 0:
+        return []
+    columns = np.count_nonzero(strip, axis=0)
+    height = strip.shape[0]
+
+    glyphs = []
+    start = None
+    gap = 0
+    for x, ink in enumerate(np.append(columns, 0)):
+        if ink:
+            if start is None:
+                if glyphs and gap > height:
+                    break
+                start = x
+            gap = 0
+        else:
+            if start is not None:
+                glyph = strip[:, start:x]
+                rows = np.flatnonzero(np.count_nonzero(glyph, axis=1))
+                glyphs.append(glyph[rows[0]:rows[-1] + 1])
+                start = None
+            gap += 1
+    return glyphs
+
+
+def _best_match(mask, template):
+    if template.shape[0] > mask.shape[0] or template.shape[1] > mask.shape[1] or not template.any():
+        return 0.0, (0, 0)
+    result = cv2.matchTemplate(mask, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, location = cv2.minMaxLoc(result)
+    return float(np.nan_to_num(score)), location
+
+
+def _glyph_score(glyph, template):
+    height, width = template.shape
+    if abs(glyph.shape[0] - height) > 1 or abs(glyph.shape[1] - width) > 1:
+        return 0.0
+    resized = cv2.resize(glyph, (width, height), interpolation=cv2.INTER_NEAREST)
+    if resized.min() == resized.max() or template.min() == template.max():
+        return float(np.array_equal(resized, template))
+    return float(np.corrcoef(resized.ravel().astype(np.float32), template.ravel().astype(np.float32))[0, 1])
+
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+READER = LayoutReader()
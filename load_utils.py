@@ -6,6 +6,7 @@ import sys
 import urllib
 
 import config as c
+import ocr_vocabulary
 from ocr_utils import smart_title_case, format_currency_value
 from shared_lock import is_site_cache_valid, update_site_cache_lock
 
@@ -355,6 +356,8 @@ INTERNAL_BODY_ARMORS_TXT = get_resource_path(c.file_body_armors)
 TERMS_CACHE_FILE = get_data_path(c.terms_cache_file_name)
 EXPERIMENTAL_ITEMS_CACHE_FILE = get_data_path(c.experimental_items_cache_file_name)
 ENCHANTMENTS_TRADE_CACHE_FILE = get_data_path(c.enchantments_trade_cache_file_name)
+USER_WORDS_FILE = get_data_path(c.user_words_file_name)
+USER_PATTERNS_FILE = get_data_path(c.user_patterns_file_name)
 
 
 def get_datasets(load_external=True, force_reload=False):
@@ -379,4 +382,5 @@ def get_datasets(load_external=True, force_reload=False):
             if os.path.exists(OUTPUT_LEAGUES_CSV):
                 df = pd.read_csv(OUTPUT_LEAGUES_CSV)
                 _DATASETS["leagues"] = df.set_index("league_name").to_dict(orient="index")
+        ocr_vocabulary.write_vocabulary(_DATASETS, USER_WORDS_FILE, USER_PATTERNS_FILE)
     return _DATASETS
@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from logger import log_message
+
+PHASH_SIZE = 32
+PHASH_LOW_FREQ = 8
+PHASH_MAX_DISTANCE = 4  # bits out of 64
+MAX_MASK_PIXEL_DIFF = 16  # well under the pixels that change when a single digit differs
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+#############################################################################
+# 64 bit DCT perceptual hash of a filtered text mask. Small shifts in       #
+# anti-aliasing or a stray pixel keep the hash within a few bits.           #
+#############################################################################
+def perceptual_hash(mask) -> int:
+    if mask.ndim == 3:
+        mask = mask[:, :, 0]
+
+    small = cv2.resize(mask, (PHASH_SIZE, PHASH_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:PHASH_LOW_FREQ, :PHASH_LOW_FREQ].flatten()
+    bits = low > np.median(low[1:])
+
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+#############################################################################
+# Bounded LRU of OCR results for repeated presses of the capture hotkey on  #
+# the same tooltip. Entries are looked up by perceptual hash, then checked  #
+# pixel by pixel against the stored (bit packed) mask so a tooltip that     #
+# only differs in e.g. its stack size digits never reuses the old text.     #
+# Only the OCR output (text and Stack Size strips) is cached, term          #
+# matching is re-run on every capture because the duplicate flags depend    #
+# on what was captured in the meantime.                                     #
+#############################################################################
+class OCRCache:
+    def __init__(self, max_entries=0):
+        self.max_entries = max(0, int(max_entries or 0))
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resize(self, max_entries):
+        with self._lock:
+            self.max_entries = max(0, int(max_entries or 0))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, mask, variant=None):
+        if not self.max_entries:
+            return None
+
+        phash = perceptual_hash(mask)
+        packed = _pack(mask)
+        with self._lock:
+            for key, (shape, stored, text) in reversed(self._entries.items()):
+                if key[1] != variant or shape != mask.shape[:2]:
+                    continue
+                if bin(key[0] ^ phash).count("1") > PHASH_MAX_DISTANCE:
+                    continue
+                if int(_POPCOUNT[np.bitwise_xor(stored, packed)].sum(dtype=np.int64)) > MAX_MASK_PIXEL_DIFF:
+                    continue
+
+                self._entries.move_to_end(key)
+                self.hits += 1
+                log_message(f"[Cache] OCR cache hit ({self.hits} hits / {self.misses} misses)")
+                return text
+
+            self.misses += 1
+
+        log_message(f"[Cache] OCR cache miss ({self.hits} hits / {self.misses} misses)")
+        return None
+
+    def put(self, mask, text, variant=None):
+        if not self.max_entries:
+            return
+
+        key = (perceptual_hash(mask), variant)
+        with self._lock:
+            self._entries[key] = (mask.shape[:2], _pack(mask), text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _pack(mask):
+    if mask.ndim == 3:
+        mask = mask[:, :, 0]
+    return np.packbits(mask > 0)
+
+
+CAPTURE_CACHE = OCRCache()
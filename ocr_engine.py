@@ -0,0 +1,376 @@
+import os
+import shlex
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:  # optional, falls back to the pytesseract subprocess path
+    tesserocr = None
+
+RESCUE_SCALE = 2
+RESCUE_PAD = 4  # pixels kept around a re-read line so glyph edges are not cut
+
+
+# logger pulls in config (and its remote config fetch), which the OCR worker processes never need
+def log_message(message):
+    if _WORKER_ENGINE is not None:
+        print(message)
+        return
+    from logger import log_message as _log_message
+    _log_message(message)
+
+
+#############################################################################
+# Long-lived OCR engine. With tesserocr available the Tesseract C API is    #
+# initialised once per (lang, psm, variables) and reused across captures,   #
+# so the language model is not reloaded and no process or temp image is    #
+# created per call. Without it (or if the API fails) every call goes        #
+# through pytesseract exactly like before.                                  #
+#############################################################################
+class OCREngine:
+    def __init__(self, tessdata_path=None, vocabulary=None):
+        self.tessdata_path = tessdata_path
+        self.vocabulary = dict(vocabulary or {})
+        self._apis = {}
+        self._lock = threading.Lock()
+        self._api_failed = tesserocr is None
+
+    @property
+    def backend(self) -> str:
+        return "pytesseract" if self._api_failed else "tesserocr"
+
+    def configure(self, tessdata_path=None):
+        with self._lock:
+            self.tessdata_path = tessdata_path
+            self._api_failed = tesserocr is None
+            self._end_all()
+
+    # Variables added to every call, e.g. the user-words / user-patterns files of ocr_vocabulary
+    def set_vocabulary(self, variables=None):
+        with self._lock:
+            self.vocabulary = dict(variables or {})
+            self._end_all()
+
+    def warm_up(self, lang="eng", psm=6):
+        if self._api_failed:
+            return False
+        with self._lock:
+            return self._get_api(lang, psm, None) is not None
+
+    def image_to_string(self, image, psm=6, lang="eng", variables=None) -> str:
+        variables = self._with_vocabulary(variables)
+        if not self._api_failed:
+            with self._lock:
+                api = self._get_api(lang, psm, variables)
+                if api is not None:
+                    try:
+                        api.SetImage(_to_pil(image))
+                        return api.GetUTF8Text()
+                    except Exception as e:
+                        log_message(f"[OCR] tesserocr failed, falling back to pytesseract: {e}")
+                        self._api_failed = True
+                        self._end_all()
+
+        return pytesseract.image_to_string(
+            image,
+            config=_build_cli_config(psm, variables),
+            lang=lang
+        )
+
+    # Word level layout in reading order: [(text, (left, top, right, bottom), line, confidence)],
+    # words of one text line share the line number
+    def image_to_data(self, image, psm=6, lang="eng", variables=None) -> list:
+        variables = self._with_vocabulary(variables)
+        if not self._api_failed:
+            with self._lock:
+                api = self._get_api(lang, psm, variables)
+                if api is not None:
+                    try:
+                        api.SetImage(_to_pil(image))
+                        api.Recognize()
+                        return _words_from_iterator(api.GetIterator())
+                    except Exception as e:
+                        log_message(f"[OCR] tesserocr failed, falling back to pytesseract: {e}")
+                        self._api_failed = True
+                        self._end_all()
+
+        data = pytesseract.image_to_data(
+            image,
+            config=_build_cli_config(psm, variables),
+            lang=lang,
+            output_type=pytesseract.Output.DICT
+        )
+        words = []
+        lines = {}
+        for i, text in enumerate(data["text"]):
+            text = (text or "").strip()
+            if not text:
+                continue
+            line = lines.setdefault((data["block_num"][i], data["par_num"][i], data["line_num"][i]), len(lines))
+            left, top = int(data["left"][i]), int(data["top"][i])
+            box = (left, top, left + int(data["width"][i]), top + int(data["height"][i]))
+            words.append((text, box, line, float(data["conf"][i])))
+        return words
+
+    #########################################################################
+    # Text of the image where only the lines holding a word below           #
+    # min_confidence are read again, cut out and upscaled by scale, as a    #
+    # single line. The second read replaces the line when its mean word     #
+    # confidence is higher, easy lines keep the one fast pass.              #
+    #########################################################################
+    def image_to_string_rescued(self, image, psm=6, lang="eng", variables=None,
+                                min_confidence=60, scale=RESCUE_SCALE) -> str:
+        return self.image_to_string_and_data(image, psm=psm, lang=lang, variables=variables,
+                                             min_confidence=min_confidence, scale=scale)[0]
+
+    # image_to_string_rescued plus the word layout behind the text (image_to_data format), a rescued
+    # line's words are mapped back onto the image
+    def image_to_string_and_data(self, image, psm=6, lang="eng", variables=None,
+                                 min_confidence=60, scale=RESCUE_SCALE) -> tuple:
+        image = np.asarray(image)
+        lines = {}
+        for text, box, line, conf in self.image_to_data(image, psm=psm, lang=lang, variables=variables):
+            lines.setdefault(line, []).append((text, box, line, conf))
+
+        height, width = image.shape[:2]
+        texts = []
+        layout = []
+        for line in sorted(lines):
+            words = lines[line]
+            confidences = [word[3] for word in words if word[3] >= 0]
+            if confidences and min(confidences) < min_confidence:
+                left = max(0, min(word[1][0] for word in words) - RESCUE_PAD)
+                top = max(0, min(word[1][1] for word in words) - RESCUE_PAD)
+                right = min(width, max(word[1][2] for word in words) + RESCUE_PAD)
+                bottom = min(height, max(word[1][3] for word in words) + RESCUE_PAD)
+                crop = cv2.resize(image[top:bottom, left:right], ((right - left) * scale, (bottom - top) * scale),
+                                  interpolation=cv2.INTER_LANCZOS4)
+                rescued = self.image_to_data(crop, psm=7, lang=lang, variables=variables)
+                rescued_confidences = [word[3] for word in rescued if word[3] >= 0]
+                if rescued_confidences and _mean(rescued_confidences) > _mean(confidences):
+                    words = [(text, (left + box[0] // scale, top + box[1] // scale,
+                                     left + box[2] // scale, top + box[3] // scale), line, conf)
+                             for text, box, _, conf in rescued]
+            texts.append(" ".join(word[0] for word in words))
+            layout.extend(words)
+        return "\n".join(texts), layout
+
+    def close(self):
+        with self._lock:
+            self._end_all()
+
+    def _with_vocabulary(self, variables):
+        if not self.vocabulary:
+            return variables
+        return {**self.vocabulary, **(variables or {})}
+
+    def _get_api(self, lang, psm, variables):
+        key = (lang, psm, tuple(sorted((variables or {}).items())))
+        api = self._apis.get(key)
+        if api is not None:
+            return api
+
+        path = self.tessdata_path or os.environ.get("TESSDATA_PREFIX")
+        try:
+            kwargs = {"lang": lang, "psm": psm, "variables": dict(variables or {})}
+            if path:
+                kwargs["path"] = path.rstrip("\\/") + os.sep
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+        except Exception as e:
+            log_message(f"[OCR] Could not initialise tesserocr ({e}), using pytesseract")
+            self._api_failed = True
+            return None
+
+        self._apis[key] = api
+        return api
+
+    def _end_all(self):
+        for api in self._apis.values():
+            try:
+                api.End()
+            except Exception:
+                pass
+        self._apis.clear()
+
+
+def _mean(values):
+    return sum(values) / len(values)
+
+
+def _words_from_iterator(iterator) -> list:
+    words = []
+    if iterator is None:
+        return words
+
+    line = -1
+    for word in tesserocr.iterate_level(iterator, tesserocr.RIL.WORD):
+        if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+            line += 1
+        text = (word.GetUTF8Text(tesserocr.RIL.WORD) or "").strip()
+        box = word.BoundingBox(tesserocr.RIL.WORD)
+        if text and box:
+            words.append((text, tuple(box), max(line, 0), word.Confidence(tesserocr.RIL.WORD)))
+    return words
+
+
+def _to_pil(image):
+    if isinstance(image, Image.Image):
+        return image
+    return Image.fromarray(np.ascontiguousarray(image))
+
+
+_SKIPPED_CLI_VARIABLES = set()
+
+
+####################################################################
+# pytesseract shlex-splits the config, POSIX style everywhere but  #
+# on Windows, where quotes are kept in the argument. Values there  #
+# (the vocabulary paths under %APPDATA%) use their short 8.3 path  #
+# when they hold a space, and are left out if they still do        #
+####################################################################
+def _build_cli_config(psm, variables=None) -> str:
+    parts = [f"--psm {psm}"]
+    for key, value in (variables or {}).items():
+        argument = f"{key}={value}"
+        if sys.platform != "win32":
+            parts.append(f"-c {shlex.quote(argument)}")
+            continue
+
+        if any(ch.isspace() for ch in argument) and os.path.exists(str(value)):
+            argument = f"{key}={_short_path(value)}"
+        if any(ch.isspace() for ch in argument):
+            if key not in _SKIPPED_CLI_VARIABLES:
+                _SKIPPED_CLI_VARIABLES.add(key)
+                log_message(f"[OCR] {key} has a space in its path, pytesseract is run without it")
+            continue
+        parts.append(f"-c {argument}")
+    return " ".join(parts)
+
+
+def _short_path(path) -> str:
+    import ctypes
+
+    buffer = ctypes.create_unicode_buffer(32768)
+    if ctypes.windll.kernel32.GetShortPathNameW(str(path), buffer, len(buffer)):
+        return buffer.value
+    return str(path)
+
+
+#############################################################################
+# Pool-backed dispatcher for captures with several crops (multiple          #
+# tooltips, blueprint reward screens). Each worker process owns its own     #
+# OCREngine, so crops are read in parallel and the whole batch finishes in  #
+# the time of the slowest crop. Results are always returned in input order. #
+# Single crops, or a pool of 0 workers, run inline on the shared ENGINE.    #
+#############################################################################
+class OCRDispatcher:
+    def __init__(self, engine):
+        self.engine = engine
+        self.workers = 0
+        self._pool = None
+        self._start_args = None
+        self._lock = threading.Lock()
+
+    def start(self, workers, tessdata_path=None, tesseract_cmd=None, vocabulary=None):
+        self.shutdown()
+        workers = max(0, int(workers or 0))
+        if workers < 1:
+            return
+
+        tesseract_cmd = tesseract_cmd or pytesseract.pytesseract.tesseract_cmd
+        with self._lock:
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(tessdata_path, tesseract_cmd, vocabulary)
+            )
+            self.workers = workers
+            self._start_args = (workers, tessdata_path, tesseract_cmd)
+            pool = self._pool
+
+        # Submitting one task per worker spawns them all now instead of on the first capture
+        def warm():
+            try:
+                for future in [pool.submit(_warm_worker) for _ in range(workers)]:
+                    future.result()
+                log_message(f"[OCR] {workers} OCR worker process(es) ready")
+            except Exception as e:
+                log_message(f"[OCR] OCR worker pool failed to start: {e}")
+
+        threading.Thread(target=warm, daemon=True).start()
+
+    # With min_confidence, low confidence lines are re-read upscaled (OCREngine.image_to_string_rescued)
+    def image_to_string_many(self, images, psm=6, lang="eng", variables=None, min_confidence=None) -> list:
+        read = self.image_to_string_and_data_many(images, psm=psm, lang=lang, variables=variables,
+                                                  min_confidence=min_confidence)
+        return [text for text, _ in read]
+
+    # [(text, words)] in input order, words is None without min_confidence (only the rescue pass has them)
+    def image_to_string_and_data_many(self, images, psm=6, lang="eng", variables=None,
+                                      min_confidence=None) -> list:
+        with self._lock:
+            pool = self._pool
+
+        if pool is None or len(images) < 2:
+            return [_read(self.engine, img, psm, lang, variables, min_confidence) for img in images]
+
+        try:
+            futures = [pool.submit(_ocr_worker, img, psm, lang, variables, min_confidence) for img in images]
+            return [future.result() for future in futures]
+        except Exception as e:
+            log_message(f"[OCR] Worker pool failed ({e}), reading crops inline")
+            self.shutdown()
+            return [_read(self.engine, img, psm, lang, variables, min_confidence) for img in images]
+
+    # The workers load the vocabulary once in their initializer, a running pool is restarted with the new one
+    def set_vocabulary(self, variables=None):
+        with self._lock:
+            start_args = self._start_args if self._pool is not None else None
+        if start_args is not None:
+            self.start(*start_args, vocabulary=variables)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self.workers = 0
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_WORKER_ENGINE = None
+
+
+def _init_worker(tessdata_path, tesseract_cmd, vocabulary=None):
+    global _WORKER_ENGINE
+    # Tesseract's own OpenMP threads would fight the other workers for cores
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    _WORKER_ENGINE = OCREngine(tessdata_path, vocabulary)
+    _WORKER_ENGINE.warm_up()
+
+
+def _warm_worker():
+    return os.getpid()
+
+
+def _ocr_worker(image, psm, lang, variables, min_confidence=None):
+    return _read(_WORKER_ENGINE, image, psm, lang, variables, min_confidence)
+
+
+def _read(engine, image, psm, lang, variables, min_confidence):
+    if min_confidence:
+        return engine.image_to_string_and_data(image, psm=psm, lang=lang, variables=variables,
+                                               min_confidence=min_confidence)
+    return engine.image_to_string(image, psm=psm, lang=lang, variables=variables), None
+
+
+ENGINE = OCREngine()
+DISPATCHER = OCRDispatcher(ENGINE)
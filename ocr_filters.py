@@ -0,0 +1,300 @@
+import threading
+
+import cv2
+import numpy as np
+
+import config as c
+
+# Tooltip region detection, sizes are relative to the captured window
+TOOLTIP_MAX_REGIONS = 4
+TOOLTIP_MIN_WIDTH_RATIO = 0.08
+TOOLTIP_MIN_HEIGHT_RATIO = 0.03
+TOOLTIP_MAX_COVERAGE = 0.8  # above this, cropping saves nothing, OCR the full frame
+
+# OCR scale selection from the measured glyph height of the text mask
+# Pixels. The median glyph of the 1080p tooltip font (~13 px), which full captures have always
+# been read at 1x, so only smaller text is upscaled and 1440p / 4K text is brought down to it
+OCR_TARGET_GLYPH_HEIGHT = 14
+OCR_SCALE_MIN = 0.5
+OCR_SCALE_MAX = 3.0
+OCR_SCALE_STEP = 0.25
+OCR_SCALE_KEEP = (0.8, 1.25)  # no resize when the ideal factor is within this band
+OCR_SCALE_MIN_GLYPHS = 5
+OCR_SCALE_SAMPLE_PIXELS = 500_000  # larger masks are measured on sampled strips only
+OCR_SCALE_STRIP_ROWS = 64  # at least, otherwise 1/16 of the mask height
+OCR_SCALE_SAMPLE_GLYPHS = 30
+
+OCR_COLOR_RANGES = tuple(
+    (np.asarray(lo, dtype=np.uint8), np.asarray(hi, dtype=np.uint8))
+    for lo, hi in (
+        (c.replica_l_hsv, c.replica_u_hsv),
+        (c.rare_l_hsv, c.rare_u_hsv),
+        (c.currency_l_hsv, c.currency_u_hsv),
+        (c.scarab_l_hsv, c.scarab_u_hsv),
+        (c.enchant_l_hsv, c.enchant_u_hsv),
+    )
+)
+
+
+#############################################################################
+# Builds a 256 entry lookup table per HSV channel where bit N of an entry   #
+# is set when that channel value lies inside colour range N. A pixel is in  #
+# range N when bit N survives AND-ing its H, S and V entries, so one LUT    #
+# pass and two ANDs classify every pixel against all ranges at once.        #
+#############################################################################
+def build_color_lut(ranges):
+    if len(ranges) > 8:
+        raise ValueError("A uint8 colour LUT holds at most 8 ranges")
+
+    lut = np.zeros((256, 1, 3), dtype=np.uint8)
+    for bit, (lo, hi) in enumerate(ranges):
+        for channel in range(3):
+            lut[int(lo[channel]):int(hi[channel]) + 1, 0, channel] |= np.uint8(1 << bit)
+    return lut
+
+
+OCR_COLOR_LUT = build_color_lut(OCR_COLOR_RANGES)
+
+
+#############################################################
+# Saves the information on the screen based on colors       #
+# which is afterwards extracted as text                     #
+# Returns a single channel 0/255 mask.                      #
+#############################################################
+def filter_item_text(image_np, fullscreen=False):
+    hsv = cv2.cvtColor(image_np, cv2.COLOR_RGB2HSV)
+
+    range_bits = cv2.LUT(hsv, OCR_COLOR_LUT)
+    hue_bits, sat_bits, val_bits = cv2.split(range_bits)
+    cv2.bitwise_and(hue_bits, sat_bits, dst=hue_bits)
+    cv2.bitwise_and(hue_bits, val_bits, dst=hue_bits)
+    combined_mask = cv2.compare(hue_bits, 0, cv2.CMP_GT)
+
+    # Debugging overlay
+    if c.DEBUGGING:
+        img_bgr = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+        contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        debug_image = cv2.bitwise_and(img_bgr, img_bgr, mask=combined_mask)
+        cv2.drawContours(debug_image, contours, -1, (0, 0, 255), 1)
+        cv2.imwrite("ocr_debug_highlighted.png", debug_image)
+
+    return combined_mask
+
+
+#############################################################################
+# Finds candidate item tooltip boxes in a filtered text mask so only those  #
+# crops are sent to Tesseract instead of the whole game window.             #
+# Glyphs are first glued into text lines, anything that is not line shaped #
+# (terrain, UI art) is dropped, then nearby lines are glued into blocks.    #
+# Returns a list of (left, top, right, bottom) boxes, top to bottom.        #
+#############################################################################
+def find_tooltip_regions(mask, max_regions=TOOLTIP_MAX_REGIONS):
+    if mask.ndim == 3:
+        mask = mask[:, :, 0]
+
+    height, width = mask.shape[:2]
+
+    line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 160), 1))
+    lines = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, line_kernel)
+
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(lines, connectivity=8)
+    line_heights = stats[:, cv2.CC_STAT_HEIGHT]
+    line_widths = stats[:, cv2.CC_STAT_WIDTH]
+    min_line_height = max(4, height // 200)
+    max_line_height = max(min_line_height + 1, height // 25)
+
+    is_line = (line_heights >= min_line_height) & (line_heights <= max_line_height) & (line_widths >= 2 * line_heights)
+    is_line[0] = False  # background
+    if not is_line.any():
+        return []
+
+    line_mask = is_line[labels].astype(np.uint8) * 255
+
+    block_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 40), max(3, height // 40)))
+    blocks = cv2.dilate(line_mask, block_kernel)
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(blocks, connectivity=8)
+    min_width = width * TOOLTIP_MIN_WIDTH_RATIO
+    min_height = height * TOOLTIP_MIN_HEIGHT_RATIO
+
+    boxes = []
+    for i in range(1, count):
+        x, y, w, h, _ = stats[i]
+        if w >= min_width and h >= min_height:
+            boxes.append((int(x), int(y), int(x + w), int(y + h)))
+
+    boxes.sort(key=lambda b: (b[2] - b[0]) * (b[3] - b[1]), reverse=True)
+    boxes = boxes[:max_regions]
+    boxes.sort(key=lambda b: (b[1], b[0]))
+    return boxes
+
+
+#############################################################################
+# Median height of the glyph-sized connected components of a text mask, or #
+# None when there are too few to tell. Specks and anything taller than a    #
+# line of text (borders, art) are left out, so dots and accents barely     #
+# move the median.                                                          #
+#                                                                           #
+# The component statistics cost grows with the mask, so a full window is   #
+# not measured whole: it is cut into horizontal strips and only the ones   #
+# with the most ink are measured (cropped to their ink) until               #
+# OCR_SCALE_SAMPLE_GLYPHS glyphs are seen. Glyphs cut by a strip edge are  #
+# left out. Tooltip crops are small enough to be measured whole.           #
+#############################################################################
+def estimate_glyph_height(mask):
+    if mask.ndim == 3:
+        mask = mask[:, :, 0]
+
+    height, width = mask.shape[:2]
+    max_height = max(4, height // 4)
+    if height * width <= OCR_SCALE_SAMPLE_PIXELS:
+        glyphs = _glyph_heights(mask, max_height)
+    else:
+        strip_rows = max(OCR_SCALE_STRIP_ROWS, height // 16)
+        strips = height // strip_rows
+        rows = cv2.reduce(mask, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()[:strips * strip_rows]
+        ink = rows.reshape(strips, strip_rows).sum(axis=1)
+
+        parts = []
+        found = 0
+        for i in np.argsort(ink)[::-1]:
+            if not ink[i] or found >= OCR_SCALE_SAMPLE_GLYPHS:
+                break
+            strip = mask[i * strip_rows:(i + 1) * strip_rows]
+            x, _, w, _ = cv2.boundingRect(strip)
+            parts.append(_glyph_heights(strip[:, x:x + w], max_height, cut_edges=True))
+            found += len(parts[-1])
+        glyphs = np.concatenate(parts) if parts else np.empty(0)
+
+    if len(glyphs) < OCR_SCALE_MIN_GLYPHS:
+        return None
+    return float(np.median(glyphs))
+
+
+def _glyph_heights(mask, max_height, cut_edges=False):
+    count, _, stats, _ = cv2.connectedComponentsWithStats(np.ascontiguousarray(mask), connectivity=8)
+    tops = stats[1:, cv2.CC_STAT_TOP]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    keep = (heights >= 3) & (heights <= max_height) & (widths <= 4 * heights)
+    if cut_edges:
+        keep &= (tops > 0) & (tops + heights < mask.shape[0])
+    return heights[keep]
+
+
+#############################################################################
+# Resize factor that brings the median glyph height to                      #
+# OCR_TARGET_GLYPH_HEIGHT, in OCR_SCALE_STEP steps between OCR_SCALE_MIN   #
+# and OCR_SCALE_MAX. Text already close to the target keeps its size (1).  #
+#############################################################################
+def choose_ocr_scale(mask):
+    glyph_height = estimate_glyph_height(mask)
+    if not glyph_height:
+        return 1
+
+    ideal = OCR_TARGET_GLYPH_HEIGHT / glyph_height
+    if OCR_SCALE_KEEP[0] <= ideal <= OCR_SCALE_KEEP[1]:
+        return 1
+    scale = round(ideal / OCR_SCALE_STEP) * OCR_SCALE_STEP
+    return max(OCR_SCALE_MIN, min(OCR_SCALE_MAX, scale))
+
+
+def resize_for_ocr(mask, scale):
+    if scale == 1:
+        return mask
+    height, width = mask.shape[:2]
+    return cv2.resize(
+        mask,
+        (max(1, int(round(width * scale))), max(1, int(round(height * scale)))),
+        interpolation=cv2.INTER_LANCZOS4 if scale > 1 else cv2.INTER_AREA
+    )
+
+
+#############################################################################
+# Experimental Shine Removal & Readability improvements for                 #
+# HDR Curio Tracking                                                        #
+#                                                                           #
+# The V channel background is estimated on a 1/HDR_BLUR_DOWNSCALE image     #
+# and scaled back up, so the blur cost no longer grows with the kernel.    #
+# V is max(R, G, B) and darkening V by 10% darkens the grey value by 10%,   #
+# so the HSV round trips are skipped and everything stays in uint8.         #
+# The CLAHE object and the full size scratch buffers are kept between       #
+# calls and only reallocated when the capture size changes.                 #
+#############################################################################
+HDR_BLUR_DOWNSCALE = 4
+HDR_SHINE_THRESHOLD = 210
+HDR_SHINE_MIN_VALUE = 240
+HDR_SHINE_DARKEN_LUT = (np.arange(256, dtype=np.float32) * 0.90).astype(np.uint8)
+
+
+class ShineRemover:
+    def __init__(self, clip_limit=1.5, tile_grid_size=(8, 8)):
+        self._clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+        self._lock = threading.Lock()
+        self._shape = None
+        self._buffers = {}
+
+    def apply(self, image_np):
+        if image_np.shape[-1] == 4:
+            image_np = cv2.cvtColor(image_np, cv2.COLOR_RGBA2RGB)
+
+        height, width = image_np.shape[:2]
+        kernel = int(min(height, width) * 0.05)
+        kernel = max(31, min(kernel, 61))
+        if kernel % 2 == 0:
+            kernel += 1
+        # The sigma OpenCV derives for ksize=kernel, scaled to the small image
+        sigma = (0.3 * ((kernel - 1) * 0.5 - 1) + 0.8) / HDR_BLUR_DOWNSCALE
+
+        with self._lock:
+            buf = self._get_buffers(height, width)
+            red, green, blue = cv2.split(image_np)
+            val = cv2.max(red, green, dst=buf["val"])
+            cv2.max(val, blue, dst=val)
+
+            small = cv2.resize(val, (max(1, width // HDR_BLUR_DOWNSCALE), max(1, height // HDR_BLUR_DOWNSCALE)),
+                               interpolation=cv2.INTER_AREA)
+            small = cv2.GaussianBlur(small, (0, 0), sigma)
+            bg = cv2.resize(small, (width, height), dst=buf["bg"], interpolation=cv2.INTER_LINEAR)
+
+            shine = cv2.subtract(val, bg, dst=buf["shine"])
+            mask = cv2.compare(shine, HDR_SHINE_THRESHOLD, cv2.CMP_GT, dst=buf["mask"])
+            bright = cv2.compare(val, HDR_SHINE_MIN_VALUE, cv2.CMP_GT, dst=buf["bright"])
+            cv2.bitwise_and(mask, bright, dst=mask)
+
+            gray = cv2.cvtColor(image_np, cv2.COLOR_RGB2GRAY, dst=buf["gray"])
+            darkened = cv2.LUT(gray, HDR_SHINE_DARKEN_LUT, dst=buf["darkened"])
+            cv2.copyTo(darkened, mask, gray)
+
+            gray = self._clahe.apply(gray)
+
+            if c.DEBUGGING:
+                cv2.imwrite("shine_mask.png", mask)
+                print(
+                    "VAL:",
+                    val.min(),
+                    val.max(),
+                    "SHINE:",
+                    shine.min(),
+                    shine.max(),
+                    "PERCENTILES:",
+                    np.percentile(shine, [90, 95, 99, 99.9])
+                )
+
+        return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+
+    def _get_buffers(self, height, width):
+        if self._shape != (height, width):
+            self._buffers = {
+                name: np.empty((height, width), dtype=np.uint8)
+                for name in ("val", "bg", "shine", "mask", "bright", "gray", "darkened")
+            }
+            self._shape = (height, width)
+        return self._buffers
+
+
+SHINE_REMOVER = ShineRemover()
+
+
+def hdr_remove_shine(image_np):
+    return SHINE_REMOVER.apply(image_np)
@@ -1,17 +1,20 @@
 import math
 import re
 from datetime import datetime
-from difflib import get_close_matches, SequenceMatcher
+from difflib import get_close_matches
 from types import SimpleNamespace
 
-import win32clipboard
 from PIL import ImageGrab
 
 import config as c
+from fuzzy_index import FuzzyPhraseIndex
+from text_normalize import smart_title_case, normalize_name_for_lookup, canonicalize, normalize_for_search, \
+    remove_possessive_s
 
 
 def grab_new_clipboard_image(timeout=30):
     import time
+    import win32clipboard  # Windows only, imported here so the OCR helpers load headless
     start = time.time()
 
     # Get current clipboard image (or None)
@@ -44,59 +47,71 @@ def grab_new_clipboard_image(timeout=30):
     return img
 
 
-####################################################################
-# Fixes title case issues like checking for items with apostrophes #
-####################################################################
-def smart_title_case(text):
-    text = str(text)
-    text = text.replace("’", "'").replace("‘", "'").replace("`", "'")
-    text = re.sub(r"(')S\b", r"\1s", text)
-
-    def fix_word(word):
-        if word.lower().endswith("'s") and len(word) > 2:
-            base = word[:-2]
-            suffix = word[-2:]
-            # Capitalize first letter of base, lowercase rest, suffix lowercase
-            return base[:1].upper() + base[1:].lower() + suffix.lower()
-        else:
-            return word[:1].upper() + word[1:].lower()
-
-    # Apply smart title casing to each word
-    return re.sub(r"\b\w+'?s?\b", lambda m: fix_word(m.group(0)), text)
-
-def normalize_name_for_lookup(name: str) -> str:
-    if not name:
-        return name
-
-    normalized = name
-    normalized = normalized.replace(" Of The ", " of the ")
-    normalized = normalized.replace(" Of ", " of ")
-    normalized = normalized.replace("-Attuned", "-attuned")
-    normalized = normalized.replace("Three-Step", "Three-step")
-
-    return normalized
-
-def canonicalize(text: str) -> str:
-    if not text:
-        return ""
-
-    text = str(text)
-    text = text.replace("’", "'").replace("‘", "'").replace("`", "'")
-    text = remove_possessive_s(text)
-    text = re.sub(r"[^\w\s%';]", " ", text)
-    text = re.sub(r"\s+", " ", text)
-
-    return text.strip().lower()
-
-def normalize_for_search(s: str) -> str:
-    s = s.replace("—", " ").replace("“", " ").replace("”", " ")
-    s = re.sub(r"[^\w\s%';]", " ", s)  # keep %, ', ; for precise matching
-    s = re.sub(r"\s+", " ", s)
-    return s.strip().lower()
-
-
-def remove_possessive_s(text: str) -> str:
-    return re.sub(r"\b(\w+)(?:'s|’s)\b", r"\1", text)
+TOKEN_PATTERN = re.compile(r"\b[\w%']+\b")
+
+
+#############################################################################
+# Text views of one OCR result, each built on first use and then shared by  #
+# every matching helper of the capture, so the text is normalized once per  #
+# form instead of once per helper (and per ambiguous enchant).              #
+#   lines / title_lines  raw and title-cased OCR lines                      #
+#   term_lines           normalized lines with possessives stripped, what   #
+#                        the term automaton runs on                         #
+#   normalized_text      whole text normalized with possessives kept, what  #
+#                        body armour and enchant positions are measured in  #
+#   tokens               (token, offset) pairs of normalized_text           #
+#############################################################################
+class CaptureContext:
+    def __init__(self, text):
+        self.text = text or ""
+        self._lines = None
+        self._title_lines = None
+        self._term_lines = None
+        self._normalized_text = None
+        self._tokens = None
+        self._body_armor_pos = {}
+
+    @classmethod
+    def of(cls, text):
+        return text if isinstance(text, cls) else cls(text)
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = tuple(self.text.splitlines())
+        return self._lines
+
+    @property
+    def title_lines(self):
+        if self._title_lines is None:
+            self._title_lines = tuple(line.title() for line in self.lines)
+        return self._title_lines
+
+    @property
+    def term_lines(self):
+        if self._term_lines is None:
+            self._term_lines = tuple(normalize_for_search(remove_possessive_s(line)) for line in self.lines)
+        return self._term_lines
+
+    @property
+    def normalized_text(self):
+        if self._normalized_text is None:
+            # normalize_for_search works per character and collapses all whitespace, so
+            # joining the normalized lines gives the same string as normalizing the text
+            self._normalized_text = " ".join(filter(None, (normalize_for_search(line) for line in self.lines)))
+        return self._normalized_text
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            self._tokens = tuple((tok.group(0), tok.start()) for tok in TOKEN_PATTERN.finditer(self.normalized_text))
+        return self._tokens
+
+    def body_armor_pos(self, body_armors):
+        key = id(body_armors)
+        if key not in self._body_armor_pos:
+            self._body_armor_pos[key] = find_first_body_armor_pos(self, body_armors)
+        return self._body_armor_pos[key]
 
 
 #####################################
@@ -122,19 +137,20 @@ def build_body_armor_regex(body_armors):
         normalized.sort(key=len, reverse=True)
         regex = re.compile(r"\b(" + "|".join(normalized) + r")\b", re.IGNORECASE)
 
-    _cached_body_armor_data[key] = {"regex": regex, "norm_parts": norm_parts, "original": body_armors}
+    fuzzy_index = FuzzyPhraseIndex(zip(norm_parts, body_armors), single_threshold=0.8, multi_threshold=0.7)
+
+    _cached_body_armor_data[key] = {"regex": regex, "fuzzy_index": fuzzy_index, "original": body_armors}
     return regex
 
 def find_first_body_armor_pos(text, body_armors):
-    norm_text = normalize_for_search(text)
+    context = CaptureContext.of(text)
+    norm_text = context.normalized_text
     # Load from cache
     key = tuple(body_armors)
     if key not in _cached_body_armor_data:
         build_body_armor_regex(body_armors)
     cache = _cached_body_armor_data[key]
     body_armor_regex = cache["regex"]
-    norm_parts_list = cache["norm_parts"]
-    original_list = cache["original"]
 
     if body_armor_regex:
         match = body_armor_regex.search(norm_text)
@@ -143,45 +159,18 @@ def find_first_body_armor_pos(text, body_armors):
                 print(f"[BodyArmor] Exact match '{match.group(1)}' at {match.start()}")
             return match.start()
 
-    tokens = [(tok.group(0), tok.start()) for tok in re.finditer(r"\b[\w%']+\b", norm_text)]
-    token_words = [tok.lower() for tok, _ in tokens]
-
-    earliest = None
+    # No exact hit, look the OCR tokens up in the prebuilt fuzzy index (earliest match wins)
+    tokens = context.tokens
+    found = cache["fuzzy_index"].first_match([tok.lower() for tok, _ in tokens])
+    if found is None:
+        return None
 
-    for parts, original in zip(norm_parts_list, original_list):
-        if not parts:
-            continue
-        # single-word
-        if len(parts) == 1:
-            part = parts[0]
-            for tok, pos in tokens:
-                ratio = SequenceMatcher(None, part, tok.lower()).ratio()
-                if ratio >= 0.8:
-                    if earliest is None or pos < earliest:
-                        earliest = pos
-                        if c.DEBUGGING:
-                            print(f"[BodyArmor] Fuzzy single-word '{original}' ≈ '{tok}' at {pos}")
-                    break
-        else:
-            # multi-word sliding window
-            num_parts = len(parts)
-            for i in range(len(tokens) - num_parts + 1):
-                match_seq = True
-                for offset, part in enumerate(parts):
-                    tok = tokens[i + offset][0].lower()
-                    ratio = SequenceMatcher(None, part, tok).ratio()
-                    if ratio < 0.7:
-                        match_seq = False
-                        break
-                if match_seq:
-                    pos = tokens[i][1]
-                    if earliest is None or pos < earliest:
-                        earliest = pos
-                        if c.DEBUGGING:
-                            seq = " ".join(tokens[i + j][0] for j in range(num_parts))
-                            print(f"[BodyArmor] Fuzzy multi-word '{original}' ≈ '{seq}' at {pos}")
-                    break  # first match only
-    return earliest
+    index, original, length = found
+    pos = tokens[index][1]
+    if c.DEBUGGING:
+        seq = " ".join(tokens[index + j][0] for j in range(length))
+        print(f"[BodyArmor] Fuzzy {'single' if length == 1 else 'multi'}-word '{original}' ≈ '{seq}' at {pos}")
+    return pos
 
 
 def find_first_enchant_piece_pos(term_title, text):
@@ -189,7 +178,7 @@ def find_first_enchant_piece_pos(term_title, text):
     part1 = term_title.split(";", 1)[0].strip()
     # normalize both piece and text the same way
     norm_piece = normalize_for_search(smart_title_case(part1))
-    norm_text = normalize_for_search(text)
+    norm_text = CaptureContext.of(text).normalized_text
     # simple whole-word search
     pattern = rf"\b{re.escape(norm_piece)}\b"
     m = re.search(pattern, norm_text, re.IGNORECASE)
@@ -217,8 +206,9 @@ def is_armor_enchant_by_body_armor_order(term_title, text, body_armors, enchant_
         return False
 
     # If ambiguous (both types), fallback to proximity check
-    first_body = find_first_body_armor_pos(text, body_armors)
-    first_enchant = find_first_enchant_piece_pos(term_title, text)
+    context = CaptureContext.of(text)
+    first_body = context.body_armor_pos(body_armors)
+    first_enchant = find_first_enchant_piece_pos(term_title, context)
 
     if c.DEBUGGING:
         print(f"[OrderCheck] Ambiguous types for '{term_title}'. body_pos={first_body}, enchant_pos={first_enchant}")
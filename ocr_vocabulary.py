@@ -0,0 +1,80 @@
+import os
+import re
+
+#############################################################################
+# Tesseract user-words and user-patterns built from the closed vocabulary   #
+# the tracker matches against (terms, body armours, experimental items and  #
+# their implicits), so the recogniser's dictionary favours those spellings  #
+# over generic English. Words holding digits ("8%", "+25%") become patterns #
+# with \d in place of each digit, next to the stack ratio shapes.           #
+#############################################################################
+STACK_PATTERNS = (r"\d/\d\d", r"\d\d/\d\d")
+_EDGE_PUNCTUATION = re.compile(r"^[^\w%+\-']+|[^\w%']+$")
+_PATTERN_SPECIALS = re.compile(r"([\\*])")
+
+
+def vocabulary_words(datasets) -> list:
+    phrases = list(datasets.get("terms", {}))
+    phrases.extend(datasets.get("body_armors", []))
+    for item, implicits in datasets.get("experimental", {}).items():
+        phrases.append(item)
+        phrases.extend(implicits)
+
+    words = set()
+    for phrase in phrases:
+        for word in re.split(r"[\s;]+", str(phrase)):
+            word = _EDGE_PUNCTUATION.sub("", word)
+            if word:
+                words.add(word)
+    return sorted(words)
+
+
+def build_user_words(words) -> str:
+    lines = set()
+    for word in words:
+        if any(ch.isdigit() for ch in word):
+            continue
+        lines.add(word)
+        lines.add(word.lower())
+    return "".join(f"{line}\n" for line in sorted(lines))
+
+
+def build_user_patterns(words) -> str:
+    patterns = set(STACK_PATTERNS)
+    for word in words:
+        if any(ch.isdigit() for ch in word):
+            pattern = _PATTERN_SPECIALS.sub(r"\\\1", word)
+            patterns.add(re.sub(r"\d", r"\\d", pattern))
+    return "".join(f"{pattern}\n" for pattern in sorted(patterns))
+
+
+####################################################################
+# Writes both files, only touching the ones whose content changed. #
+# Returns True when anything was rewritten                          #
+####################################################################
+def write_vocabulary(datasets, words_path, patterns_path) -> bool:
+    words = vocabulary_words(datasets)
+    changed = False
+    for path, content in ((words_path, build_user_words(words)), (patterns_path, build_user_patterns(words))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                if f.read() == content:
+                    continue
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(content)
+        changed = True
+
+    if changed:
+        from logger import log_message  # logger imports load_utils, which imports this module
+
+        log_message(f"[OCR] Regenerated Tesseract vocabulary from {len(words)} words")
+    return changed
+
+
+def tesseract_variables(words_path, patterns_path) -> dict:
+    if not (os.path.exists(words_path) and os.path.exists(patterns_path)):
+        return {}
+    return {"user_words_file": words_path, "user_patterns_file": patterns_path}
@@ -5,6 +5,7 @@ import sys
 import pytesseract
 
 import config as c
+import ocr_engine
 from logger import log_message
 
 
@@ -60,6 +61,8 @@ def set_tesseract_path():
     else:
         log_message("[ERROR] tessdata directory not found at:", tessdata_dir)
 
+    ocr_engine.ENGINE.configure(tessdata_dir if os.path.isdir(tessdata_dir) else None)
+
     try:
         import subprocess
         version = subprocess.check_output([tesseract_bin, "--version"], text=True)
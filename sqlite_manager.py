@@ -0,0 +1,316 @@
+#############################################################################
+# SQLite storage backend. Rows live in one indexed table instead of a file  #
+# that is parsed and rewritten on every edit, so a pick toggle, an edit, a  #
+# delete or the next record number is a single indexed statement.           #
+# CSV and JSON stay available as import and export formats:                 #
+#                                                                           #
+#   python sqlite_manager.py import saved/matches.csv                       #
+#   python sqlite_manager.py export saved/matches_export.json               #
+#############################################################################
+import argparse
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from config import *
+from csv_manager import CSVManager
+from data_manager import BaseDataManager
+from json_manager import JSONManager
+from logger import log_message
+
+SQLITE_TABLE = "records"
+SQLITE_INDEXED_HEADERS = (csv_time_header, csv_league_header, csv_loggedby_header, csv_blueprint_header)
+SQLITE_DEFAULTS = {csv_picked_header: "False", csv_owned_header: "False", csv_enchantment_header: "None"}
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+class SQLiteManager(BaseDataManager):
+    def __init__(self, file_path=None):
+        base = Path(file_path or data_file_base)
+        self.base = base
+        self.file_path = base.with_suffix(".db")
+        self.last_record_number = 0
+        self._conn = None
+        self._columns = []
+        self._lock = threading.RLock()
+
+    #########################################################################
+    # One connection for the app's lifetime, shared between the GUI thread  #
+    # and the capture threads under a lock. A database that did not exist   #
+    # yet starts with the rows of the CSV or JSON file next to it.         #
+    #########################################################################
+    def _connection(self):
+        if self._conn is not None:
+            return self._conn
+
+        created = not self.file_path.exists()
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.file_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        headers = CSVManager(self.base).get_csv_headers()
+        columns = [f"{_quote(csv_record_header)} INTEGER NOT NULL UNIQUE"]
+        columns += [f"{_quote(h)} TEXT NOT NULL DEFAULT ''" for h in headers if h != csv_record_header]
+        with conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {SQLITE_TABLE} ({', '.join(columns)})")
+            for header in SQLITE_INDEXED_HEADERS:
+                name = "idx_" + "".join(ch if ch.isalnum() else "_" for ch in header.lower())
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {SQLITE_TABLE} ({_quote(header)})")
+
+        self._conn = conn
+        self._columns = [row[1] for row in conn.execute(f"PRAGMA table_info({SQLITE_TABLE})")]
+
+        if created:
+            for source in (self.base.with_suffix(".csv"), self.base.with_suffix(".json")):
+                if source.exists():
+                    self.import_file(source)
+                    break
+        return conn
+
+    def _ensure_columns(self, names):
+        missing = [name for name in names if name is not None and name not in self._columns]
+        for name in missing:
+            self._conn.execute(f"ALTER TABLE {SQLITE_TABLE} ADD COLUMN {_quote(name)} TEXT NOT NULL DEFAULT ''")
+            self._columns.append(name)
+        return bool(missing)
+
+    def _max_record(self):
+        value = self._connection().execute(
+            f"SELECT MAX({_quote(csv_record_header)}) FROM {SQLITE_TABLE}").fetchone()[0]
+        return int(value or 0)
+
+    def _record_exists(self, number):
+        return self._conn.execute(
+            f"SELECT 1 FROM {SQLITE_TABLE} WHERE {_quote(csv_record_header)} = ?", (number,)).fetchone() is not None
+
+    # Inserts rows in order, a missing or taken record number becomes the next free one
+    def _insert(self, rows):
+        conn = self._connection()
+        self._ensure_columns({key for row in rows for key in row})
+        next_number = self._max_record() + 1
+        last = 0
+        for row in rows:
+            record = str(row.get(csv_record_header, "")).strip()
+            if not record.isdigit() or self._record_exists(int(record)):
+                record = str(next_number)
+            number = int(record)
+            next_number = max(next_number, number + 1)
+            last = max(last, number)
+            row[csv_record_header] = record
+
+            names = [key for key in row if key is not None]
+            values = [number if key == csv_record_header else _text(row[key]) for key in names]
+            conn.execute(
+                f"INSERT INTO {SQLITE_TABLE} ({', '.join(_quote(k) for k in names)}) "
+                f"VALUES ({', '.join('?' * len(names))})",
+                values
+            )
+        return last
+
+    def _row_dict(self, cursor, row):
+        return {column[0]: _text(value) for column, value in zip(cursor.description, row)}
+
+    def load_dict(self):
+        with self._lock:
+            cursor = self._connection().execute(f"SELECT * FROM {SQLITE_TABLE} ORDER BY rowid")
+            return [self._row_dict(cursor, row) for row in cursor.fetchall()]
+
+    def tail(self, n):
+        if n <= 0:
+            return []
+        with self._lock:
+            cursor = self._connection().execute(f"SELECT * FROM {SQLITE_TABLE} ORDER BY rowid DESC LIMIT ?", (n,))
+            return [self._row_dict(cursor, row) for row in reversed(cursor.fetchall())]
+
+    def iter_reverse(self):
+        with self._lock:
+            cursor = self._connection().execute(f"SELECT * FROM {SQLITE_TABLE} ORDER BY rowid DESC")
+            rows = cursor.fetchall()
+        return (self._row_dict(cursor, row) for row in rows)
+
+    def get_record_count(self):
+        with self._lock:
+            return self._connection().execute(f"SELECT COUNT(*) FROM {SQLITE_TABLE}").fetchone()[0]
+
+    def save_dict(self, root, rows, fieldnames):
+        with self._lock:
+            conn = self._connection()
+            try:
+                with conn:
+                    self._ensure_columns(fieldnames)
+                    conn.execute(f"DELETE FROM {SQLITE_TABLE}")
+                    self._insert([dict(row) for row in rows])
+            except sqlite3.Error as e:
+                log_message(f"[ERROR] SQLite write failed: {e}")
+
+    def get_next_record_number(self, force=False):
+        from settings import set_setting
+
+        with self._lock:
+            self.last_record_number = self._max_record() + 1
+        set_setting("Application", "sqlite_current_row", self.last_record_number)
+        return self.last_record_number
+
+    def recalculate_record_number(self):
+        from settings import set_setting
+
+        with self._lock:
+            self.last_record_number = self._max_record()
+        set_setting("Application", "sqlite_current_row", self.last_record_number)
+        return self.last_record_number
+
+    def modify_record(self, root, record_number, item_name, updates=None, delete=False):
+        updates = updates or {}
+        if not str(record_number).isdigit():
+            log_message(f"[INFO] No matching record found for Record #{record_number}: '{item_name}'")
+            return
+
+        with self._lock:
+            conn = self._connection()
+            key = f"WHERE {_quote(csv_record_header)} = ?"
+            with conn:
+                if delete:
+                    changed = conn.execute(f"DELETE FROM {SQLITE_TABLE} {key}", (int(record_number),)).rowcount
+                else:
+                    fields = {}
+                    for field_name, new_value in updates.items():
+                        if field_name in self._columns and field_name != csv_record_header:
+                            fields[field_name] = _text(new_value)
+                        else:
+                            log_message(f"[ERROR] SQLite missing column '{field_name}'")
+                    changed = 0
+                    if fields:
+                        assignments = ", ".join(f"{_quote(name)} = ?" for name in fields)
+                        changed = conn.execute(f"UPDATE {SQLITE_TABLE} SET {assignments} {key}",
+                                               (*fields.values(), int(record_number))).rowcount
+                        if changed:
+                            for field_name, new_value in fields.items():
+                                log_message(f"[INFO] Record #{record_number}: '{item_name}' | {field_name} → {new_value}")
+
+        if changed:
+            action = "Deleted" if delete else "Updated"
+            log_message(f"[INFO] {action} Record #{record_number}: '{item_name}' in SQLite")
+        else:
+            action = "delete" if delete else "update"
+            log_message(f"[INFO] No matching record found to {action} for Record #{record_number}: '{item_name}'")
+
+    def append_rows(self, rows: list[dict], root=None):
+        if not rows:
+            return
+
+        from settings import set_setting
+
+        with self._lock:
+            try:
+                with self._connection():
+                    self.last_record_number = max(self.last_record_number, self._insert(rows))
+            except sqlite3.Error as e:
+                if root:
+                    import toasts
+                    toasts.show_message(root, "!!! Unable to write to the SQLite database !!!", duration=5000)
+                log_message(f"[ERROR] SQLite write failed: {e}")
+                return
+
+        set_setting("Application", "sqlite_current_row", self.last_record_number)
+
+    def upgrade_structure(self):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                changed = self._ensure_columns(CSVManager(self.base).get_csv_headers())
+                for header, default in SQLITE_DEFAULTS.items():
+                    changed |= conn.execute(
+                        f"UPDATE {SQLITE_TABLE} SET {_quote(header)} = ? WHERE {_quote(header)} = ''",
+                        (default,)
+                    ).rowcount > 0
+
+        if changed:
+            log_message(f"[INFO] SQLite structure upgraded → {self.file_path}")
+
+    def duplicate_latest(self, root):
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(f"SELECT * FROM {SQLITE_TABLE} ORDER BY rowid DESC LIMIT 1")
+            latest = cursor.fetchone()
+            if latest is None:
+                log_message("[ERROR] SQLite database has no entries to duplicate.")
+                return None
+
+            last_row = self._row_dict(cursor, latest)
+            record_number = self.get_next_record_number()
+            last_row[csv_record_header] = str(record_number)
+            if csv_time_header in last_row:
+                last_row[csv_time_header] = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+            with conn:
+                self._insert([last_row])
+
+        log_message(f"[INFO] Duplicated latest SQLite entry → Record {record_number}")
+        return last_row
+
+    def ensure_data_file(self):
+        with self._lock:
+            self._connection()
+
+    ####################################################################
+    # Adds the rows of a CSV or JSON data file to the database         #
+    ####################################################################
+    def import_file(self, path):
+        path = Path(path)
+        source = JSONManager(path) if path.suffix.lower() == ".json" else CSVManager(path)
+        rows = source.load_dict()
+        if not rows:
+            return 0
+
+        with self._lock:
+            with self._connection():
+                self._insert([{k: v for k, v in row.items() if k is not None} for row in rows])
+        log_message(f"[INFO] Imported {len(rows)} row(s) from {path} into {self.file_path}")
+        return len(rows)
+
+    def export_file(self, path):
+        path = Path(path)
+        rows = self.load_dict()
+        fieldnames = list(rows[0].keys()) if rows else CSVManager(self.base).get_csv_headers()
+        target = JSONManager(path) if path.suffix.lower() == ".json" else CSVManager(path)
+        target.save_dict(None, rows, fieldnames)
+        log_message(f"[INFO] Exported {len(rows)} row(s) from {self.file_path} to {target.file_path}")
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Curio Tracker SQLite data file")
+    parser.add_argument("--database", default=data_file_base, help="data file path without extension")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("import", help="add the rows of a CSV or JSON data file").add_argument("path")
+    sub.add_parser("export", help="write all rows to a CSV or JSON data file").add_argument("path")
+    args = parser.parse_args(argv)
+
+    manager = SQLiteManager(args.database)
+    if args.command == "import":
+        count = manager.import_file(args.path)
+    else:
+        count = manager.export_file(args.path)
+    manager.close()
+    print(f"{count} row(s) {args.command}ed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import re
+
+import cv2
+
+from term_matcher import OCR_DIGIT_TRANSLATION, VALID_STACK_MAX_VALUES, parse_stack_ratio
+
+#############################################################################
+# Second look at currency / scarab stack sizes the full tooltip OCR missed. #
+# The word layout of the tooltip OCR finds the "Stack Size:" label boxes,   #
+# then only the strip right of each label is read again, upscaled, as a     #
+# single text line and restricted to digits and "/", which is what psm 6    #
+# over the whole tooltip tends to garble ("19/20" read as "1920", "I9/2O"   #
+# or dropped entirely).                                                     #
+#############################################################################
+STACK_LABEL_PATTERN = re.compile(r"^s[il1|]ze:?$", re.IGNORECASE)
+STACK_WORD_PATTERN = re.compile(r"^st[a4]ck$", re.IGNORECASE)
+
+STACK_STRIP_PAD = 4  # pixels kept around the strip so glyph edges are not cut
+STACK_STRIP_SCALE = 2
+STACK_STRIP_VARIABLES = {"tessedit_char_whitelist": "0123456789/"}
+
+
+####################################################################
+# (left, top, right, bottom) of the value right of every "Stack    #
+# Size:" label, top to bottom. Without a word after the label the  #
+# strip runs to the right edge of the image. Words read from an    #
+# image resized by scale, or cut out at offset, are mapped back    #
+# onto the mask they came from                                     #
+####################################################################
+def find_stack_strips(words, width, scale=1, offset=(0, 0)) -> list:
+    lines = {}
+    for text, box, line, _ in words:
+        lines.setdefault(line, []).append((text, box))
+
+    strips = []
+    for line in sorted(lines):
+        line_words = lines[line]
+        for i in range(1, len(line_words)):
+            if not (STACK_LABEL_PATTERN.match(line_words[i][0]) and STACK_WORD_PATTERN.match(line_words[i - 1][0])):
+                continue
+            label = line_words[i][1]
+            value = [box for _, box in line_words[i + 1:]]
+            right = max(box[2] for box in value) if value else width
+            top = min([label[1]] + [box[1] for box in value])
+            bottom = max([label[3]] + [box[3] for box in value])
+            strips.append((label[2], top, right, bottom))
+            break
+
+    x, y = offset
+    return [(x + int(left / scale), y + int(top / scale), x + int(right / scale), y + int(bottom / scale))
+            for left, top, right, bottom in strips]
+
+
+def read_stack_strip(engine, mask, box):
+    height, width = mask.shape[:2]
+    left, top, right, bottom = box
+    left, top = max(0, left - STACK_STRIP_PAD), max(0, top - STACK_STRIP_PAD)
+    right, bottom = min(width, right + STACK_STRIP_PAD), min(height, bottom + STACK_STRIP_PAD)
+    if right <= left or bottom <= top:
+        return None
+
+    strip = mask[top:bottom, left:right]
+    strip = cv2.resize(
+        strip,
+        ((right - left) * STACK_STRIP_SCALE, (bottom - top) * STACK_STRIP_SCALE),
+        interpolation=cv2.INTER_LANCZOS4
+    )
+    text = engine.image_to_string(strip, psm=7, variables=STACK_STRIP_VARIABLES)
+    return parse_stack_digits(text)
+
+
+####################################################################
+# "19/20" like parse_stack_ratio, and a slash that was lost        #
+# ("1920") split in front of a valid stack maximum                 #
+####################################################################
+def parse_stack_digits(text):
+    text = (text or "").translate(OCR_DIGIT_TRANSLATION).strip()
+    ratio = parse_stack_ratio(text)
+    if ratio:
+        return ratio
+
+    digits = "".join(ch for ch in text if ch.isdigit())
+    head, tail = digits[:-2], digits[-2:]
+    if head and tail and int(tail) in VALID_STACK_MAX_VALUES and int(head) <= int(tail):
+        return int(head), int(tail)
+    return None
+
+
+####################################################################
+# Stack ratios read from the filtered mask, one per strip (or per  #
+# "Stack Size:" line top to bottom), None where the strip could    #
+# not be read. Without strips from the capture's own OCR pass the  #
+# mask gets a layout pass of its own                               #
+####################################################################
+def reread_stack_sizes(engine, mask, strips=None) -> list:
+    if strips is None:
+        strips = find_stack_strips(engine.image_to_data(mask, psm=6), mask.shape[1])
+    return [read_stack_strip(engine, mask, box) for box in strips]
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import deque
+
+from logger import log_message
+
+TIMING_WINDOW = 200  # samples kept per stage
+TIMING_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+#############################################################################
+# Lightweight timing spans for the capture pipeline. Each stage keeps a     #
+# rolling window of its last TIMING_WINDOW durations, reported as           #
+# percentiles and a bucketed histogram. The outermost span on a thread also #
+# logs a one line breakdown of the stages nested in it, so a slow capture  #
+# shows where its time went. While disabled span() hands out one shared    #
+# no-op object, so instrumented code pays a single attribute check.        #
+#############################################################################
+class StageTimings:
+    def __init__(self, window=TIMING_WINDOW):
+        self.enabled = False
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, stage):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            copies = {stage: sorted(samples) for stage, samples in self._samples.items()}
+
+        report = {}
+        for stage, ms in ((s, [v * 1000.0 for v in values]) for s, values in copies.items()):
+            if not ms:
+                continue
+            histogram = [0] * (len(TIMING_BUCKETS_MS) + 1)
+            for value in ms:
+                histogram[_bucket(value)] += 1
+            report[stage] = {
+                "n": len(ms),
+                "p50": _percentile(ms, 50),
+                "p90": _percentile(ms, 90),
+                "p99": _percentile(ms, 99),
+                "max": ms[-1],
+                "histogram": histogram,
+            }
+        return report
+
+    def format_report(self) -> str:
+        report = self.snapshot()
+        if not report:
+            return "Stage timings: no samples" + ("" if self.enabled else " (disabled)")
+
+        labels = [f"<{b}" for b in TIMING_BUCKETS_MS] + [f">={TIMING_BUCKETS_MS[-1]}"]
+        lines = [f"Stage timings (last {self.window} per stage, ms):"]
+        for stage, summary in report.items():
+            buckets = " ".join(f"{label}:{count}" for label, count in zip(labels, summary["histogram"]) if count)
+            lines.append(
+                f"  {stage:<16} n={summary['n']:<4} p50={summary['p50']:.1f} p90={summary['p90']:.1f} "
+                f"p99={summary['p99']:.1f} max={summary['max']:.1f} [{buckets}]"
+            )
+        return "\n".join(lines)
+
+    def dump(self):
+        for line in self.format_report().splitlines():
+            log_message(f"[Timing] {line}")
+
+
+class _Span:
+    __slots__ = ("_timings", "_stage", "_start", "_outer")
+
+    def __init__(self, timings, stage):
+        self._timings = timings
+        self._stage = stage
+
+    def __enter__(self):
+        local = self._timings._local
+        self._outer = getattr(local, "trace", None) is None
+        if self._outer:
+            local.trace = []
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        self._timings.record(self._stage, elapsed)
+
+        local = self._timings._local
+        if self._outer:
+            stages = " | ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in local.trace)
+            local.trace = None
+            log_message(f"[Timing] {self._stage} {elapsed * 1000:.0f}ms" + (f": {stages}" if stages else ""))
+        else:
+            local.trace.append((self._stage, elapsed))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _bucket(value_ms):
+    for i, bound in enumerate(TIMING_BUCKETS_MS):
+        if value_ms < bound:
+            return i
+    return len(TIMING_BUCKETS_MS)
+
+
+def _percentile(ordered, pct):
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+TIMINGS = StageTimings()
+span = TIMINGS.span
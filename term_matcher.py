@@ -0,0 +1,440 @@
+import re
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import config as c
+import ocr_utils as utils
+from fuzzy_index import SymSpellIndex
+
+VALID_STACK_MAX_VALUES = frozenset({20, 30, 40})
+
+OCR_DIGIT_TRANSLATION = str.maketrans({
+    "O": "0", "o": "0",
+    "I": "1", "l": "1", "!": "1", "i": "1",
+    "B": "8",
+    "S": "5", "s": "5",
+    "g": "9", "q": "9",
+    "\\": "/", "-": "/", "|": "/",
+})
+
+STACK_RATIO_PATTERN = re.compile(r"\b(\d{1,3})\s*[/|\\\-]\s*(\d{2})\b")
+
+# Fuzzy fallback for lines the exact pass found nothing on
+FUZZY_MIN_TERM_LENGTH = 6
+FUZZY_LONG_TERM_LENGTH = 12  # terms this long may be 2 edits off, shorter ones 1
+
+BATCH_CHUNK_SIZE = 64  # texts per pool task, large enough that pickling is not the bottleneck
+
+
+###########################################################################
+# Aho-Corasick automaton over the normalized terms, lets a capture find   #
+# every term occurrence in a single pass over the OCR text instead of     #
+# substring-scanning every line once per term.                            #
+###########################################################################
+class TermAutomaton:
+    def __init__(self, patterns=()):
+        self.patterns = []
+        self._pattern_ids = {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._built = False
+
+        for pattern in patterns:
+            self.add(pattern)
+        if patterns:
+            self.build()
+
+    def add(self, pattern: str) -> int:
+        if pattern in self._pattern_ids:
+            return self._pattern_ids[pattern]
+
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+
+        pattern_id = len(self.patterns)
+        self.patterns.append(pattern)
+        self._pattern_ids[pattern] = pattern_id
+        self._out[state] = self._out[state] + (pattern_id,)
+        self._built = False
+        return pattern_id
+
+    def pattern_id(self, pattern: str):
+        return self._pattern_ids.get(pattern)
+
+    def build(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque()
+
+        for nxt in goto[0].values():
+            fail[nxt] = 0
+            queue.append(nxt)
+
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                # Merge the outputs of the suffix state so matching never walks the fail chain
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._built = True
+
+    def iter_matches(self, text: str):
+        """Yields (start, end, pattern_id) for every occurrence, overlapping ones included."""
+        if not self._built:
+            self.build()
+
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for idx, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = idx + 1
+                for pattern_id in out[state]:
+                    yield end - len(patterns[pattern_id]), end, pattern_id
+
+    def find_in_lines(self, lines) -> dict:
+        """
+        Runs the automaton once over all lines (joined by a newline, which no
+        pattern contains) and returns {pattern_id: [(line, start, end), ...]}.
+        """
+        text = "\n".join(lines)
+        line_starts = []
+        offset = 0
+        for line in lines:
+            line_starts.append(offset)
+            offset += len(line) + 1
+
+        occurrences = {}
+        line_idx = 0
+        for start, end, pattern_id in self.iter_matches(text):
+            while line_idx + 1 < len(line_starts) and line_starts[line_idx + 1] <= start:
+                line_idx += 1
+            base = line_starts[line_idx]
+            occurrences.setdefault(pattern_id, []).append((line_idx, start - base, end - base))
+
+        return occurrences
+
+
+#############################################################################
+# Interval sweep over match spans. candidates are (rank, spans) with spans  #
+# as (line, start, end) tuples. Spans are visited by line and start, wider  #
+# spans (then lower rank) first, so anything inside an earlier span has an  #
+# end no further than the furthest end seen on its line. A candidate is     #
+# kept when at least one of its spans is not covered that way. Returns the #
+# indices of the kept candidates, O(k log k) in the number of spans.        #
+#############################################################################
+def resolve_overlaps(candidates) -> list:
+    events = sorted(
+        (span[0], span[1], -span[2], rank, idx)
+        for idx, (rank, spans) in enumerate(candidates)
+        for span in spans
+    )
+
+    kept = set()
+    line = None
+    furthest = -1
+    for span_line, _, neg_end, _, idx in events:
+        if span_line != line:
+            line = span_line
+            furthest = -1
+        if -neg_end > furthest:
+            furthest = -neg_end
+            kept.add(idx)
+
+    return sorted(kept)
+
+
+#############################################################################
+# The matcher core, built once from the terms dataset and free of side      #
+# effects: no storage, toasts, duplicate tracking or settings lookups, so   #
+# the same object serves live captures and batch re-matching of stored     #
+# OCR text (also in worker processes, it pickles as plain data).            #
+#############################################################################
+class TermMatcher:
+    def __init__(self, term_types, body_armors=()):
+        self.term_types = term_types
+        self.body_armors = list(body_armors)
+
+        self.terms = []  # (term, normalized term, enchant parts or None)
+        for term in sorted(term_types):
+            cleaned = utils.remove_possessive_s(term)
+            normalized_term = utils.normalize_for_search(cleaned)
+            term_type = term_types.get(term, "")
+            term_type_cmp = utils.smart_title_case(term_type) if isinstance(term_type, str) else ""
+            enchant_parts = None
+
+            if ";" in cleaned and term_type_cmp in (c.ARMOR_ENCHANT_TYPE, c.WEAPON_ENCHANT_TYPE):
+                enchant_parts = tuple(
+                    utils.normalize_for_search(utils.smart_title_case(part.strip()))
+                    for part in cleaned.split(";", 1)
+                )
+
+            self.terms.append((term, normalized_term, enchant_parts))
+
+        # One automaton over every normalized term (or enchant combo part). term_patterns[i]
+        # holds the pattern ids of terms[i], pattern_terms maps a pattern id back to its terms
+        self.automaton = TermAutomaton()
+        self.term_patterns = []
+        self.pattern_terms = defaultdict(list)
+        for term_idx, (_, normalized_term, enchant_parts) in enumerate(self.terms):
+            patterns = enchant_parts if enchant_parts is not None else (normalized_term,)
+            pattern_ids = tuple(self.automaton.add(pattern) for pattern in patterns if pattern)
+            self.term_patterns.append(pattern_ids)
+            for pattern_id in set(pattern_ids):
+                self.pattern_terms[pattern_id].append(term_idx)
+        self.automaton.build()
+
+        # Deletion index for the fuzzy tier. Enchant combos and anything with a digit are
+        # left out, a misread number must never turn one enchant or stack into another.
+        self.fuzzy_index = SymSpellIndex(max_distance=2)
+        for term, normalized_term, enchant_parts in self.terms:
+            if enchant_parts is not None or len(normalized_term) < FUZZY_MIN_TERM_LENGTH:
+                continue
+            if any(ch.isdigit() for ch in normalized_term):
+                continue
+            self.fuzzy_index.add(normalized_term, term,
+                                 max_distance=2 if len(normalized_term) >= FUZZY_LONG_TERM_LENGTH else 1)
+
+        self.enchant_type_lookup = defaultdict(set)
+        for term, type_name in term_types.items():
+            self.enchant_type_lookup[utils.normalize_for_search(utils.smart_title_case(term))].add(type_name)
+        # enchant_type_lookup key of each term's first (or only) part
+        self.enchant_type_keys = {
+            term: utils.normalize_for_search(utils.smart_title_case(term.split(";", 1)[0].strip()))
+            for term in term_types
+        }
+
+    ###########################################################################
+    # Every term occurring in the normalized lines, found with a single pass  #
+    # of the automaton. Returns [(term, spans)] in term order, where spans    #
+    # are (line, start, end) tuples of the term (or its combo parts).         #
+    ###########################################################################
+    def find_term_spans(self, normalized_lines):
+        occurrences = self.automaton.find_in_lines(normalized_lines)
+
+        hit_terms = set()
+        for pattern_id in occurrences:
+            hit_terms.update(self.pattern_terms[pattern_id])
+
+        results = []
+        for term_idx in sorted(hit_terms):
+            term, _, enchant_parts = self.terms[term_idx]
+            pattern_ids = self.term_patterns[term_idx]
+
+            if enchant_parts is None:
+                spans = occurrences[pattern_ids[0]]
+            else:
+                spans = find_enchant_combo_spans(pattern_ids, occurrences)
+                if c.DEBUGGING and spans:
+                    part1, part2 = enchant_parts
+                    print(f"[EnchantCombo] Found combo '{part1}' & '{part2}' at lines {spans[0][0]} and {spans[1][0]}")
+
+            if spans:
+                results.append((term, spans))
+
+        return results
+
+    ###########################################################################
+    # Fuzzy tier, only for lines the exact pass found nothing on. A line is   #
+    # accepted when it is within the edit budget of exactly one term, the     #
+    # confidence is 1 - distance / term length.                               #
+    # Returns [(term, spans, confidence)].                                    #
+    ###########################################################################
+    def find_fuzzy_term_spans(self, normalized_lines, matched_lines):
+        results = []
+        for line_idx, line in enumerate(normalized_lines):
+            if line_idx in matched_lines or len(line) < FUZZY_MIN_TERM_LENGTH - 1:
+                continue
+
+            found = self.fuzzy_index.lookup(line)
+            if not found:
+                continue
+
+            distance, word, term = found[0]
+            if len(found) > 1 and found[1][0] == distance:
+                if c.DEBUGGING:
+                    print(f"[Fuzzy] Ambiguous line '{line}': {[entry[2] for entry in found[:3]]}")
+                continue
+
+            results.append((term, [(line_idx, 0, len(line))], 1.0 - distance / float(len(word))))
+
+        return results
+
+    ###########################################################################
+    # Matches one OCR text (or CaptureContext). Returns a dict per kept       #
+    # occurrence, in text order: term, type, enchant flags, stack size,       #
+    # confidence and the line it was found on.                                #
+    ###########################################################################
+    def match(self, text, fuzzy=True) -> list:
+        context = utils.CaptureContext.of(text)
+        normalized_lines = context.term_lines
+
+        candidates = []
+        for term, spans in self.find_term_spans(normalized_lines):
+            if ";" in term and len(spans) > 1:
+                candidates.append((term, spans, 1.0))  # enchant combo, one match over both lines
+            else:
+                candidates.extend((term, [span], 1.0) for span in spans)
+
+        if fuzzy:
+            matched_lines = {span[0] for _, spans, _ in candidates for span in spans}
+            candidates.extend(self.find_fuzzy_term_spans(normalized_lines, matched_lines))
+
+        ###########################################################################
+        # One candidate per occurrence, so a term that really appears twice (two  #
+        # currency stacks) is kept twice. Overlaps resolve on the spans: a match  #
+        # lying inside a wider one is dropped, e.g. the parts of an enchant combo #
+        # "8% Increased Explicit Ailment Modifier Magnitudes; Has 1 White Socket" #
+        # inside the combo itself. On equal spans the longer term wins, then the  #
+        # first by name, so the result never depends on set iteration order.     #
+        ###########################################################################
+        kept = resolve_overlaps([((-len(term), term), spans) for term, spans, _ in candidates])
+
+        matches = []
+        for term, spans, confidence in sorted((candidates[idx] for idx in kept), key=lambda cand: cand[1][0]):
+            armor_flag, weapon_flag = self.enchant_flags(term, context)
+            line_idx = spans[0][0]
+            item_type = self.term_types.get(term)
+            is_stack = item_type in (c.CURRENCY_TYPE, c.SCARAB_TYPE)
+            ratio = read_stack_ratio(context.lines, line_idx) if is_stack else None
+            matches.append({
+                "term": term,
+                "type": item_type,
+                "armor_enchant_flag": armor_flag,
+                "weapon_enchant_flag": weapon_flag,
+                "stack_size": ratio[0] if ratio else 1,
+                # False when a stack's ratio was not in the text and 1 is only the fallback
+                "stack_size_read": ratio is not None or not is_stack,
+                "confidence": confidence,
+                "line": line_idx,
+            })
+        return matches
+
+    def enchant_flags(self, term, context):
+        item_type = self.term_types.get(term)
+        if item_type not in (c.ARMOR_ENCHANT_TYPE, c.WEAPON_ENCHANT_TYPE):
+            return False, False  # flags only apply to enchant types
+
+        possible_types = self.enchant_type_lookup.get(self.enchant_type_keys.get(term, ""), [])
+        if not possible_types:
+            return False, False
+        if all(t == c.ARMOR_ENCHANT_TYPE for t in possible_types):
+            return True, False
+        if all(t == c.WEAPON_ENCHANT_TYPE for t in possible_types):
+            return False, True
+
+        # Term exists in both armor and weapon types, use proximity logic to disambiguate
+        if utils.is_armor_enchant_by_body_armor_order(term, context, self.body_armors, self.enchant_type_lookup):
+            return True, False
+        return False, True
+
+
+###############################################################
+# Enchant combos match when both parts are found within two   #
+# lines of each other, in either order. The closest pair wins #
+# with the second part below the first preferred, so a part   #
+# shared by two combos pairs with its own line.               #
+###############################################################
+def find_enchant_combo_spans(pattern_ids, occurrences):
+    if len(pattern_ids) != 2:
+        return None
+
+    first_spans = occurrences.get(pattern_ids[0])
+    second_spans = occurrences.get(pattern_ids[1])
+    if not first_spans or not second_spans:
+        return None
+
+    best = None
+    for first in first_spans:
+        for second in second_spans:
+            gap = second[0] - first[0]
+            if 1 <= abs(gap) <= 2:
+                key = (abs(gap), gap < 0)
+                if best is None or key < best[0]:
+                    best = (key, first, second)
+    return sorted(best[1:]) if best else None
+
+
+####################################################################
+# Stack ratio ("19/20") on line idx or the two after it, or None   #
+# when the OCR text has none                                       #
+####################################################################
+def read_stack_ratio(lines, idx):
+    # Search current and next 2 lines
+    for j in range(idx, min(idx + 3, len(lines))):
+        line = lines[j].translate(OCR_DIGIT_TRANSLATION)
+
+        # Match flexible patterns like 19/20, 19 / 20, 19|20, etc.
+        ratio = parse_stack_ratio(line)
+        if ratio:
+            return ratio
+
+    return None
+
+
+def parse_stack_ratio(line):
+    match = STACK_RATIO_PATTERN.search(line)
+    if not match:
+        return None
+
+    raw_current, raw_max = match.groups()
+    try:
+        current = int(raw_current)
+        maximum = int(raw_max)
+    except ValueError:
+        return None
+
+    if maximum in VALID_STACK_MAX_VALUES and 0 <= current <= maximum:
+        return current, maximum
+
+    # Fallback fix: take last digit of current if it's obviously wrong
+    if maximum in VALID_STACK_MAX_VALUES:
+        current_last = int(str(current)[-1])
+        if current_last <= maximum:
+            return current_last, maximum
+
+    return None
+
+
+#############################################################################
+# Batch re-matching of stored OCR texts, e.g. after the terms dataset       #
+# changed mid-league. Returns one match list per text, in input order.      #
+# With workers > 1 the texts are spread over a process pool, each worker    #
+# gets the matcher once through the pool initializer.                       #
+#############################################################################
+def match_many(matcher, texts, workers=0, fuzzy=True, chunksize=BATCH_CHUNK_SIZE) -> list:
+    texts = list(texts)
+    workers = max(0, int(workers or 0))
+    if workers < 2 or len(texts) <= chunksize:
+        return [matcher.match(text, fuzzy=fuzzy) for text in texts]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(matcher,)) as pool:
+        return list(pool.map(_match_worker, texts, [fuzzy] * len(texts), chunksize=chunksize))
+
+
+_WORKER_MATCHER = None
+
+
+def _init_worker(matcher):
+    global _WORKER_MATCHER
+    _WORKER_MATCHER = matcher
+
+
+def _match_worker(text, fuzzy):
+    return _WORKER_MATCHER.match(text, fuzzy=fuzzy)
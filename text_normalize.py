@@ -0,0 +1,89 @@
+import re
+from functools import lru_cache
+
+#############################################################################
+# Text normalization shared by term loading, OCR matching and the stored    #
+# rows. Patterns and translation tables are compiled once; results for     #
+# short strings (the bounded vocabulary of term, item and base type names) #
+# are memoized. Output is byte-identical to the earlier chained            #
+# replace / re.sub versions, "python benchmark.py normalize" checks that.  #
+#############################################################################
+APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "`": "'"})
+
+NAME_CACHE_MAX_LENGTH = 80  # longer input is OCR text, not a name worth caching
+NAME_CACHE_SIZE = 16384
+
+_UPPER_POSSESSIVE = re.compile(r"(')S\b")
+_TITLE_WORD = re.compile(r"\b\w+'?s?\b")
+_POSSESSIVE = re.compile(r"\b(\w+)(?:'s|’s)\b")
+# Disallowed characters become spaces and whitespace runs collapse to one space. Both
+# are runs of "not a word character, %, ' or ;", so a single substitution does both
+_SEARCH_SEPARATORS = re.compile(r"[^\w%';]+")
+
+
+def _title_word(match):
+    word = match.group(0)
+    if word.lower().endswith("'s") and len(word) > 2:
+        base = word[:-2]
+        suffix = word[-2:]
+        # Capitalize first letter of base, lowercase rest, suffix lowercase
+        return base[:1].upper() + base[1:].lower() + suffix.lower()
+    return word[:1].upper() + word[1:].lower()
+
+
+def _smart_title_case(text):
+    text = text.translate(APOSTROPHES)
+    text = _UPPER_POSSESSIVE.sub(r"\1s", text)
+    return _TITLE_WORD.sub(_title_word, text)
+
+
+_cached_smart_title_case = lru_cache(maxsize=NAME_CACHE_SIZE)(_smart_title_case)
+
+
+####################################################################
+# Fixes title case issues like checking for items with apostrophes #
+####################################################################
+def smart_title_case(text):
+    text = str(text)
+    if len(text) <= NAME_CACHE_MAX_LENGTH:
+        return _cached_smart_title_case(text)
+    return _smart_title_case(text)
+
+
+def normalize_name_for_lookup(name: str) -> str:
+    if not name:
+        return name
+
+    normalized = name
+    normalized = normalized.replace(" Of The ", " of the ")
+    normalized = normalized.replace(" Of ", " of ")
+    normalized = normalized.replace("-Attuned", "-attuned")
+    normalized = normalized.replace("Three-Step", "Three-step")
+
+    return normalized
+
+
+def remove_possessive_s(text: str) -> str:
+    return _POSSESSIVE.sub(r"\1", text)
+
+
+def canonicalize(text: str) -> str:
+    if not text:
+        return ""
+
+    text = remove_possessive_s(str(text).translate(APOSTROPHES))
+    return _SEARCH_SEPARATORS.sub(" ", text).strip().lower()
+
+
+def _normalize_for_search(s):
+    # "—", "“" and "”" fall under the separators as well, they need no replace of their own
+    return _SEARCH_SEPARATORS.sub(" ", s).strip().lower()  # keep %, ', ; for precise matching
+
+
+_cached_normalize_for_search = lru_cache(maxsize=NAME_CACHE_SIZE)(_normalize_for_search)
+
+
+def normalize_for_search(s: str) -> str:
+    if len(s) <= NAME_CACHE_MAX_LENGTH:
+        return _cached_normalize_for_search(s)
+    return _normalize_for_search(s)
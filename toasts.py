@@ -13,6 +13,7 @@ import ocr_utils as utils
 from logger import log_message
 from renderer import render_item, get_border_color
 from settings import get_setting, set_setting
+from stage_timing import span
 from tree_manager import TreeManager
 
 
@@ -265,10 +266,12 @@ def show(root, item, message=None, duration=None, tree_manager: TreeManager = No
         message = (added_owned_txt + added_record_number_txt + item_text + added_stack_size_txt + added_tier_txt +
                    added_estimated_value_txt + added_5_link_value_txt + added_6_link_value_txt)
 
-    tk_img = render_toast_image(item)
+    with span("toast"):
+        with span("render"):
+            tk_img = render_toast_image(item)
 
-    return create_toast(root, message, image=tk_img, duration=duration, is_missing=is_missing, item=item,
-                        tree_manager=tree_manager, tracker=tracker)
+        return create_toast(root, message, image=tk_img, duration=duration, is_missing=is_missing, item=item,
+                            tree_manager=tree_manager, tracker=tracker)
 
 
 def show_message(root, message, duration=None):
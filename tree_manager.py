@@ -11,10 +11,9 @@ from pytz import InvalidTimeError
 import currency_utils
 import ocr_utils as utils
 from config import ROW_HEIGHT, layout_keywords, TREE_COLUMNS, DEBUGGING, data_file_base, BP_ENCHANTMENT_OPTIONS
-from csv_manager import CSVManager
+from data_manager import create_data_manager
 from gui.custom_hours_popup import CustomHoursPopup
 from gui.item_overview_frame import ItemOverviewFrame
-from json_manager import JSONManager
 from settings import get_setting
 from tree_utils import get_item_name_str, generate_item_id
 import pyinstrument
@@ -35,10 +34,7 @@ class TreeManager:
         saved_mode = get_setting("Application", "export_mode", default="CSV").upper()
         base = Path(data_file_base)
 
-        if saved_mode == "JSON":
-            self.data_mgr = JSONManager(base)
-        else:
-            self.data_mgr = CSVManager(base)
+        self.data_mgr = create_data_manager(saved_mode, base)
         self.tree_columns = TREE_COLUMNS
         self.columns = [col["id"] for col in TREE_COLUMNS]
         self.update_visible_columns()